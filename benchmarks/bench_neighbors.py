@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark of Verlet neighbor lists against rebuilding the list for every evaluation.
+
+Each case is a short MD-like trajectory of a create_structure() supercell:
+every frame displaces all atoms by a small random step, as successive
+relaxation or MD steps do. Per frame, the cases time:
+    - rebuild: ase.neighborlist.neighbor_list from scratch (what a calculator
+      without a shared list does on every get_potential_energy)
+    - verlet: VerletList.pairs(), which rebuilds only once an atom has moved
+      more than skin / 2 and otherwise recomputes the listed distances
+    - build: one full VerletList build (cutoff + skin), for reference
+
+Usage:
+    python benchmarks/bench_neighbors.py [--sizes 4,8,12] [--cutoff 6] [--skin 0.5] [--output neighbors.json]
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from harness import ROOT, add_arguments, finish, measure, quiet  # noqa: E402
+
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+from ase.neighborlist import neighbor_list  # noqa: E402
+
+from chatmat.build_structures import create_structure  # noqa: E402
+from chatmat.neighbors import VerletList  # noqa: E402
+
+MATERIALS = ("cu", "si", "nacl")
+
+
+def trajectory(atoms, n_frames: int, step: float, seed: int = 0):
+    """Positions of n_frames frames, each displaced by a random step (A, per component) from the last."""
+    rng = np.random.default_rng(seed)
+    positions = atoms.positions.copy()
+    frames = []
+    for _ in range(n_frames):
+        positions = positions + rng.normal(0, step, positions.shape)
+        frames.append(positions)
+    return frames
+
+
+def frame_calls(atoms, frames, evaluate):
+    """One callable per frame, setting the frame's positions and evaluating it."""
+    def call(positions):
+        atoms.positions = positions
+        return evaluate(atoms)
+    return [lambda positions=positions: call(positions) for positions in frames]
+
+
+def bench_material(name, n, cutoff, skin, n_frames, step, repeats):
+    with quiet():
+        atoms = create_structure(name, [n, n, n])
+    frames = trajectory(atoms, n_frames, step)
+    label = f"{name} {n}x{n}x{n}, {len(atoms)} atoms"
+
+    nl = VerletList(cutoff, skin)
+    results = [
+        measure(f"rebuild[{label}]", frame_calls(atoms, frames, lambda a: neighbor_list("ijd", a, cutoff)),
+                repeats, memory=False),
+        measure(f"verlet[{label}]", frame_calls(atoms, frames, nl.pairs), repeats, memory=False),
+        measure(f"build[{label}]", [lambda: VerletList(cutoff, skin).build(atoms)], repeats, memory=False),
+    ]
+    results[1]["rebuilds"] = nl.builds
+    results[1]["evaluations"] = nl.updates
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    add_arguments(parser)
+    parser.add_argument("--sizes", default="4,8,12", help="Comma-separated supercell sizes n (n x n x n)")
+    parser.add_argument("--materials", default=",".join(MATERIALS))
+    parser.add_argument("--cutoff", type=float, default=6.0, help="Pair cutoff in A")
+    parser.add_argument("--skin", type=float, default=0.5, help="Verlet skin in A")
+    parser.add_argument("--frames", type=int, default=20, help="Frames per trajectory")
+    parser.add_argument("--step", type=float, default=0.005, help="Random displacement per frame (A)")
+    args = parser.parse_args()
+
+    sizes = [int(n) for n in args.sizes.split(",")]
+    results = []
+    for name in args.materials.split(","):
+        for n in sizes:
+            print(f"⏱️  {name} {n}x{n}x{n} ...", file=sys.stderr)
+            results += bench_material(name, n, args.cutoff, args.skin, args.frames, args.step, args.repeats)
+
+    meta = {"sizes": sizes, "cutoff": args.cutoff, "skin": args.skin, "frames": args.frames, "step": args.step}
+    sys.exit(finish(args, results, meta))
+
+
+if __name__ == "__main__":
+    main()
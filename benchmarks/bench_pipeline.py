@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the /calculate/ pipeline, stage by stage.
+
+Cases:
+    - create_structure for every MATERIAL_DATABASE and COMPOUND_DATABASE entry,
+      at each supercell size
+    - get_structure for the mp/cod/url/file/string sources, with the network
+      replaced by local stubs (uncached, and served from the structure cache)
+    - XYZ serialization of the built structures
+    - end-to-end POST /calculate/ through the FastAPI TestClient with the mock
+      calculator (the result cache is cleared before every request)
+
+Usage:
+    python benchmarks/bench_pipeline.py [--repeats 5] [--sizes 1,2,4] [--output baseline.json]
+    python benchmarks/bench_pipeline.py --baseline baseline.json   # exit 1 on regression
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import types
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from harness import ROOT, add_arguments, finish, measure, quiet  # noqa: E402
+
+sys.path.insert(0, ROOT)
+os.environ["CHATMAT_MODEL"] = "mock"
+os.environ["CHATMAT_WARMUP"] = ""
+os.environ.pop("CHATMAT_CACHE_DIR", None)
+
+from ase.io import read, write  # noqa: E402
+
+from chatmat import build_structures  # noqa: E402
+from chatmat.build_structures import (COMPOUND_DATABASE, MATERIAL_DATABASE,  # noqa: E402
+                                      create_structure, get_structure)
+from chatmat.cache import result_cache, structure_cache  # noqa: E402
+
+
+def to_xyz(atoms) -> str:
+    buffer = io.StringIO()
+    write(buffer, atoms, format="xyz")
+    return buffer.getvalue()
+
+
+def database_entries():
+    """(name, compound) for every built-in material."""
+    entries = [(name, None) for name in MATERIAL_DATABASE]
+    entries += [(key, data["elements"]) for key, data in COMPOUND_DATABASE.items()]
+    return entries
+
+
+def bench_create_structure(sizes, repeats):
+    results = []
+    entries = database_entries()
+    for n in sizes:
+        dims = [n, n, n]
+        calls = [lambda name=name, compound=compound: create_structure(name, dims, compound=compound)
+                 for name, compound in entries]
+        results.append(measure(f"create_structure[{n}x{n}x{n}]", calls, repeats))
+    return results
+
+
+class _StubResponse:
+    status_code = 200
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+@contextlib.contextmanager
+def stub_sources(cif: str):
+    """Serve every network source from the given CIF text (works without requests/mp-api installed)."""
+    def fake_mp(material_id, api_key=None):
+        return read(io.StringIO(cif), format="cif")
+
+    fake_requests = types.ModuleType("requests")
+    fake_requests.get = lambda url, timeout=None, **kwargs: _StubResponse(cif)
+    with mock.patch.dict(sys.modules, {"requests": fake_requests}), \
+            mock.patch.object(build_structures, "fetch_from_materials_project", fake_mp):
+        yield
+
+
+def bench_get_structure(repeats):
+    buffer = io.BytesIO()  # the CIF writer needs a binary file
+    with quiet():
+        write(buffer, create_structure("nacl", [1, 1, 1]), format="cif")
+    cif = buffer.getvalue().decode()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "nacl.cif")
+        with open(path, "w") as f:
+            f.write(cif)
+
+        sources = {
+            "mp": ("mp-22862", {}),
+            "cod": ("9008678", {}),
+            "url": ("http://stub.local/nacl.cif", {}),
+            "file": (path, {}),
+            "string": ("nacl", {"content": cif, "format": "cif"}),
+        }
+        with stub_sources(cif):
+            for source_type, (source, kwargs) in sources.items():
+                def uncached(source=source, source_type=source_type, kwargs=kwargs):
+                    structure_cache.clear()
+                    return get_structure(source, source_type=source_type, dims=[2, 2, 2], **kwargs)
+                results.append(measure(f"get_structure[{source_type}]", [uncached], repeats * 10))
+
+            for source_type in ("mp", "cod"):
+                source, _ = sources[source_type]
+                cached = lambda source=source, source_type=source_type: get_structure(
+                    source, source_type=source_type, dims=[2, 2, 2])
+                results.append(measure(f"get_structure[{source_type},cached]", [cached], repeats * 10))
+    return results
+
+
+def bench_xyz(sizes, repeats):
+    results = []
+    with quiet():
+        structures = {n: create_structure("si", [n, n, n]) for n in sizes}
+    for n, atoms in structures.items():
+        results.append(measure(f"xyz_write[si {n}x{n}x{n}, {len(atoms)} atoms]",
+                               [lambda atoms=atoms: to_xyz(atoms)], repeats * 10))
+    return results
+
+
+def bench_calculate(sizes, repeats):
+    from fastapi.testclient import TestClient
+    from chatmat import backend
+
+    client = TestClient(backend.app)
+    results = []
+    for name in ("si", "cu", "nacl", "gan"):
+        for n in sizes:
+            payload = {"intent": "CALCULATE", "material_name": name,
+                       "structure_details": {"supercell_dims": [n, n, n]}}
+
+            def post(payload=payload):
+                result_cache.clear()
+                response = client.post("/calculate/", json=payload)
+                response.raise_for_status()
+                return response
+
+            results.append(measure(f"calculate[{name} {n}x{n}x{n}]", [post], repeats * 4))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    add_arguments(parser)
+    parser.add_argument("--sizes", default="1,2,4", help="Comma-separated supercell sizes n (n x n x n)")
+    parser.add_argument("--only", help="Comma-separated subset: create,get,xyz,calculate")
+    args = parser.parse_args()
+
+    sizes = [int(n) for n in args.sizes.split(",")]
+    selected = set(args.only.split(",")) if args.only else {"create", "get", "xyz", "calculate"}
+
+    results = []
+    if "create" in selected:
+        print("⏱️  create_structure ...", file=sys.stderr)
+        results += bench_create_structure(sizes, args.repeats)
+    if "get" in selected:
+        print("⏱️  get_structure ...", file=sys.stderr)
+        results += bench_get_structure(args.repeats)
+    if "xyz" in selected:
+        print("⏱️  XYZ serialization ...", file=sys.stderr)
+        results += bench_xyz(sizes, args.repeats)
+    if "calculate" in selected:
+        print("⏱️  /calculate/ ...", file=sys.stderr)
+        results += bench_calculate(sizes, args.repeats)
+
+    meta = {"sizes": sizes, "n_entries": len(database_entries())}
+    sys.exit(finish(args, results, meta))
+
+
+if __name__ == "__main__":
+    main()
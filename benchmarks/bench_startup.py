@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark for the ChatMat backend.
+
+Every measurement runs in a fresh interpreter so that module caches do not
+hide import costs:
+    - import time of chatmat.backend
+    - duration of each warm-up step (CHATMAT_WARMUP)
+    - latency of the first /calculate/ request with and without warm-up
+
+Usage:
+    python benchmarks/bench_startup.py [--repeats 5] [--model mock] [--output startup.json]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from harness import ROOT, summarize  # noqa: E402
+
+IMPORT_SNIPPET = """
+import time
+start = time.perf_counter()
+import chatmat.backend
+print(time.perf_counter() - start)
+"""
+
+WARMUP_SNIPPET = """
+import json, contextlib, io
+with contextlib.redirect_stdout(io.StringIO()):
+    from chatmat import backend
+    state = backend.warm_up()
+print(json.dumps({"steps": state["steps"], "errors": state["errors"]}))
+"""
+
+FIRST_REQUEST_SNIPPET = """
+import time, contextlib, io
+with contextlib.redirect_stdout(io.StringIO()):
+    from fastapi.testclient import TestClient
+    from chatmat import backend
+    if WARM:
+        backend.warm_up()
+    client = TestClient(backend.app)
+    payload = {"intent": "CALCULATE", "material_name": "Si",
+               "structure_details": {"supercell_dims": [2, 2, 2]}}
+    start = time.perf_counter()
+    response = client.post("/calculate/", json=payload)
+    elapsed = time.perf_counter() - start
+    response.raise_for_status()
+print(elapsed)
+"""
+
+
+def run_python(snippet: str, env: dict) -> str:
+    result = subprocess.run([sys.executable, "-c", snippet], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    return result.stdout.strip().splitlines()[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--model", default="mock", help="CHATMAT_MODEL for the warm-up/first-request runs")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    env = {**os.environ, "CHATMAT_MODEL": args.model, "PYTHONWARNINGS": "ignore"}
+
+    print("⏱️  Import time of chatmat.backend ...", file=sys.stderr)
+    import_times = [float(run_python(IMPORT_SNIPPET, env)) for _ in range(args.repeats)]
+
+    print("⏱️  Warm-up steps ...", file=sys.stderr)
+    warmup = json.loads(run_python(WARMUP_SNIPPET, env))
+
+    print("⏱️  First /calculate/ request ...", file=sys.stderr)
+    cold = [float(run_python(FIRST_REQUEST_SNIPPET.replace("WARM", "False"), env)) for _ in range(args.repeats)]
+    warm = [float(run_python(FIRST_REQUEST_SNIPPET.replace("WARM", "True"), env)) for _ in range(args.repeats)]
+
+    report = {
+        "python": sys.version.split()[0],
+        "model": args.model,
+        "import_backend": {**summarize(import_times), "samples_s": import_times},
+        "warmup": warmup,
+        "first_request_cold": {**summarize(cold), "samples_s": cold},
+        "first_request_warm": {**summarize(warm), "samples_s": warm},
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the split between request concurrency and threads per request on this machine.
+
+For every split "WxT" (W worker processes with T threads each), W processes
+are started with CHATMAT_THREADS_PER_WORKER=T, configured exactly as served
+workers are (threads.configure_worker: thread limits and, with --affinity,
+core pinning), and each evaluates --requests structures back to back. The
+report gives the per-request latency and the aggregate throughput of each
+split: more workers raise throughput until the cores are oversubscribed,
+more threads lower the latency of a single request.
+
+The workload is the resident foundation model on a create_structure()
+supercell with --model set to a model file, or a BLAS-bound stand-in with
+the same shape (dense layers over the atoms' neighbor pairs) with the
+default --model mock.
+
+Usage:
+    python benchmarks/bench_threads.py [--splits 1x8,2x4,4x2,8x1] [--affinity auto] [--output threads.json]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from harness import ROOT, add_arguments, finish, summarize  # noqa: E402
+
+sys.path.insert(0, ROOT)
+
+from chatmat.threads import available_cpus  # noqa: E402
+
+
+def default_splits(n_cores: int):
+    """Every W x T with W * T == n_cores, for powers of two W (plus W == n_cores)."""
+    workers, splits = 1, []
+    while workers < n_cores:
+        splits.append((workers, n_cores // workers))
+        workers *= 2
+    splits.append((n_cores, 1))
+    return splits
+
+
+def parse_splits(text: str):
+    splits = []
+    for item in text.split(","):
+        workers, _, threads = item.strip().lower().partition("x")
+        splits.append((int(workers), int(threads)))
+    return splits
+
+
+def run_worker(args) -> None:
+    """Body of one benchmark worker process; prints its latencies as JSON."""
+    import contextlib
+    import io
+
+    from chatmat.threads import configure_worker
+    applied = configure_worker(args.index, args.workers)
+
+    # Imported after the limits are set, so the BLAS/torch pools start with them
+    import numpy as np
+
+    from chatmat.build_structures import create_structure
+    from chatmat.calculators import evaluate
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        atoms = create_structure(args.material, [args.size] * 3)
+    if args.model == "mock":
+        rng = np.random.default_rng(args.index)
+        features = rng.normal(size=(len(atoms) * args.neighbors, args.hidden))
+        weights = [rng.normal(size=(args.hidden, args.hidden)) / args.hidden ** 0.5 for _ in range(args.layers)]
+
+        def request():
+            x = features
+            for w in weights:
+                x = np.tanh(x @ w)
+            return x.reshape(len(atoms), args.neighbors, -1).sum(axis=1)
+    else:
+        def request():
+            return evaluate(atoms)
+
+    request()  # warm-up (model load, JIT, thread pool start)
+    latencies = []
+    start = time.time()
+    for _ in range(args.requests):
+        begin = time.perf_counter()
+        request()
+        latencies.append(time.perf_counter() - begin)
+    print(json.dumps({"start": start, "end": time.time(), "latencies": latencies, "applied": applied}))
+
+
+def run_split(args, workers: int, threads: int):
+    env = {**os.environ, "CHATMAT_MODEL": args.model, "CHATMAT_THREADS_PER_WORKER": str(threads),
+           "CHATMAT_CPU_AFFINITY": args.affinity, "CHATMAT_WARMUP": "", "PYTHONWARNINGS": "ignore"}
+    command = [sys.executable, os.path.abspath(__file__), "--worker", "--workers", str(workers),
+               "--model", args.model, "--material", args.material, "--size", str(args.size),
+               "--requests", str(args.requests), "--neighbors", str(args.neighbors),
+               "--hidden", str(args.hidden), "--layers", str(args.layers)]
+    processes = [subprocess.Popen(command + ["--index", str(index)], cwd=ROOT, env=env,
+                                  stdout=subprocess.PIPE, text=True) for index in range(workers)]
+    reports = []
+    for process in processes:
+        output, _ = process.communicate()
+        if process.returncode:
+            raise RuntimeError(f"Benchmark worker exited with status {process.returncode}")
+        reports.append(json.loads(output.strip().splitlines()[-1]))
+
+    latencies = [t for report in reports for t in report["latencies"]]
+    wall = max(r["end"] for r in reports) - min(r["start"] for r in reports)
+    result = {"name": f"{workers} workers x {threads} threads", **summarize(latencies)}
+    # Aggregate throughput of all workers together, not 1 / latency
+    result["throughput_per_s"] = len(latencies) / wall if wall > 0 else float("inf")
+    result["peak_mem_kb"] = None
+    result["workers"], result["threads"] = workers, threads
+    result["cores"] = [r["applied"].get("cores") for r in reports]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    add_arguments(parser)
+    parser.add_argument("--splits", help="Comma-separated WxT splits (default: W x T == available cores)")
+    parser.add_argument("--affinity", default="", help="CHATMAT_CPU_AFFINITY for the workers, e.g. auto")
+    parser.add_argument("--model", default="mock", help="CHATMAT_MODEL, or mock for the BLAS stand-in")
+    parser.add_argument("--material", default="cu")
+    parser.add_argument("--size", type=int, default=4, help="Supercell size n (n x n x n)")
+    parser.add_argument("--requests", type=int, default=20, help="Requests per worker")
+    parser.add_argument("--neighbors", type=int, default=24, help="Stand-in: neighbor pairs per atom")
+    parser.add_argument("--hidden", type=int, default=128, help="Stand-in: feature width")
+    parser.add_argument("--layers", type=int, default=3, help="Stand-in: dense layers per request")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--workers", type=int, default=1, help=argparse.SUPPRESS)
+    parser.add_argument("--index", type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    n_cores = len(available_cpus())
+    splits = parse_splits(args.splits) if args.splits else default_splits(n_cores)
+    results = []
+    for workers, threads in splits:
+        print(f"⏱️  {workers} worker(s) x {threads} thread(s) ...", file=sys.stderr)
+        results.append(run_split(args, workers, threads))
+
+    best = max(results, key=lambda r: r["throughput_per_s"])
+    print(f"🏁 Highest throughput: {best['name']} ({best['throughput_per_s']:.1f} requests/s)", file=sys.stderr)
+    meta = {"cores": n_cores, "affinity": args.affinity, "model": args.model, "material": args.material,
+            "size": args.size, "best": best["name"]}
+    sys.exit(finish(args, results, meta))
+
+
+if __name__ == "__main__":
+    main()
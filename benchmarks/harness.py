@@ -0,0 +1,165 @@
+"""
+Small benchmark harness shared by the ChatMat benchmarks.
+
+A benchmark case is a name plus a list of zero-argument callables. Each
+callable is one sample; the harness reports p50/p95 latency, throughput and
+the peak Python memory allocated while running the callables once more
+under tracemalloc (kept out of the timed runs because tracing slows them
+down). Results can be saved as a JSON baseline and compared with a later
+run, so that slowdowns show up as regressions.
+"""
+
+import contextlib
+import io
+import json
+import math
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def percentile(samples: Sequence[float], q: float) -> float:
+    """q-th percentile (0-100) of samples, nearest-rank method."""
+    ordered = sorted(samples)
+    if not ordered:
+        return float("nan")
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(samples: Sequence[float]) -> Dict[str, float]:
+    """Latency statistics of samples given in seconds."""
+    total = sum(samples)
+    return {
+        "n": len(samples),
+        "p50_ms": percentile(samples, 50) * 1e3,
+        "p95_ms": percentile(samples, 95) * 1e3,
+        "mean_ms": statistics.fmean(samples) * 1e3,
+        "min_ms": min(samples) * 1e3,
+        "max_ms": max(samples) * 1e3,
+        "throughput_per_s": len(samples) / total if total > 0 else float("inf"),
+    }
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silence the emoji progress prints of the code under test."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def measure(name: str, calls: Iterable[Callable[[], object]], repeats: int = 5,
+            warmup: int = 1, memory: bool = True) -> Dict[str, object]:
+    """
+    Time every callable `repeats` times (after `warmup` untimed rounds).
+
+    Args:
+        name: Case name used in reports and baselines
+        calls: Zero-argument callables; every call is one latency sample
+        repeats: Timed rounds over all callables
+        warmup: Untimed rounds run first (imports, caches, JIT)
+        memory: Also record the peak traced memory of one extra round
+
+    Returns:
+        Summary dict (see summarize) with "name" and "peak_mem_kb"
+    """
+    calls = list(calls)
+    with quiet():
+        for _ in range(warmup):
+            for call in calls:
+                call()
+
+        samples: List[float] = []
+        for _ in range(repeats):
+            for call in calls:
+                start = time.perf_counter()
+                call()
+                samples.append(time.perf_counter() - start)
+
+        peak = None
+        if memory:
+            tracemalloc.start()
+            try:
+                for call in calls:
+                    call()
+                peak = tracemalloc.get_traced_memory()[1] / 1024
+            finally:
+                tracemalloc.stop()
+
+    result = {"name": name, **summarize(samples)}
+    result["peak_mem_kb"] = peak
+    return result
+
+
+def print_table(results: List[Dict[str, object]], file=sys.stderr) -> None:
+    """Human-readable table of benchmark results."""
+    header = f"{'case':<40} {'n':>6} {'p50 ms':>10} {'p95 ms':>10} {'ops/s':>10} {'peak KiB':>10}"
+    print(header, file=file)
+    print("-" * len(header), file=file)
+    for r in results:
+        peak = f"{r['peak_mem_kb']:.0f}" if r.get("peak_mem_kb") is not None else "-"
+        print(f"{r['name']:<40} {r['n']:>6} {r['p50_ms']:>10.3f} {r['p95_ms']:>10.3f} "
+              f"{r['throughput_per_s']:>10.1f} {peak:>10}", file=file)
+
+
+def load_baseline(path: str) -> Dict[str, Dict[str, object]]:
+    with open(path) as f:
+        data = json.load(f)
+    return {r["name"]: r for r in data["results"]}
+
+
+def compare(results: List[Dict[str, object]], baseline: Dict[str, Dict[str, object]],
+            tolerance: float = 0.25, metric: str = "p50_ms") -> List[str]:
+    """
+    Compare results with a baseline.
+
+    Returns:
+        One message per case whose metric is more than `tolerance` (fraction)
+        above the baseline; cases missing from the baseline are ignored
+    """
+    regressions = []
+    for r in results:
+        base = baseline.get(r["name"])
+        if not base or not base.get(metric):
+            continue
+        ratio = r[metric] / base[metric]
+        if ratio > 1 + tolerance:
+            regressions.append(f"{r['name']}: {metric} {r[metric]:.3f} vs baseline "
+                               f"{base[metric]:.3f} ({ratio:.2f}x)")
+    return regressions
+
+
+def add_arguments(parser) -> None:
+    """Command-line options shared by the benchmark scripts."""
+    parser.add_argument("--repeats", type=int, default=5, help="Timed rounds per case")
+    parser.add_argument("--output", help="Write the JSON report (usable as a baseline) to this file")
+    parser.add_argument("--baseline", help="Compare against this JSON report; exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed slowdown of p50 vs the baseline (fraction, default 0.25)")
+
+
+def finish(args, results: List[Dict[str, object]], meta: Optional[Dict[str, object]] = None) -> int:
+    """Print, save and (optionally) compare the results; returns the process exit code."""
+    report = {"python": sys.version.split()[0], **(meta or {}), "results": results}
+    print_table(results)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+        print(f"💾 Saved report to {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+    if args.baseline:
+        regressions = compare(results, load_baseline(args.baseline), args.tolerance)
+        for message in regressions:
+            print(f"❌ Regression: {message}", file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"✅ No regressions against {args.baseline}", file=sys.stderr)
+    return 0
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Open-loop load generator for ChatMat's /calculate/ endpoint.
+
+Requests are drawn from a weighted mix of realistic request types and sent
+at a fixed target rate (not back-to-back), so queueing shows up as latency
+instead of silently lowering the offered load. The rate is stepped up and
+the first step where the service falls behind (achieved throughput below
+90% of the target, p95 above the SLO or too many errors) is reported as
+the saturation point.
+
+The default mix uses the COD source and an Ollama LLM request, so run it
+together with the local stand-ins (benchmarks/mock_servers.py), e.g.:
+
+    python benchmarks/mock_servers.py --latency 0.1 &
+    CHATMAT_MODEL=mock CHATMAT_COD_URL=http://127.0.0.1:8081/cod \\
+        python -m chatmat.backend --workers 4 &
+    python benchmarks/loadgen.py --rps 5,10,20,40 --duration 15
+
+Usage:
+    python benchmarks/loadgen.py [--url http://127.0.0.1:8000] [--rps 5,10,20] [--duration 10]
+                                 [--mix mix.json] [--bust-cache] [--slo-ms 2000] [--output report.json]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from harness import percentile  # noqa: E402
+
+# (weight, payload) pairs; "ollama_url" in llm_params is filled in from --ollama-url
+DEFAULT_MIX = [
+    (40, {"intent": "CALCULATE", "material_name": "Si",
+          "structure_details": {"supercell_dims": [2, 2, 2]}}),
+    (20, {"intent": "CALCULATE", "material_name": "NaCl",
+          "structure_details": {"supercell_dims": [3, 3, 3], "compound": ["Na", "Cl"]}}),
+    (10, {"intent": "CALCULATE", "material_name": "Fe",
+          "structure_details": {"supercell_dims": [4, 4, 4]}}),
+    (15, {"intent": "CALCULATE", "material_name": "9008678",
+          "structure_details": {"supercell_dims": [2, 2, 2], "source_type": "cod"}}),
+    (15, {"intent": "CALCULATE", "material_name": "GaN 2x2x2 supercell",
+          "user_input": "Calculate the energy of a 2x2x2 GaN supercell",
+          "structure_details": {"supercell_dims": [1, 1, 1], "use_llm": True, "llm_provider": "ollama",
+                                "llm_params": {"model": "llama3"}}}),
+]
+
+
+def load_mix(path: Optional[str], ollama_url: Optional[str]):
+    """Request mix from a JSON file ([[weight, payload], ...]) or the default mix."""
+    if path:
+        with open(path) as f:
+            mix = [(weight, payload) for weight, payload in json.load(f)]
+    else:
+        mix = [(weight, json.loads(json.dumps(payload))) for weight, payload in DEFAULT_MIX]
+    if ollama_url:
+        for _, payload in mix:
+            details = payload.get("structure_details", {})
+            if details.get("llm_provider") == "ollama":
+                details.setdefault("llm_params", {})["base_url"] = ollama_url
+    return mix
+
+
+def post(url: str, payload: dict, timeout: float):
+    """(status code, latency in s); status 0 means a connection error or timeout."""
+    data = json.dumps(payload).encode()
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except Exception:
+        status = 0
+    return status, time.perf_counter() - start
+
+
+def run_step(url: str, mix, rps: float, duration: float, concurrency: int, timeout: float,
+             bust_cache: bool, rng: random.Random) -> Dict[str, object]:
+    """Send requests at `rps` for `duration` seconds and summarize the outcome."""
+    weights = [weight for weight, _ in mix]
+    payloads = [payload for _, payload in mix]
+    n_requests = max(1, int(rps * duration))
+    outcomes: List[tuple] = []
+    lock = threading.Lock()
+
+    def fire(payload):
+        outcome = post(url, payload, timeout)
+        with lock:
+            outcomes.append(outcome)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for i in range(n_requests):
+            # Open loop: request i is due at start + i / rps, however slow earlier ones are
+            delay = start + i / rps - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            payload = rng.choices(payloads, weights)[0]
+            if bust_cache and not payload["structure_details"].get("use_llm"):
+                # user_input is ignored for non-LLM requests but is part of the result cache key
+                payload = {**payload, "user_input": f"loadgen-{i}-{rng.random()}"}
+            pool.submit(fire, payload)
+    elapsed = time.perf_counter() - start
+
+    latencies = [latency for status, latency in outcomes if status == 200]
+    errors = sum(1 for status, _ in outcomes if status != 200)
+    return {
+        "target_rps": rps,
+        "sent": n_requests,
+        "achieved_rps": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        "error_rate": errors / len(outcomes) if outcomes else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1e3 if latencies else None,
+        "p95_ms": percentile(latencies, 95) * 1e3 if latencies else None,
+        "p99_ms": percentile(latencies, 99) * 1e3 if latencies else None,
+        "status_codes": {str(code): sum(1 for status, _ in outcomes if status == code)
+                         for code in sorted({status for status, _ in outcomes})},
+    }
+
+
+def is_saturated(step: Dict[str, object], slo_ms: float, max_error_rate: float) -> bool:
+    return (step["achieved_rps"] < 0.9 * step["target_rps"]
+            or step["error_rate"] > max_error_rate
+            or step["p95_ms"] is None or step["p95_ms"] > slo_ms)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Backend base URL")
+    parser.add_argument("--rps", default="2,5,10,20", help="Comma-separated target request rates")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per rate step")
+    parser.add_argument("--concurrency", type=int, default=64, help="Maximum requests in flight")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout (s)")
+    parser.add_argument("--mix", help="JSON file with [[weight, payload], ...]")
+    parser.add_argument("--ollama-url", help="base_url for Ollama requests in the mix")
+    parser.add_argument("--bust-cache", action="store_true", help="Make every request unique (no result cache hits)")
+    parser.add_argument("--slo-ms", type=float, default=2000.0, help="p95 latency objective")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--keep-going", action="store_true", help="Run all steps even after saturation")
+    args = parser.parse_args()
+
+    url = args.url.rstrip("/") + "/calculate/"
+    mix = load_mix(args.mix, args.ollama_url)
+    rng = random.Random(args.seed)
+
+    steps = []
+    saturation = None
+    for rps in [float(r) for r in args.rps.split(",")]:
+        print(f"🚦 {rps:g} req/s for {args.duration:g} s ...", file=sys.stderr)
+        step = run_step(url, mix, rps, args.duration, args.concurrency, args.timeout, args.bust_cache, rng)
+        steps.append(step)
+        p95 = f"{step['p95_ms']:.0f} ms" if step["p95_ms"] is not None else "-"
+        print(f"   achieved {step['achieved_rps']:.1f} req/s, p95 {p95}, "
+              f"errors {step['error_rate']:.1%}", file=sys.stderr)
+        if saturation is None and is_saturated(step, args.slo_ms, args.max_error_rate):
+            saturation = rps
+            print(f"⚠️  Saturated at {rps:g} req/s", file=sys.stderr)
+            if not args.keep_going:
+                break
+
+    report = {"url": url, "duration_s": args.duration, "slo_ms": args.slo_ms,
+              "saturation_rps": saturation, "steps": steps}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
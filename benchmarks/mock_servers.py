@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Local stand-ins for the external services used by ChatMat.
+
+    - Ollama:   POST /api/chat, answers with structure-parameter JSON
+    - COD:      GET  /cod/{id}.cif, serves CIF files
+    - MP:       GET  /materials/summary/?material_ids=mp-1,mp-2 (Materials Project
+                REST shape, structures as pymatgen Structure dicts)
+
+Every server can add latency (fixed + uniform jitter) and fail a fraction
+of requests with HTTP 500, so that load tests can exercise slow and flaky
+dependencies. Materials are picked deterministically from the built-in
+databases, so the same ID always returns the same structure.
+
+Point ChatMat at them with:
+    CHATMAT_OLLAMA_URL=http://127.0.0.1:11434
+    CHATMAT_COD_URL=http://127.0.0.1:8081/cod
+    CHATMAT_MP_ENDPOINT=http://127.0.0.1:8082
+
+Usage:
+    python benchmarks/mock_servers.py [--latency 0.2] [--jitter 0.1] [--error-rate 0.05]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import io
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Optional
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from chatmat.build_structures import COMPOUND_DATABASE, MATERIAL_DATABASE, create_structure  # noqa: E402
+
+# Materials served by the stand-ins: every built-in entry
+MATERIALS: List[str] = sorted(MATERIAL_DATABASE) + sorted(COMPOUND_DATABASE)
+
+
+@dataclass
+class Faults:
+    """Latency and error injection settings of one stand-in server."""
+    latency: float = 0.0     # seconds added to every request
+    jitter: float = 0.0      # extra uniform random delay in [0, jitter] seconds
+    error_rate: float = 0.0  # fraction of requests answered with HTTP 500
+
+    async def apply(self) -> None:
+        delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.error_rate and random.random() < self.error_rate:
+            raise HTTPException(status_code=500, detail="Injected failure")
+
+
+def material_for(identifier: str) -> str:
+    """Deterministically map an arbitrary ID to a built-in material."""
+    digest = hashlib.sha1(identifier.encode()).digest()
+    return MATERIALS[int.from_bytes(digest[:4], "big") % len(MATERIALS)]
+
+
+@lru_cache(maxsize=None)
+def _unit_cell(material: str):
+    import contextlib
+    with contextlib.redirect_stdout(io.StringIO()):
+        compound = COMPOUND_DATABASE[material]["elements"] if material in COMPOUND_DATABASE else None
+        return create_structure(material, [1, 1, 1], compound=compound)
+
+
+@lru_cache(maxsize=None)
+def cif_for(material: str) -> str:
+    from ase.io import write
+    buffer = io.BytesIO()  # the CIF writer needs a binary file
+    write(buffer, _unit_cell(material), format="cif")
+    return buffer.getvalue().decode()
+
+
+def structure_dict(material: str) -> dict:
+    """pymatgen Structure.as_dict()-style description of a material."""
+    atoms = _unit_cell(material)
+    return {
+        "@module": "pymatgen.core.structure",
+        "@class": "Structure",
+        "charge": 0,
+        "lattice": {"matrix": atoms.cell.tolist(), "pbc": [True, True, True]},
+        "sites": [
+            {"species": [{"element": symbol, "occu": 1}], "abc": frac.tolist(), "xyz": xyz.tolist(),
+             "label": symbol, "properties": {}}
+            for symbol, frac, xyz in zip(atoms.get_chemical_symbols(), atoms.get_scaled_positions(),
+                                         atoms.positions)
+        ],
+    }
+
+
+# --- Ollama ---
+_WORD = re.compile(r"[A-Za-z][A-Za-z0-9_]*")
+_DIMS = re.compile(r"(\d+)\s*x\s*(\d+)\s*x\s*(\d+)")
+
+
+def ollama_answer(prompt: str) -> dict:
+    """Structure parameters for the first built-in material mentioned in the prompt."""
+    description = prompt.split(":", 1)[-1]
+    words = [w.lower() for w in _WORD.findall(description)]
+    material = next((w for w in words if w in MATERIAL_DATABASE or w in COMPOUND_DATABASE),
+                    material_for(description))
+    match = _DIMS.search(description)
+    dims = [int(n) for n in match.groups()] if match else [1, 1, 1]
+    data = COMPOUND_DATABASE.get(material) or MATERIAL_DATABASE[material]
+    return {
+        "material_name": material,
+        "structure_type": data["structure"],
+        "lattice_parameter": data["a"],
+        "supercell_dims": dims,
+        "compound": data.get("elements"),
+    }
+
+
+def create_ollama_app(faults: Optional[Faults] = None) -> FastAPI:
+    faults = faults or Faults()
+    app = FastAPI(title="Mock Ollama")
+
+    @app.post("/api/chat")
+    async def chat(request: Request):
+        await faults.apply()
+        body = await request.json()
+        prompt = next((m["content"] for m in reversed(body.get("messages", [])) if m.get("role") == "user"), "")
+        return {
+            "model": body.get("model", "llama3"),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "message": {"role": "assistant", "content": json.dumps(ollama_answer(prompt))},
+            "done": True,
+        }
+
+    @app.get("/api/tags")
+    async def tags():
+        return {"models": [{"name": "llama3"}]}
+
+    return app
+
+
+# --- COD ---
+def create_cod_app(faults: Optional[Faults] = None) -> FastAPI:
+    faults = faults or Faults()
+    app = FastAPI(title="Mock COD")
+
+    @app.get("/cod/{cod_id}.cif", response_class=PlainTextResponse)
+    async def cod_entry(cod_id: str):
+        await faults.apply()
+        if not cod_id.isdigit():
+            raise HTTPException(status_code=404, detail="Not found")
+        return cif_for(material_for(cod_id.lstrip("0") or "0"))
+
+    return app
+
+
+# --- Materials Project ---
+def create_mp_app(faults: Optional[Faults] = None) -> FastAPI:
+    faults = faults or Faults()
+    app = FastAPI(title="Mock Materials Project")
+
+    @app.get("/heartbeat")
+    async def heartbeat():
+        return {"status": "OK", "db_version": "mock"}
+
+    @app.get("/materials/summary/")
+    async def summary(material_ids: str = "", _fields: Optional[str] = None,
+                      _limit: int = 100, _skip: int = 0):
+        await faults.apply()
+        ids = [i for i in material_ids.split(",") if i] if material_ids else \
+            [f"mp-{n}" for n in range(_skip + 1, _skip + _limit + 1)]
+        fields = set(_fields.split(",")) if _fields else None
+        data = []
+        for material_id in ids:
+            material = material_for(material_id)
+            doc = {"material_id": material_id, "formula_pretty": material,
+                   "structure": structure_dict(material)}
+            data.append({k: v for k, v in doc.items() if fields is None or k in fields})
+        return {"data": data, "meta": {"total_doc": len(data)}}
+
+    return app
+
+
+# --- Running ---
+def start_in_thread(app: FastAPI, host: str = "127.0.0.1", port: int = 0):
+    """
+    Serve an app from a daemon thread.
+
+    Returns:
+        (server, base_url); call server.should_exit = True to stop it
+    """
+    import socket
+    import uvicorn
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    server = uvicorn.Server(uvicorn.Config(app, log_level="warning", lifespan="off"))
+    thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, f"http://{host}:{sock.getsockname()[1]}"
+
+
+def start_all(faults: Optional[Faults] = None, host: str = "127.0.0.1",
+              ports=(0, 0, 0)) -> dict:
+    """Start all three stand-ins; returns the environment variables that point ChatMat at them."""
+    ollama, ollama_url = start_in_thread(create_ollama_app(faults), host, ports[0])
+    cod, cod_url = start_in_thread(create_cod_app(faults), host, ports[1])
+    mp, mp_url = start_in_thread(create_mp_app(faults), host, ports[2])
+    return {
+        "servers": [ollama, cod, mp],
+        "env": {"CHATMAT_OLLAMA_URL": ollama_url, "CHATMAT_COD_URL": f"{cod_url}/cod",
+                "CHATMAT_MP_ENDPOINT": mp_url},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--ollama-port", type=int, default=11434)
+    parser.add_argument("--cod-port", type=int, default=8081)
+    parser.add_argument("--mp-port", type=int, default=8082)
+    parser.add_argument("--latency", type=float, default=0.0, help="Added delay per request (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random delay up to this (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failing with 500")
+    args = parser.parse_args()
+
+    faults = Faults(args.latency, args.jitter, args.error_rate)
+    started = start_all(faults, args.host, (args.ollama_port, args.cod_port, args.mp_port))
+    print("🧪 Mock services running; point ChatMat at them with:")
+    for name, value in started["env"].items():
+        print(f"   export {name}={value}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        for server in started["servers"]:
+            server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,10 @@
+"""
+Entry point for `python -m chatmat`.
+"""
+
+import sys
+
+from chatmat.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())
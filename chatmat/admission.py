@@ -0,0 +1,302 @@
+"""
+Memory-bounded admission control for /calculate/.
+
+Before a structure is built, the atom count is estimated from the unit-cell
+size times the product of the supercell dimensions, and memory and run time
+are estimated from per-atom costs (CHATMAT_BYTES_PER_ATOM,
+CHATMAT_SECONDS_PER_ATOM; see calibrate()). A request is then:
+    - rejected with 413 if it exceeds CHATMAT_MAX_ATOMS or CHATMAT_MAX_MEMORY_MB,
+    - queued as a background job (202 + /jobs/{id}) if it would run longer
+      than CHATMAT_SYNC_MAX_SECONDS,
+    - otherwise run synchronously.
+
+Concurrent work is limited by the number of atoms being processed
+(CHATMAT_ATOMS_BUDGET) rather than by the number of requests, so many small
+requests can run side by side while a large one gets the worker to itself.
+"""
+
+import math
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Optional
+
+try:
+    from . import config
+    from .build_structures import HTTPException, estimate_unit_cell_atoms, structure_cache_key
+    from .cache import SharedCache, structure_cache
+    from .surfaces import DEFAULT_LAYERS, adsorbate_atoms, slab_cell_atoms
+except ImportError:
+    import config
+    from build_structures import HTTPException, estimate_unit_cell_atoms, structure_cache_key
+    from cache import SharedCache, structure_cache
+    from surfaces import DEFAULT_LAYERS, adsorbate_atoms, slab_cell_atoms
+
+
+@dataclass
+class Estimate:
+    """Predicted size and cost of one calculation request."""
+    n_atoms: int
+    memory_mb: float
+    seconds: float
+    exact: bool  # False when the unit-cell size had to be assumed (LLM or uncached external source)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def cost_of(n_atoms: int, exact: bool = True, evaluated_atoms: Optional[int] = None) -> Estimate:
+    """
+    Memory and time estimate for evaluating n_atoms with the configured per-atom costs.
+
+    evaluated_atoms is the number of atoms the model actually sees, if fewer
+    (the unit cell of a perfect supercell, see symmetry.py).
+    """
+    evaluated = n_atoms if evaluated_atoms is None else evaluated_atoms
+    memory_mb = evaluated * config.BYTES_PER_ATOM / 2**20
+    if config.DECOMP_MEMORY_MB > 0:
+        # Larger structures are evaluated in chunks that fit into the ceiling
+        memory_mb = min(memory_mb, config.DECOMP_MEMORY_MB)
+    return Estimate(n_atoms=n_atoms,
+                    memory_mb=memory_mb,
+                    seconds=evaluated * config.SECONDS_PER_ATOM,
+                    exact=exact)
+
+
+def _evaluated(unit_cell: int, repeats: int) -> int:
+    """Atoms the model sees for a freshly built supercell."""
+    return unit_cell if config.SYMMETRY_REDUCTION else unit_cell * repeats
+
+
+def estimate_request(request) -> Estimate:
+    """
+    Estimate a CalculationRequest before anything is built or fetched.
+
+    Returns:
+        Estimate; the atom count is the unit-cell size times prod(supercell_dims)
+    """
+    details = request.structure_details
+    if getattr(details, "surface", None) is not None:
+        return _estimate_slab(request)
+    repeats = math.prod(max(1, int(n)) for n in details.supercell_dims)
+
+    if details.use_llm or details.source_type == "llm":
+        # The LLM picks the material (and maybe a supercell) later
+        return cost_of(config.UNKNOWN_CELL_ATOMS * repeats, exact=False)
+
+    if details.source_type and details.source_type != "auto":
+        cached = _cached_unit_cell(details.source_type, request.material_name)
+        if cached is not None:
+            return cost_of(len(cached) * repeats, evaluated_atoms=_evaluated(len(cached), repeats))
+        return cost_of(config.UNKNOWN_CELL_ATOMS * repeats, exact=False)
+
+    try:
+        unit_cell = estimate_unit_cell_atoms(request.material_name, details.structure_type, details.compound)
+    except Exception:
+        return cost_of(config.UNKNOWN_CELL_ATOMS * repeats, exact=False)
+    return cost_of(unit_cell * repeats, evaluated_atoms=_evaluated(unit_cell, repeats))
+
+
+def _cached_unit_cell(source_type: str, name: str):
+    """Stored unit cell of a remote structure, under the key get_structure() uses, or None."""
+    try:
+        key = structure_cache_key(source_type, name)
+    except ValueError:
+        return None  # get_structure() rejects the id
+    return structure_cache.get(key) if key else None
+
+
+def _estimate_slab(request) -> Estimate:
+    """Slabs: the 1x1 slab size times the in-plane repeats, plus the adsorbate."""
+    details = request.structure_details
+    repeats = math.prod(max(1, int(n)) for n in details.supercell_dims[:2])
+    layers = details.layers or DEFAULT_LAYERS
+    try:
+        extra = len(adsorbate_atoms(details.adsorbate)) if details.adsorbate else 0
+    except ValueError:
+        extra = 0
+    if details.use_llm or details.source_type not in (None, "auto"):
+        cached = None
+        if details.source_type not in (None, "auto", "llm"):
+            cached = _cached_unit_cell(details.source_type, request.material_name)
+        if cached is None:
+            return cost_of(config.UNKNOWN_CELL_ATOMS * layers * repeats + extra, exact=False)
+        unit_slab = len(cached) * layers
+    else:
+        try:
+            unit_slab = slab_cell_atoms(request.material_name, details.surface, layers,
+                                        details.structure_type, details.compound)
+        except Exception:
+            return cost_of(config.UNKNOWN_CELL_ATOMS * layers * repeats + extra, exact=False)
+    # An adsorbate breaks the in-plane periodicity, so the whole slab is evaluated
+    evaluated = unit_slab * repeats + extra if extra else _evaluated(unit_slab, repeats)
+    return cost_of(unit_slab * repeats + extra, evaluated_atoms=evaluated)
+
+
+def check_limits(estimate: Estimate) -> None:
+    """
+    Raises:
+        HTTPException: 413 if the request exceeds the atom or memory limit
+    """
+    if estimate.n_atoms > config.MAX_ATOMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Structure would have ~{estimate.n_atoms} atoms; the limit is {config.MAX_ATOMS}. "
+                   f"Use smaller supercell_dims.")
+    if estimate.memory_mb > config.MAX_MEMORY_MB:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Structure with ~{estimate.n_atoms} atoms would need ~{estimate.memory_mb:.0f} MB; "
+                   f"the limit is {config.MAX_MEMORY_MB:.0f} MB. Use smaller supercell_dims.")
+
+
+def admit(estimate: Estimate) -> str:
+    """
+    Decide how to run a request.
+
+    Returns:
+        "sync" to run it now, or "queue" to run it as a background job
+
+    Raises:
+        HTTPException: 413 if the request is too large to run at all
+    """
+    check_limits(estimate)
+    return "queue" if estimate.seconds > config.SYNC_MAX_SECONDS else "sync"
+
+
+class AtomBudget:
+    """Limits the total number of atoms being processed at once."""
+
+    def __init__(self, budget: Optional[int] = None):
+        self._budget = budget
+        self._in_flight = 0
+        self._condition = threading.Condition()
+
+    @property
+    def budget(self) -> int:
+        return self._budget if self._budget is not None else config.ATOMS_BUDGET
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @contextmanager
+    def reserve(self, n_atoms: int):
+        """
+        Block until n_atoms fit into the budget, and hold them for the duration.
+
+        A request larger than the whole budget waits until nothing else runs
+        and then runs alone.
+        """
+        with self._condition:
+            while self._in_flight > 0 and self._in_flight + n_atoms > self.budget:
+                self._condition.wait()
+            self._in_flight += n_atoms
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._in_flight -= n_atoms
+                self._condition.notify_all()
+
+
+class JobQueue:
+    """
+    Background execution of large calculations.
+
+    Job records live in a SharedCache, so with CHATMAT_CACHE_DIR set any
+    worker process can answer GET /jobs/{id} for a job run by another one.
+    Finished jobs, with their results, move to a store that keeps them for
+    CHATMAT_JOB_TTL seconds (on disk too); queued and running jobs do not
+    expire, however long they take.
+    """
+
+    def __init__(self):
+        self._records = SharedCache("jobs")
+        self._finished = SharedCache("jobs_finished", ttl=lambda: config.JOB_TTL)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=max(1, config.JOB_WORKERS),
+                                                    thread_name_prefix="chatmat-job")
+            return self._executor
+
+    def _update(self, job_id: str, **fields) -> None:
+        record = self._records.get(job_id) or {}
+        self._records.set(job_id, {**record, **fields})
+
+    def submit(self, fn: Callable[..., Dict[str, Any]], *args, estimate: Optional[Estimate] = None) -> str:
+        """Queue fn(*args) and return the job id."""
+        job_id = uuid.uuid4().hex
+        self._records.set(job_id, {"job_id": job_id, "status": "queued", "submitted": time.time(),
+                                   "estimate": estimate.as_dict() if estimate else None})
+        self._pool().submit(self._run, job_id, fn, args)
+        return job_id
+
+    def _run(self, job_id: str, fn: Callable[..., Dict[str, Any]], args) -> None:
+        self._update(job_id, status="running", started=time.time())
+        try:
+            result = fn(*args)
+        except HTTPException as e:
+            self._finish(job_id, status="failed", error={"status_code": e.status_code, "detail": e.detail})
+        except Exception as e:
+            self._finish(job_id, status="failed", error={"status_code": 500, "detail": str(e) or type(e).__name__})
+        else:
+            self._finish(job_id, status="done", result=result)
+
+    def _finish(self, job_id: str, **fields) -> None:
+        record = self._records.get(job_id) or {}
+        self._finished.set(job_id, {**record, **fields, "finished": time.time()})
+        self._records.delete(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Record of a job, or None if it is unknown or finished more than CHATMAT_JOB_TTL seconds ago."""
+        return self._finished.get(job_id) or self._records.get(job_id)
+
+
+def calibrate(evaluate: Callable, sizes=(1, 2, 3)) -> Dict[str, float]:
+    """
+    Measure per-atom time and Python-heap memory of an evaluation function.
+
+    Evaluates Si diamond supercells of the given sizes and fits the cost per
+    atom (least squares through the origin). Memory is the tracemalloc peak,
+    which does not see allocations made outside the Python allocator (e.g. by
+    torch), so treat it as a lower bound when setting CHATMAT_BYTES_PER_ATOM.
+
+    Returns:
+        {"seconds_per_atom": ..., "bytes_per_atom": ...}
+    """
+    import tracemalloc
+    try:
+        from .prototypes import build_prototype
+    except ImportError:
+        from prototypes import build_prototype
+
+    atoms_counts, seconds, peaks = [], [], []
+    for n in sizes:
+        atoms = build_prototype("diamond", ["Si"], 5.43) * (n, n, n)
+        evaluate(atoms.copy())  # exclude one-off initialization
+        tracemalloc.start()
+        start = time.perf_counter()
+        evaluate(atoms)
+        seconds.append(time.perf_counter() - start)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        atoms_counts.append(len(atoms))
+
+    norm = sum(n * n for n in atoms_counts)
+    return {
+        "seconds_per_atom": sum(n * t for n, t in zip(atoms_counts, seconds)) / norm,
+        "bytes_per_atom": sum(n * m for n, m in zip(atoms_counts, peaks)) / norm,
+    }
+
+
+# Process-wide admission state
+atom_budget = AtomBudget()
+jobs = JobQueue()
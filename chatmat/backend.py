@@ -1,24 +1,114 @@
+import asyncio
 import io
+import json
+import math
+import os
+import tempfile
+import time
 import numpy as np
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional
 
 # --- ASE Imports ---
-from ase.io import write
+# ase.io is imported lazily (or during warm-up): it pulls in most of ASE and SciPy
 from ase import Atoms
 
 # --- Structure Building Module ---
 try:
     # Try relative import first (when used as a package)
-    from .build_structures import create_structure, get_structure, generate_structure_with_llm
+    from . import config
+    from .admission import (Estimate, admit, atom_budget, calibrate, check_limits, cost_of, estimate_request,
+                            jobs)
+    from .cache import result_cache
+    from .build_structures import (create_structure, get_structure, generate_structure_with_llm,
+                                   iter_structures_from_file)
+    from .calculators import evaluate, test_foundation_model
+    from .prototypes import build_prototype, warm_cache as warm_prototype_cache
+    from .compact import composition, supercell
+    from .defects import Defect, TooManyVariants, generate_variants
+    from .fingerprint import fingerprint, structure_index
+    from .interpret import calculation_request, interpret
+    from .results_store import results_store
+    from .singleflight import calculations
+    from .surfaces import DEFAULT_LAYERS, DEFAULT_VACUUM, add_adsorbate, build_slab
+    from .visualization import full_structures, iter_xyz, token_issued, visualization
 except ImportError:
     # Fallback to absolute import (when run as a script)
-    from build_structures import create_structure, get_structure, generate_structure_with_llm
+    import config
+    from admission import (Estimate, admit, atom_budget, calibrate, check_limits, cost_of, estimate_request,
+                           jobs)
+    from cache import result_cache
+    from build_structures import (create_structure, get_structure, generate_structure_with_llm,
+                                  iter_structures_from_file)
+    from calculators import evaluate, test_foundation_model
+    from prototypes import build_prototype, warm_cache as warm_prototype_cache
+    from compact import composition, supercell
+    from defects import Defect, TooManyVariants, generate_variants
+    from fingerprint import fingerprint, structure_index
+    from interpret import calculation_request, interpret
+    from results_store import results_store
+    from singleflight import calculations
+    from surfaces import DEFAULT_LAYERS, DEFAULT_VACUUM, add_adsorbate, build_slab
+    from visualization import full_structures, iter_xyz, token_issued, visualization
+
+# --- 0. Startup Warm-up ---
+# /health reports ready only after warm_up() has finished, and not at all if a required step failed
+STARTUP = {"ready": False, "steps": {}, "errors": {}}
+REQUIRED_WARMUP = ("model",)
+
+def warm_up(steps: Optional[List[str]] = None) -> dict:
+    """
+    Run the startup warm-up steps and mark the backend as ready.
+
+    Steps (default: config.WARMUP, set with CHATMAT_WARMUP):
+        - "imports": import the lazily loaded modules used on the request path
+        - "structures": build the prototype unit-cell cache
+        - "model": load the foundation model and run one small evaluation so that
+          lazy initialization and JIT compilation happen before the first request
+        - "calibrate": measure the model's time per atom and use it for the
+          estimates (CHATMAT_SECONDS_PER_ATOM), e.g. CHATMAT_WARMUP=imports,model,calibrate
+
+    Returns:
+        The STARTUP state, including per-step timings (seconds) and errors
+    """
+    steps = config.WARMUP if steps is None else steps
+    for step in steps:
+        start = time.perf_counter()
+        try:
+            if step == "imports":
+                import ase.spacegroup
+                from ase.io import write
+                write(io.StringIO(), Atoms("H"), format="xyz")
+            elif step == "structures":
+                warm_prototype_cache()
+            elif step == "model":
+                run_foundation_model(build_prototype("diamond", ["Si"], 5.43))
+            elif step == "calibrate":
+                config.SECONDS_PER_ATOM = calibrate(run_foundation_model)["seconds_per_atom"]
+                print(f"⏱️ Calibrated {config.SECONDS_PER_ATOM:.2e} s per atom")
+            else:
+                raise ValueError(f"Unknown warm-up step '{step}'")
+            STARTUP["steps"][step] = round(time.perf_counter() - start, 4)
+            print(f"🔥 Warm-up '{step}' done in {STARTUP['steps'][step]:.3f} s")
+        except Exception as e:
+            STARTUP["errors"][step] = str(e)
+            print(f"⚠️ Warm-up '{step}' failed: {e}")
+    STARTUP["ready"] = True
+    return STARTUP
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up in a worker thread so /health can answer (503) while it runs
+    app.state.warmup_task = asyncio.create_task(asyncio.to_thread(warm_up))
+    yield
 
 # --- 1. App Configuration ---
-app = FastAPI(title="ChatMat Backend")
+app = FastAPI(title="ChatMat Backend", lifespan=lifespan)
 
 # ⚠️ CORS Policy: Essential to allow the Streamlit frontend (port 8501) 
 # to talk to this backend (port 8000).
@@ -41,43 +131,44 @@ class StructureDetails(BaseModel):
     use_llm: Optional[bool] = False  # Use LLM to interpret natural language
     llm_provider: Optional[str] = None  # "openai", "anthropic", "ollama"
     llm_params: Optional[dict] = None  # LLM-specific parameters (model, api_key, etc.)
+    surface: Optional[List[int]] = None  # Miller indices, e.g. [1, 1, 1]: build a slab (supercell_dims[:2] in-plane)
+    layers: Optional[int] = None  # Slab layers (default 4, see surfaces.py)
+    vacuum: Optional[float] = None  # Vacuum on each side of the slab in A (default 7.5)
+    adsorbate: Optional[str] = None  # Element or molecule on the slab, e.g. "O", "CO"
+    adsorbate_site: Optional[str] = None  # "top" (default), "bridge" or "hollow"
 
 class CalculationRequest(BaseModel):
     intent: str
     material_name: str
     structure_details: StructureDetails
     user_input: Optional[str] = None  # Original user input for LLM processing
+    dry_run: bool = False  # Only estimate size and cost, do not build or evaluate
 
-# --- 3. The "Mock" Foundation Model ---
-# 🛠️ REAL WORLD INTEGRATION: Replace this function with your actual model call.
-def test_foundation_model(atoms: Atoms):
-    """
-    Simulates a foundation model calculation.
-    Returns: Energy (eV) and Forces (eV/A)
-    """
-    # Simulate processing time or model loading
-    n_atoms = len(atoms)
-    
-    # Generate dummy data that looks realistic
-    # Energy: Rough approximation (e.g., -5 eV per atom) plus some noise
-    total_energy = -5.0 * n_atoms + np.random.normal(0, 0.1)
-    
-    # Forces: Random small vectors for each atom
-    forces = np.random.normal(0, 0.05, (n_atoms, 3))
-    
-    return total_energy, forces
+class DefectSpec(BaseModel):
+    host: str  # Element whose sites are changed, e.g. "Na"
+    replace_with: Optional[str] = None  # Dopant element; None makes vacancies
+    count: Optional[int] = None  # Sites changed per variant (default 1)
+    fraction: Optional[float] = None  # Or a fraction of the host sites (random alloys)
+
+class DefectRequest(BaseModel):
+    material_name: str
+    structure_details: StructureDetails  # The base (super)cell, as for /calculate/
+    defects: List[DefectSpec]  # Applied together in every variant
+    n_variants: Optional[int] = None  # None: every symmetry-distinct single-site defect
+    seed: int = 0
+    unique: bool = True  # Skip variants equivalent to one already generated
+    batch_size: int = 16
+    user_input: Optional[str] = None
 
+class InterpretRequest(BaseModel):
+    text: Optional[str] = None  # One request, e.g. "2x2x2 supercell of GaN"
+    texts: Optional[List[str]] = None  # Or several at once
+
+# --- 3. The Foundation Model ---
+# The calculator is loaded once per process (see calculators.py); set
+# CHATMAT_MODEL=mock to use test_foundation_model instead.
 def run_foundation_model(atoms: Atoms):
-    from iann.foundations import foundation_model
-    from iann.calculators import MLCalculator
-    calc = MLCalculator(
-    model_path=foundation_model("painn_oc.pt"), # foundation model trained on OC20+OC22
-    compute_forces=True,
-    device='cpu') # use 'cuda' for GPU
-
-    atoms.calc = calc
-    energy = atoms.get_potential_energy()
-    forces = atoms.get_forces()
+    energy, forces = evaluate(atoms)
     return energy, forces
 
 # --- 4. API Endpoints ---
@@ -88,12 +179,421 @@ async def root():
 
 @app.get("/health")
 async def health():
-    """Health check endpoint"""
-    return {"status": "healthy"}
+    """Readiness check endpoint: 503 until the startup warm-up has finished, or if a required step failed"""
+    if not STARTUP["ready"]:
+        return JSONResponse(status_code=503, content={"status": "starting", "warmup": STARTUP["steps"]})
+    if any(step in STARTUP["errors"] for step in REQUIRED_WARMUP):
+        return JSONResponse(status_code=503, content={"status": "degraded", "warmup": STARTUP["steps"],
+                                                      "warmup_errors": STARTUP["errors"]})
+    return {"status": "healthy", "warmup": STARTUP["steps"], "warmup_errors": STARTUP["errors"]}
+
+def _result_cache_key(request: CalculationRequest) -> Optional[str]:
+    """Cache key for requests whose result depends only on the request and the model."""
+    details = request.structure_details
+    if details.use_llm or details.source_type in ("llm", "file"):
+        return None  # LLM output and local files can change between identical requests
+    return result_cache.make_key(request.model_dump(exclude={"dry_run"}), config.MODEL_NAME)
 
 @app.post("/calculate/")
 async def calculate(request: CalculationRequest):
     print("request: ", request)
+    cache_key = _result_cache_key(request)
+    if request.dry_run:
+        return await run_in_threadpool(_dry_run, request, cache_key)
+    if cache_key is not None:
+        cached = result_cache.get(cache_key)
+        if cached is not None and not _links_alive(cached):
+            # Its full-structure link has expired: rebuild from the results store or recompute
+            cached = None
+        if cached is not None:
+            print(f"♻️ Returning cached result for: {request.material_name}")
+            return cached
+        if results_store.enabled:
+            stored = await run_in_threadpool(_stored_result, cache_key)
+            if stored is not None:
+                print(f"♻️ Returning stored result {stored['result_id']} for: {request.material_name}")
+                return stored
+
+    # Admission: estimate the size before building anything (413 if too large)
+    estimate = estimate_request(request)
+    if admit(estimate) == "queue":
+        job_id = jobs.submit(_run_calculation, request, estimate, cache_key, estimate=estimate)
+        print(f"📬 Queued job {job_id} for {request.material_name} (~{estimate.n_atoms} atoms)")
+        return JSONResponse(status_code=202, content={
+            "status": "queued", "job_id": job_id, "poll": f"/jobs/{job_id}", "estimate": estimate.as_dict()})
+
+    # Building, evaluation and serialization block, so they run off the event loop
+    return await run_in_threadpool(_run_calculation, request, estimate, cache_key)
+
+def _links_alive(result: dict) -> bool:
+    """False if the result links to a full structure that is no longer stored (see visualization.py)."""
+    url = (result.get("visualization") or {}).get("full_xyz_url")
+    if not url:
+        return True
+    return url.rsplit("/", 1)[-1].removesuffix(".xyz") in full_structures
+
+def _admission(estimate: Estimate) -> tuple:
+    """What /calculate/ would do with a request of this size: (decision, reason)"""
+    try:
+        return admit(estimate), None
+    except HTTPException as exc:
+        return "reject", exc.detail
+
+def _dry_run(request: CalculationRequest, cache_key: Optional[str]) -> dict:
+    """
+    Size and cost of a request without building or evaluating anything.
+
+    The unit-cell size comes from the builtin database or the structure cache
+    (external sources that were fetched before); otherwise it is assumed
+    (CHATMAT_UNKNOWN_CELL_ATOMS) and "exact" is False. "seconds" uses the
+    per-atom model time (calibrated at startup with the "calibrate" warm-up step).
+    """
+    estimate = estimate_request(request)
+    decision, reason = _admission(estimate)
+    stored = results_store.find(cache_key) if cache_key and results_store.enabled else None
+    cached = cache_key is not None and (stored is not None or result_cache.get(cache_key) is not None)
+    repeats = max(1, math.prod(max(1, int(n)) for n in request.structure_details.supercell_dims))
+    return {"dry_run": True, "material": request.material_name,
+            "supercell_dims": request.structure_details.supercell_dims,
+            "unit_cell_atoms": estimate.n_atoms // repeats, **estimate.as_dict(),
+            "seconds_per_atom": config.SECONDS_PER_ATOM, "calibrated": "calibrate" in STARTUP["steps"],
+            "admission": decision, "reason": reason, "cached": cached,
+            "result_id": stored["id"] if stored else None}
+
+def _interpretation(text: str) -> dict:
+    parsed = interpret(text)
+    body = calculation_request(text, parsed)
+    estimate = estimate_request(CalculationRequest(**body))
+    decision, reason = _admission(estimate)
+    return {"request": body, "recognized": parsed["recognized"], "estimate": estimate.as_dict(),
+            "admission": decision, "reason": reason}
+
+@app.post("/interpret")
+async def interpret_text(request: InterpretRequest):
+    """
+    Structured /calculate/ request(s) for natural-language text, with the estimated size.
+
+    `admission` tells what /calculate/ would do with the request: "sync",
+    "queue" (HTTP 202, background job) or "reject" (HTTP 413, see `reason`).
+    A single `text` returns one interpretation, `texts` returns {"results": [...]}.
+    """
+    if request.texts is None:
+        if not request.text or not request.text.strip():
+            raise HTTPException(status_code=422, detail="Provide 'text' or 'texts'")
+        return _interpretation(request.text)
+    if len(request.texts) > config.INTERPRET_MAX_TEXTS:
+        raise HTTPException(status_code=413,
+                            detail=f"At most {config.INTERPRET_MAX_TEXTS} texts per request")
+    return {"results": [_interpretation(text) for text in request.texts]}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Status of a queued calculation; "result" holds the /calculate/ response once done"""
+    record = jobs.get(job_id)
+    if record is None:
+        kept = f"kept for {config.JOB_TTL:g} s" if config.JOB_TTL > 0 else "kept forever"
+        raise HTTPException(status_code=404, detail=f"Unknown or expired job '{job_id}' "
+                                                    f"(finished jobs are {kept}, CHATMAT_JOB_TTL)")
+    return record
+
+@app.get("/structures/{token}.xyz")
+async def download_structure(token: str):
+    """Full coordinates of a structure that was sent to the visualizer in reduced form"""
+    structure = full_structures.get(token)
+    if structure is None:
+        if token_issued(token):
+            raise HTTPException(status_code=410, detail=f"Structure link expired (links are kept for "
+                                f"{config.VIZ_FULL_TTL:g} s); run the calculation again for a new one")
+        raise HTTPException(status_code=404, detail=f"Unknown structure '{token}'")
+    return StreamingResponse(iter_xyz(structure), media_type="chemical/x-xyz",
+                             headers={"Content-Disposition": f'attachment; filename="structure-{len(structure)}.xyz"'})
+
+@app.post("/ingest/")
+async def ingest(request: Request, format: Optional[str] = None, filename: Optional[str] = None,
+                 batch_size: int = 16):
+    """
+    Evaluate every frame of an uploaded multi-frame structure file (extxyz, traj, CIF, ...).
+
+    The raw file is the request body (e.g. `curl --data-binary @md.extxyz
+    "http://localhost:8000/ingest/?format=extxyz"`). It is spooled to a
+    temporary file and read frame by frame, and one JSON line per frame is
+    streamed back as soon as its batch has been evaluated, followed by a final
+    {"status": "done"} (or {"status": "error"}) line.
+
+    Args:
+        format: ASE format name; detected from the filename extension if omitted
+        filename: Original file name, used for format detection
+        batch_size: Frames evaluated per batch
+    """
+    suffix = os.path.splitext(filename or "")[1]
+    if not format and not suffix:
+        raise HTTPException(status_code=400, detail="Pass format= (e.g. extxyz, traj, cif) or a filename with an extension")
+    if batch_size < 1:
+        raise HTTPException(status_code=400, detail="batch_size must be at least 1")
+
+    limit = config.MAX_UPLOAD_MB * 1024 ** 2
+    fd, path = tempfile.mkstemp(prefix="chatmat-ingest-", suffix=suffix)
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as f:
+            async for chunk in request.stream():
+                size += len(chunk)
+                if size > limit:
+                    raise HTTPException(status_code=413, detail=f"Upload exceeds {config.MAX_UPLOAD_MB:.0f} MB")
+                f.write(chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+    print(f"📥 Ingesting {filename or 'upload'} ({size / 1024 ** 2:.1f} MB, format: {format or suffix})")
+    return StreamingResponse(_ingest_frames(path, format, batch_size), media_type="application/x-ndjson")
+
+def _ingest_frames(path: str, format: Optional[str], batch_size: int):
+    """Read, evaluate and report frames batch by batch; deletes the spooled upload when done."""
+    frames = 0
+    try:
+        batch = []
+        for atoms in iter_structures_from_file(path, format):
+            batch.append(atoms)
+            if len(batch) >= batch_size:
+                yield from _evaluate_frames(batch, frames)
+                frames += len(batch)
+                batch = []
+        yield from _evaluate_frames(batch, frames)
+        frames += len(batch)
+        yield json.dumps({"status": "done", "frames": frames}) + "\n"
+    except HTTPException as e:
+        yield json.dumps({"status": "error", "frames": frames, "detail": e.detail}) + "\n"
+    finally:
+        os.unlink(path)
+
+def _evaluate_frames(batch: List[Atoms], first: int, details: Optional[List[dict]] = None):
+    with atom_budget.reserve(sum(len(atoms) for atoms in batch)):
+        for index, atoms in enumerate(batch, start=first):
+            line = {"frame": index, "n_atoms": len(atoms), "formula": composition(atoms)}
+            if details is not None:
+                line.update(details[index - first])
+            try:
+                check_limits(cost_of(len(atoms)))
+                energy, forces = run_foundation_model(atoms)
+                forces = np.asarray(forces)
+                line.update(energy=float(energy), energy_per_atom=float(energy) / max(len(atoms), 1),
+                            max_force=float(np.linalg.norm(forces, axis=1).max()) if len(forces) else 0.0)
+            except HTTPException as e:
+                line["error"] = e.detail
+            except Exception as e:
+                line["error"] = str(e) or type(e).__name__
+            yield json.dumps(line) + "\n"
+
+@app.post("/defects/")
+async def defects(request: DefectRequest):
+    """
+    Evaluate a family of vacancy, substitution or alloy variants of one structure.
+
+    The base structure is built as for /calculate/. Its variants (see
+    defects.py) are generated lazily, deduplicated by symmetry, and evaluated
+    in batches exactly like /ingest/ frames: one JSON line per variant, with
+    its defect label, sites and multiplicity, then a {"status": "done"} line.
+    """
+    if request.batch_size < 1:
+        raise HTTPException(status_code=400, detail="batch_size must be at least 1")
+    if request.n_variants is not None and request.n_variants < 1:
+        raise HTTPException(status_code=400, detail="n_variants must be at least 1")
+    if request.n_variants is not None and request.n_variants > config.DEFECTS_MAX_VARIANTS:
+        raise HTTPException(status_code=413, detail=f"At most {config.DEFECTS_MAX_VARIANTS} variants per request")
+    estimate = estimate_request(request)
+    check_limits(estimate)
+    try:
+        atoms, variants = await run_in_threadpool(_defect_family, request, estimate)
+    except TooManyVariants as e:
+        raise HTTPException(status_code=413, detail=f"{e} (CHATMAT_DEFECTS_MAX_VARIANTS); give n_variants")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    print(f"🧬 Generating {request.n_variants or 'all distinct'} defect variants of "
+          f"{request.material_name} ({len(atoms)} atoms)")
+    return StreamingResponse(_defect_variants(variants, request.batch_size), media_type="application/x-ndjson")
+
+def _defect_family(request: DefectRequest, estimate: Estimate):
+    """Build the base structure within the atom budget and start generating its variants."""
+    with atom_budget.reserve(estimate.n_atoms):
+        atoms = _build_structure(request)
+        variants = generate_variants(atoms, [Defect(**spec.model_dump()) for spec in request.defects],
+                                     n=request.n_variants, seed=request.seed, unique=request.unique,
+                                     max_variants=config.DEFECTS_MAX_VARIANTS)
+    return atoms, variants
+
+def _defect_variants(variants, batch_size: int):
+    count = 0
+    batch = []
+    for variant in variants:
+        batch.append(variant)
+        if len(batch) >= batch_size:
+            yield from _evaluate_frames([v.to_atoms() for v in batch], count, [v.describe() for v in batch])
+            count += len(batch)
+            batch = []
+    yield from _evaluate_frames([v.to_atoms() for v in batch], count, [v.describe() for v in batch])
+    count += len(batch)
+    yield json.dumps({"status": "done", "variants": count}) + "\n"
+
+def _stored_result(cache_key: str) -> Optional[dict]:
+    """/calculate/ response rebuilt from the results store (survives restarts, unlike the result cache)."""
+    record = results_store.find(cache_key)
+    if record is None:
+        return None
+    atoms = results_store.atoms(record)
+    visual = visualization(atoms)
+    xyz_string = None
+    if visual["mode"] == "full":
+        from ase.io import write
+        xyz_buffer = io.StringIO()
+        write(xyz_buffer, atoms, format="xyz")
+        xyz_string = xyz_buffer.getvalue()
+    result = {
+        "status": "success",
+        "material": record["material"],
+        "n_atoms": record["n_atoms"],
+        "energy": record["energy"],
+        "max_force": 0.0,
+        "structure_xyz": xyz_string,
+        "visualization": visual,
+        "result_id": record["id"],
+    }
+    result_cache.set(cache_key, result)
+    return result
+
+def _redacted(params):
+    """Request parameters without credentials (api_key, password, token, ...), for storage."""
+    if isinstance(params, dict):
+        return {k: "***" if any(word in k.lower() for word in ("key", "password", "token", "secret"))
+                else _redacted(v) for k, v in params.items()}
+    return params
+
+def _stored_record(result_id: int) -> dict:
+    if not results_store.enabled:
+        raise HTTPException(status_code=404, detail="The results store is disabled (set CHATMAT_RESULTS_DIR)")
+    record = results_store.get(result_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"Unknown result {result_id}")
+    return record
+
+@app.get("/results")
+async def list_results(material: Optional[str] = None, model: Optional[str] = None,
+                       limit: int = 100, offset: int = 0):
+    """Metadata of stored results, newest first"""
+    if not results_store.enabled:
+        raise HTTPException(status_code=404, detail="The results store is disabled (set CHATMAT_RESULTS_DIR)")
+    return {"results": results_store.query(material, model, min(limit, 1000), offset)}
+
+@app.get("/results/{result_id}")
+async def get_result(result_id: int):
+    """Metadata of one stored result"""
+    return _stored_record(result_id)
+
+@app.get("/results/{result_id}/xyz")
+async def get_result_xyz(result_id: int):
+    """Stored structure as extended XYZ, with the energy and forces"""
+    record = _stored_record(result_id)
+    from ase.calculators.singlepoint import SinglePointCalculator
+    from ase.io import write
+    atoms = results_store.atoms(record)
+    forces = results_store.array(record, "forces")
+    atoms.calc = SinglePointCalculator(atoms, energy=record["energy"],
+                                       forces=None if np.isnan(forces).any() else np.array(forces))
+    xyz_buffer = io.StringIO()
+    write(xyz_buffer, atoms, format="extxyz")
+    return PlainTextResponse(xyz_buffer.getvalue())
+
+@app.get("/results/{result_id}/{array}")
+async def get_result_array(result_id: int, array: str):
+    """Raw numbers (int32), positions or forces (float64, N x 3) of a stored result, little-endian"""
+    if array not in ("numbers", "positions", "forces"):
+        raise HTTPException(status_code=404, detail=f"Unknown array '{array}' (numbers, positions, forces)")
+    view = results_store.array(_stored_record(result_id), array)
+    # The memory-mapped slice is sent as is, without an intermediate copy
+    return Response(content=memoryview(np.ascontiguousarray(view)).cast("B"), media_type="application/octet-stream",
+                    headers={"X-Shape": ",".join(map(str, view.shape)), "X-Dtype": view.dtype.str})
+
+def _run_calculation(request: CalculationRequest, estimate: Estimate,
+                     cache_key: Optional[str] = None) -> dict:
+    """
+    Build the structure, run the model and serialize the result (blocking).
+
+    Identical deterministic requests that arrive while one is running wait
+    for it and share its result instead of computing it again.
+    """
+    if cache_key is None:
+        return _budgeted_calculation(request, estimate, cache_key)
+    return calculations.do(cache_key, _budgeted_calculation, request, estimate, cache_key)
+
+def _budgeted_calculation(request: CalculationRequest, estimate: Estimate, cache_key: Optional[str]) -> dict:
+    with atom_budget.reserve(estimate.n_atoms):
+        return _calculate(request, cache_key)
+
+def _build_structure(request) -> Atoms:
+    """Generate or fetch the structure of a CalculationRequest (or DefectRequest)."""
+    details = request.structure_details
+    if details.surface is not None:
+        return _build_slab(request)
+    if details.use_llm or (details.source_type == "llm"):
+        # Use LLM to interpret natural language and generate structure
+        llm_params = details.llm_params or {}
+        provider = details.llm_provider or "openai"
+        
+        # Use the full user input as description, fallback to material_name
+        description = request.user_input if request.user_input else request.material_name
+        
+        atoms = generate_structure_with_llm(
+            description,
+            provider=provider,
+            **llm_params
+        )
+        
+        # Apply supercell if specified
+        if details.supercell_dims != [1, 1, 1]:
+            atoms = supercell(atoms, details.supercell_dims)
+            
+    elif details.source_type and details.source_type != "auto":
+        # Fetch from external source
+        source_params = details.source_params or {}
+        source_params["dims"] = details.supercell_dims
+        
+        atoms = get_structure(
+            request.material_name,
+            source_type=details.source_type,
+            **source_params
+        )
+    else:
+        # Use built-in structure generator
+        atoms = create_structure(
+            request.material_name,
+            details.supercell_dims,
+            structure_type=details.structure_type,
+            lattice_param=details.lattice_parameter,
+            compound=details.compound
+        )
+    return atoms
+
+def _build_slab(request) -> Atoms:
+    """Slab (and adsorbate) of the bulk structure the request names; builtin bulk slabs are memoized."""
+    details = request.structure_details
+    options = {"size": details.supercell_dims[:2],
+               "layers": details.layers or DEFAULT_LAYERS,
+               "vacuum": details.vacuum if details.vacuum is not None else DEFAULT_VACUUM}
+    try:
+        if details.use_llm or details.source_type not in (None, "auto"):
+            bulk_details = details.model_copy(update={"surface": None, "supercell_dims": [1, 1, 1]})
+            bulk = _build_structure(request.model_copy(update={"structure_details": bulk_details}))
+            atoms = build_slab(bulk, details.surface, **options)
+        else:
+            atoms = build_slab(request.material_name, details.surface, structure_type=details.structure_type,
+                               lattice_param=details.lattice_parameter, compound=details.compound, **options)
+        if details.adsorbate:
+            atoms = add_adsorbate(atoms, details.adsorbate, site=details.adsorbate_site or "top")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    print(f"🧱 Built {request.material_name}{tuple(atoms.info['miller'])} slab with {len(atoms)} atoms")
+    return atoms
+
+def _calculate(request: CalculationRequest, cache_key: Optional[str]) -> dict:
     try:
         details = request.structure_details
         print(f"📥 Received request for: {request.material_name} "
@@ -102,48 +602,15 @@ async def calculate(request: CalculationRequest):
               f"Compound: {details.compound} "
               f"Source: {details.source_type}")
         
+        build_start = time.perf_counter()
         # A. Generate or Fetch Structure
-        if details.use_llm or (details.source_type == "llm"):
-            # Use LLM to interpret natural language and generate structure
-            llm_params = details.llm_params or {}
-            provider = details.llm_provider or "openai"
-            
-            # Use the full user input as description, fallback to material_name
-            description = request.user_input if request.user_input else request.material_name
-            
-            atoms = generate_structure_with_llm(
-                description,
-                provider=provider,
-                **llm_params
-            )
-            
-            # Apply supercell if specified
-            if details.supercell_dims != [1, 1, 1]:
-                atoms = atoms * tuple(details.supercell_dims)
-                
-        elif details.source_type and details.source_type != "auto":
-            # Fetch from external source
-            source_params = details.source_params or {}
-            source_params["dims"] = details.supercell_dims
-            
-            atoms = get_structure(
-                request.material_name,
-                source_type=details.source_type,
-                **source_params
-            )
-        else:
-            # Use built-in structure generator
-            atoms = create_structure(
-                request.material_name,
-                details.supercell_dims,
-                structure_type=details.structure_type,
-                lattice_param=details.lattice_parameter,
-                compound=details.compound
-            )
+        atoms = _build_structure(request)
         
+        build_seconds = time.perf_counter() - build_start
         print(f"✅ Generated structure with {len(atoms)} atoms")
-        print(f"   Atom types: {set(atoms.get_chemical_symbols())}")
-        print(f"   First few atoms: {atoms.get_chemical_symbols()[:10]}")
+        # The estimate can be off for LLM and uncached external structures
+        check_limits(cost_of(len(atoms)))
+        print(f"   Composition: {composition(atoms)}")
         
         # Verify structure
         if len(atoms) == 0:
@@ -151,50 +618,78 @@ async def calculate(request: CalculationRequest):
         if len(atoms) == 1:
             print(f"⚠️ WARNING: Structure has only 1 atom! This might be an error.")
         
-        # B. Run Calculation (The Foundation Model)
-        energy, forces = run_foundation_model(atoms)
+        # B. Run Calculation (The Foundation Model), unless an equivalent structure was computed before
+        # under another name, source, supercell, atom order or origin
+        evaluate_start = time.perf_counter()
+        forces = None
+        fp = fingerprint(atoms) if config.DEDUP else None
+        match = structure_index.lookup(fp) if fp is not None else None
+        if match is not None:
+            energy = match["energy_per_atom"] * len(atoms)
+            max_force_magnitude = match["max_force"]
+            print(f"♻️ Equivalent structure computed before: reusing {match['energy_per_atom']:.6f} eV/atom")
+        else:
+            energy, forces = run_foundation_model(atoms)
+            forces = np.asarray(forces)
+            max_force_magnitude = float(np.linalg.norm(forces, axis=1).max()) if len(forces) else 0.0
+            if fp is not None:
+                structure_index.add(fp, float(energy) / len(atoms), forces)
+            # Debugging: Print the forces array
+            print("Forces array:", forces)
+        evaluate_seconds = time.perf_counter() - evaluate_start
         
-        # C. Convert Structure to XYZ String (for Visualization)
-        # We write to a string buffer to send it over JSON
-        xyz_buffer = io.StringIO()
-        write(xyz_buffer, atoms, format="xyz")
-        xyz_string = xyz_buffer.getvalue()
+        # C. Structure for the visualizer: the full XYZ for small structures, otherwise a
+        # bounded level-of-detail view plus a download link (see visualization.py)
+        visual = visualization(atoms)
+        xyz_string = None
+        if visual["mode"] == "full":
+            # We write to a string buffer to send it over JSON
+            from ase.io import write
+            xyz_buffer = io.StringIO()
+            write(xyz_buffer, atoms, format="xyz")
+            xyz_string = xyz_buffer.getvalue()
         
-        # Debug: Print first few lines of XYZ
-        xyz_lines = [line for line in xyz_string.split('\n') if line.strip()][:10]
-        print(f"📄 XYZ preview (first 10 non-empty lines):")
-        for i, line in enumerate(xyz_lines, 1):
-            print(f"   {i}: {line}")
+            # Debug: Print first few lines of XYZ
+            xyz_lines = [line for line in xyz_string.split('\n') if line.strip()][:10]
+            print(f"📄 XYZ preview (first 10 non-empty lines):")
+            for i, line in enumerate(xyz_lines, 1):
+                print(f"   {i}: {line}")
         
-        # Verify XYZ format
-        xyz_lines_all = xyz_string.strip().split('\n')
-        if len(xyz_lines_all) > 0:
-            try:
-                num_atoms_xyz = int(xyz_lines_all[0].strip())
-                print(f"📊 XYZ contains {num_atoms_xyz} atoms (structure has {len(atoms)} atoms)")
-                if num_atoms_xyz != len(atoms):
-                    print(f"⚠️ WARNING: Mismatch! XYZ says {num_atoms_xyz} but structure has {len(atoms)}")
-                if num_atoms_xyz == 1:
-                    print(f"❌ ERROR: XYZ only has 1 atom! This is wrong!")
-            except ValueError:
-                print(f"⚠️ WARNING: Could not parse atom count from XYZ first line: '{xyz_lines_all[0] if xyz_lines_all else 'empty'}'")
-
-        # Debugging: Print the forces array and its maximum magnitude
-        print("Forces array:", forces)
-        # print("Maximum force magnitude:", np.linalg.norm(forces, axis=1).max())
+            # Verify XYZ format
+            xyz_lines_all = xyz_string.strip().split('\n')
+            if len(xyz_lines_all) > 0:
+                try:
+                    num_atoms_xyz = int(xyz_lines_all[0].strip())
+                    print(f"📊 XYZ contains {num_atoms_xyz} atoms (structure has {len(atoms)} atoms)")
+                    if num_atoms_xyz != len(atoms):
+                        print(f"⚠️ WARNING: Mismatch! XYZ says {num_atoms_xyz} but structure has {len(atoms)}")
+                    if num_atoms_xyz == 1:
+                        print(f"❌ ERROR: XYZ only has 1 atom! This is wrong!")
+                except ValueError:
+                    print(f"⚠️ WARNING: Could not parse atom count from XYZ first line: '{xyz_lines_all[0] if xyz_lines_all else 'empty'}'")
+        else:
+            print(f"🖼️ Sending a {visual['mode']} view of {visual['n_atoms']} of {len(atoms)} atoms; "
+                  f"full XYZ at {visual['full_xyz_url']}")
 
         # D. Return Response
         # Convert numpy data types to native Python types
-        max_force_magnitude = 0.0
-
-        return {
+        result = {
             "status": "success",
             "material": request.material_name,
             "n_atoms": len(atoms),
             "energy": float(energy),  # Ensure energy is a native Python float
             "max_force": max_force_magnitude,  # Already converted to float
-            "structure_xyz": xyz_string
+            "structure_xyz": xyz_string,  # None above CHATMAT_VIZ_MAX_ATOMS atoms
+            "visualization": visual
         }
+        if results_store.enabled:
+            result["result_id"] = results_store.append(
+                atoms, energy, forces, material=request.material_name, source=details.source_type or "builtin",
+                params=_redacted(request.model_dump()), cache_key=cache_key,
+                timings={"build_s": round(build_seconds, 6), "evaluate_s": round(evaluate_seconds, 6)})
+        if cache_key is not None:
+            result_cache.set(cache_key, result)
+        return result
 
     except HTTPException as e:
         # Re-raise HTTPException with proper detail
@@ -216,6 +711,28 @@ async def calculate(request: CalculationRequest):
 
 # --- 6. Server Startup ---
 if __name__ == "__main__":
+    import argparse
+    import sys
     import uvicorn
-    # Run on localhost port 8000
-    uvicorn.run(app, host="127.0.0.1", port=8000)
\ No newline at end of file
+
+    parser = argparse.ArgumentParser(description="Run the ChatMat backend")
+    parser.add_argument("--host", default=config.HOST)
+    parser.add_argument("--port", type=int, default=config.PORT)
+    parser.add_argument("--workers", type=int, default=config.WORKERS,
+                        help="Worker processes sharing one preloaded model (default: CHATMAT_WORKERS)")
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        try:
+            from .serve import serve
+        except ImportError:
+            from serve import serve
+        sys.exit(serve(sys.modules[__name__], host=args.host, port=args.port, workers=args.workers))
+    else:
+        try:
+            from .threads import configure_worker
+        except ImportError:
+            from threads import configure_worker
+        configure_worker(0, 1)
+        # Run on localhost port 8000 by default
+        uvicorn.run(app, host=args.host, port=args.port)
\ No newline at end of file
@@ -10,9 +10,10 @@ It also supports LLM-based structure generation from natural language descriptio
 import io
 import os
 import json
+import math
 import re
-import numpy as np
-from typing import List, Optional, Dict, Union, Any
+from functools import reduce
+from typing import List, Optional, Dict, Iterator, Union, Any
 
 # Optional FastAPI import (only needed when used as API backend)
 try:
@@ -26,10 +27,25 @@ except ImportError:
             super().__init__(f"{status_code}: {self.detail}")
 
 # --- ASE Imports for Structure Generation ---
-from ase.build import bulk
 from ase import Atoms
-from ase.spacegroup import crystal
-from ase.io import read, write
+
+# --- Prototype Engine ---
+try:
+    from .prototypes import PROTOTYPES, build_prototype, build_from_sites, n_species, prototype_size
+    from .cache import structure_cache
+    from .compact import composition, supercell
+    from .singleflight import coalesce, fetches, llm_calls
+    from .cod_import import canonical_cod_id, cod_url, parse_cif
+    from .mp_import import canonical_mp_id
+    from . import config
+except ImportError:
+    from prototypes import PROTOTYPES, build_prototype, build_from_sites, n_species, prototype_size
+    from cache import structure_cache
+    from compact import composition, supercell
+    from singleflight import coalesce, fetches, llm_calls
+    from cod_import import canonical_cod_id, cod_url, parse_cif
+    from mp_import import canonical_mp_id
+    import config
 
 # --- Material Database: Common crystal structures and lattice parameters ---
 MATERIAL_DATABASE: Dict[str, Dict[str, any]] = {
@@ -100,234 +116,209 @@ COMPOUND_DATABASE: Dict[str, Dict[str, any]] = {
 }
 
 
+# ============================================================================
+# Compound Index (built once at import time)
+# ============================================================================
+
+_FORMULA_TOKEN = re.compile(r'([A-Z][a-z]?)(\d*)')
+
+
+def parse_formula(formula: str) -> Optional[Dict[str, int]]:
+    """
+    Parse a case-sensitive chemical formula into element counts.
+
+    Args:
+        formula: Formula such as "SiO2" or "CaTiO3"
+
+    Returns:
+        Dictionary of element counts (e.g., {"Si": 1, "O": 2}), or None if the
+        string is not a plain formula
+    """
+    tokens = _FORMULA_TOKEN.findall(formula)
+    if not tokens or "".join(el + n for el, n in tokens) != formula:
+        return None
+    counts: Dict[str, int] = {}
+    for element, number in tokens:
+        counts[element] = counts.get(element, 0) + int(number or 1)
+    return counts
+
+
+def normalize_formula(counts: Dict[str, int]) -> str:
+    """Return the sorted, reduced composition (e.g., {"Si": 2, "O": 4} -> "O2Si")."""
+    divisor = reduce(math.gcd, counts.values())
+    return "".join(
+        f"{element}{counts[element] // divisor if counts[element] // divisor != 1 else ''}"
+        for element in sorted(counts)
+    )
+
+
+def _formula_from_key(key: str, elements: List[str]) -> Dict[str, int]:
+    """Recover element counts from a database key such as "catio3" or "zns_w"."""
+    base = key.split("_")[0]
+    counts: Dict[str, int] = {}
+    pos = 0
+    for element in elements:
+        if not base.startswith(element.lower(), pos):
+            break
+        pos += len(element)
+        digits = re.match(r'\d*', base[pos:]).group(0)
+        pos += len(digits)
+        counts[element] = counts.get(element, 0) + int(digits or 1)
+    else:
+        if pos == len(base):
+            return counts
+    # Key does not spell out the formula; assume 1:1 stoichiometry
+    return {element: 1 for element in elements}
+
+
+def _index_rank(key: str) -> tuple:
+    """Deterministic ranking: canonical keys (no variant suffix) first, then shortest, then alphabetical."""
+    return ("_" in key, len(key), key)
+
+
+def _build_compound_index(database: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[Any, List[str]]]:
+    """
+    Build lookup tables over a compound database.
+
+    Returns a dictionary with three maps, each pointing to ranked lists of keys:
+        - "alias": lowercase key, name and formula strings
+        - "formula": normalized formula (see normalize_formula)
+        - "elements": frozenset of element symbols
+    """
+    index: Dict[str, Dict[Any, List[str]]] = {"alias": {}, "formula": {}, "elements": {}}
+
+    for key, data in database.items():
+        formula = normalize_formula(_formula_from_key(key, data["elements"]))
+        name = data.get("name", "").lower().strip()
+        aliases = {key, formula.lower(), name, re.sub(r'\s*\(.*\)\s*$', '', name)}
+
+        for alias in aliases:
+            if alias:
+                index["alias"].setdefault(alias, []).append(key)
+        index["formula"].setdefault(formula, []).append(key)
+        index["elements"].setdefault(frozenset(data["elements"]), []).append(key)
+
+    for table in index.values():
+        for keys in table.values():
+            keys.sort(key=_index_rank)
+
+    return index
+
+
+COMPOUND_INDEX = _build_compound_index(COMPOUND_DATABASE)
+
+
+def find_compound(name: str, compound: Optional[List[str]] = None,
+                  structure_type: Optional[str] = None) -> Optional[str]:
+    """
+    Look up a COMPOUND_DATABASE key using the precomputed COMPOUND_INDEX.
+
+    Exact matches are tried first (database key, name or formula alias, then
+    normalized formula of `name`). If none match and at least two `compound`
+    elements are given, entries with exactly that element set are used. Among
+    several candidates, entries whose structure matches `structure_type` are
+    preferred, then canonical keys over variants (e.g., "sio2" over "sio2_quartz").
+
+    Args:
+        name: Material name (compound key, common name or formula like "SiO2")
+        compound: Optional list of element symbols
+        structure_type: Optional preferred crystal structure type
+
+    Returns:
+        Matching COMPOUND_DATABASE key, or None if nothing matches
+    """
+    candidates = COMPOUND_INDEX["alias"].get(name.lower().strip())
+
+    if not candidates:
+        counts = parse_formula(name.strip())
+        if counts:
+            candidates = COMPOUND_INDEX["formula"].get(normalize_formula(counts))
+
+    if not candidates and compound and len(compound) >= 2:
+        elements = frozenset(e.strip().capitalize() for e in compound)
+        candidates = COMPOUND_INDEX["elements"].get(elements)
+
+    if not candidates:
+        return None
+    if structure_type:
+        # Stable sort keeps the precomputed ranking within each group
+        candidates = sorted(candidates, key=lambda k: COMPOUND_DATABASE[k]["structure"] != structure_type)
+    return candidates[0]
+
+
+# ============================================================================
+# Prototype Builders (thin wrappers around the table-driven prototype engine)
+# ============================================================================
+
 def create_rocksalt(elements: List[str], a: float) -> Atoms:
-    """Create rocksalt (NaCl) structure using crystal() with spacegroup."""
-    if len(elements) < 2:
-        raise ValueError(f"Rocksalt structure requires 2 elements, got {len(elements)}")
-    
-    try:
-        # Rocksalt: spacegroup 225 (Fm-3m)
-        atoms = crystal(elements, 
-                      basis=[(0, 0, 0), (0.5, 0.5, 0.5)],
-                      spacegroup=225,
-                      cellpar=[a, a, a, 90, 90, 90],
-                      size=(1, 1, 1))
-        # Verify we got a proper structure
-        if len(atoms) > 0:
-            return atoms
-    except Exception as e:
-        print(f"⚠️ Warning: crystal() failed for rocksalt: {e}, using fallback")
-    
-    # Fallback: create proper rocksalt structure manually
-    # Rocksalt has 8 atoms per conventional cell (4 of each element)
-    positions = [
-        # Element 1 (e.g., Na)
-        [0, 0, 0],
-        [a/2, a/2, 0],
-        [a/2, 0, a/2],
-        [0, a/2, a/2],
-        # Element 2 (e.g., Cl)
-        [a/2, a/2, a/2],
-        [0, 0, a/2],
-        [0, a/2, 0],
-        [a/2, 0, 0],
-    ]
-    symbols = [elements[0], elements[0], elements[0], elements[0],
-              elements[1], elements[1], elements[1], elements[1]]
-    return Atoms(symbols, positions=positions, cell=[a, a, a])
+    """Create rocksalt (NaCl) structure, spacegroup 225 (Fm-3m)."""
+    return build_prototype("rocksalt", elements, a)
 
 
 def create_zincblende(elements: List[str], a: float) -> Atoms:
-    """Create zincblende (ZnS) structure."""
-    if len(elements) < 2:
-        raise ValueError(f"Zincblende structure requires 2 elements, got {len(elements)}")
-    
-    try:
-        # Zincblende: spacegroup 216 (F-43m)
-        atoms = crystal(elements,
-                      basis=[(0, 0, 0), (0.25, 0.25, 0.25)],
-                      spacegroup=216,
-                      cellpar=[a, a, a, 90, 90, 90],
-                      size=(1, 1, 1))
-        # Verify we got a proper structure
-        if len(atoms) > 0:
-            return atoms
-    except Exception as e:
-        print(f"⚠️ Warning: crystal() failed for zincblende: {e}, using fallback")
-    
-    # Fallback: create proper zincblende structure manually
-    # Zincblende has 2 atoms per primitive cell, 8 atoms per conventional cell
-    positions = [
-        [0, 0, 0],  # Element 1 at origin
-        [a/4, a/4, a/4],  # Element 2 at (1/4, 1/4, 1/4)
-        # Add more atoms for conventional cell
-        [a/2, a/2, 0],  # Element 1
-        [3*a/4, 3*a/4, a/4],  # Element 2
-        [a/2, 0, a/2],  # Element 1
-        [3*a/4, a/4, 3*a/4],  # Element 2
-        [0, a/2, a/2],  # Element 1
-        [a/4, 3*a/4, 3*a/4],  # Element 2
-    ]
-    symbols = [elements[0], elements[1], elements[0], elements[1], 
-              elements[0], elements[1], elements[0], elements[1]]
-    return Atoms(symbols, positions=positions, cell=[a, a, a])
+    """Create zincblende (ZnS) structure, spacegroup 216 (F-43m)."""
+    return build_prototype("zincblende", elements, a)
 
 
 def create_wurtzite(elements: List[str], a: float, c: float) -> Atoms:
-    """Create wurtzite structure."""
-    if len(elements) < 2:
-        raise ValueError(f"Wurtzite structure requires 2 elements, got {len(elements)}")
-    
-    try:
-        # Wurtzite: spacegroup 186 (P63mc)
-        atoms = crystal(elements,
-                      basis=[(0, 0, 0), (1/3, 2/3, 0.375)],
-                      spacegroup=186,
-                      cellpar=[a, a, c, 90, 90, 120],
-                      size=(1, 1, 1))
-        # Verify we got a proper structure
-        if len(atoms) > 0:
-            return atoms
-    except Exception as e:
-        print(f"⚠️ Warning: crystal() failed for wurtzite: {e}, using fallback")
-    
-    # Fallback: create proper wurtzite structure manually
-    # Wurtzite has 4 atoms per unit cell (2 of each element)
-    positions = [
-        [0, 0, 0],  # Element 1
-        [a/3, 2*a/3, c*0.375],  # Element 2
-        [a/2, a*np.sqrt(3)/6, c/2],  # Element 1
-        [5*a/6, a*np.sqrt(3)/2, c*0.875],  # Element 2
-    ]
-    symbols = [elements[0], elements[1], elements[0], elements[1]]
-    cell = [[a, 0, 0], [-a/2, a*np.sqrt(3)/2, 0], [0, 0, c]]
-    return Atoms(symbols, positions=positions, cell=cell)
+    """Create wurtzite structure, spacegroup 186 (P6_3mc)."""
+    return build_prototype("wurtzite", elements, a, c)
 
 
 def create_perovskite(elements: List[str], a: float) -> Atoms:
-    """Create perovskite (ABO3) structure - simplified version."""
-    # Perovskite has A, B, and 3 O atoms per unit cell
-    if len(elements) < 3:
-        # If we don't have enough elements, create a simple structure
-        # A at corners, B at center, O at face centers
-        positions = [
-            [0, 0, 0],  # A
-            [a/2, a/2, a/2],  # B
-            [a/2, a/2, 0],  # O1
-            [a/2, 0, a/2],  # O2
-            [0, a/2, a/2],  # O3
-        ]
-        symbols = [elements[0] if len(elements) > 0 else "A",
-                  elements[1] if len(elements) > 1 else "B",
-                  elements[2] if len(elements) > 2 else "O",
-                  elements[2] if len(elements) > 2 else "O",
-                  elements[2] if len(elements) > 2 else "O"]
-        return Atoms(symbols, positions=positions, cell=[a, a, a])
-    else:
-        # Proper perovskite: A, B, and 3 O
-        positions = [
-            [0, 0, 0],  # A
-            [a/2, a/2, a/2],  # B
-            [a/2, a/2, 0],  # O1
-            [a/2, 0, a/2],  # O2
-            [0, a/2, a/2],  # O3
-        ]
-        symbols = [elements[0], elements[1], elements[2], elements[2], elements[2]]
-        return Atoms(symbols, positions=positions, cell=[a, a, a])
+    """Create cubic perovskite (ABO3) structure, spacegroup 221 (Pm-3m)."""
+    return build_prototype("perovskite", elements, a)
 
 
 def create_rutile(elements: List[str], a: float, c: float) -> Atoms:
-    """Create rutile (TiO2) structure - simplified version."""
-    # Rutile structure: 2 Ti and 4 O atoms per unit cell
-    if len(elements) < 2:
-        raise ValueError(f"Rutile structure requires 2 elements, got {len(elements)}")
-    
-    ti_element = elements[0]  # Should be "Ti"
-    o_element = elements[1]   # Should be "O"
-    
-    # Simplified rutile structure with proper Ti:O = 1:2 ratio
-    # 2 Ti atoms and 4 O atoms
-    positions = [
-        # Ti atoms
-        [0, 0, 0],  # Ti1
-        [a/2, a/2, c/2],  # Ti2
-        # O atoms
-        [0.31*a, 0.31*a, 0],  # O1
-        [0.69*a, 0.69*a, 0],  # O2
-        [0.31*a, 0.31*a, c],  # O3
-        [0.69*a, 0.69*a, c],  # O4
-    ]
-    symbols = [ti_element, ti_element, o_element, o_element, o_element, o_element]
-    return Atoms(symbols, positions=positions, cell=[a, a, c])
+    """Create rutile (TiO2) structure, spacegroup 136 (P4_2/mnm)."""
+    return build_prototype("rutile", elements, a, c)
 
 
 def create_quartz(elements: List[str], a: float, c: float) -> Atoms:
-    """Create quartz (alpha-SiO2) structure - hexagonal."""
-    # Ensure we have both elements
-    if len(elements) < 2:
-        raise ValueError(f"Quartz structure requires 2 elements, got {len(elements)}")
-    
-    si_element = elements[0]  # Should be "Si"
-    o_element = elements[1]   # Should be "O"
-    
-    # Create a simplified quartz structure with proper Si:O = 1:2 ratio
-    # Using a minimal unit cell with 1 Si and 2 O atoms
-    try:
-        positions = [
-            [0, 0, 0],  # Si at origin
-            [a/3, a*np.sqrt(3)/3, c/3],  # O1
-            [2*a/3, 2*a*np.sqrt(3)/3, 2*c/3],  # O2
-        ]
-        symbols = [si_element, o_element, o_element]
-        
-        # Create hexagonal cell
-        cell = [[a, 0, 0], [-a/2, a*np.sqrt(3)/2, 0], [0, 0, c]]
-        atoms = Atoms(symbols, positions=positions, cell=cell)
-        
-        # Verify the structure
-        if len(atoms) != 3:
-            raise ValueError(f"Expected 3 atoms, got {len(atoms)}")
-        if set(atoms.get_chemical_symbols()) != {si_element, o_element}:
-            raise ValueError(f"Structure contains wrong elements: {set(atoms.get_chemical_symbols())}")
-        
-        return atoms
-        
-    except Exception as e:
-        # Fallback: create a very simple structure but ensure correct elements
-        print(f"⚠️ Warning: Quartz creation had issue: {e}, using fallback")
-        positions = [
-            [0, 0, 0],  # Si
-            [a/4, a*np.sqrt(3)/4, c/4],  # O
-            [a/2, a*np.sqrt(3)/2, c/2],  # O
-        ]
-        symbols = [si_element, o_element, o_element]
-        cell = [[a, 0, 0], [-a/2, a*np.sqrt(3)/2, 0], [0, 0, c]]
-        return Atoms(symbols, positions=positions, cell=cell)
+    """Create alpha-quartz (SiO2) structure, spacegroup 154 (P3_221)."""
+    return build_prototype("quartz", elements, a, c)
 
 
 def create_cristobalite(elements: List[str], a: float) -> Atoms:
-    """Create cristobalite (SiO2) structure - cubic."""
-    # Cristobalite: spacegroup 227 (Fd-3m) - simplified cubic structure
-    # For SiO2, create structure with proper Si:O = 1:2 ratio
-    if len(elements) < 2:
-        raise ValueError(f"Cristobalite structure requires 2 elements, got {len(elements)}")
-    
-    si_element = elements[0]  # Should be "Si"
-    o_element = elements[1]    # Should be "O"
+    """Create ideal beta-cristobalite (SiO2) structure, spacegroup 227 (Fd-3m)."""
+    return build_prototype("cristobalite", elements, a)
+
+
+def lookup_catalog(name: str, compound: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Look up a material in the external catalog configured by CHATMAT_CATALOG.
+
+    Returns:
+        Database-style dictionary (see chatmat.catalog), or None if no catalog
+        is configured or it has no matching entry
+    """
+    try:
+        from .catalog import get_catalog
+    except ImportError:
+        from catalog import get_catalog
     
-    # Simplified cristobalite: 2 Si and 4 O atoms per unit cell
-    positions = [
-        # Si atoms
-        [0, 0, 0],  # Si1
-        [a/4, a/4, a/4],  # Si2
-        # O atoms
-        [a/8, a/8, a/8],  # O1
-        [3*a/8, 3*a/8, 3*a/8],  # O2
-        [a/2, a/4, a/4],  # O3
-        [a/4, a/2, a/4],  # O4
-    ]
-    symbols = [si_element, si_element, o_element, o_element, o_element, o_element]
-    return Atoms(symbols, positions=positions, cell=[a, a, a])
+    catalog = get_catalog()
+    if catalog is None:
+        return None
+    return catalog.lookup(name, compound)
+
+
+def structure_cache_key(source_type: Optional[str], source: str) -> Optional[str]:
+    """
+    structure_cache key of a remote structure, or None for sources that are not cached.
+
+    MP and COD ids are canonicalized ("MP-149" -> "mp:mp-149", "cod-001000041" ->
+    "cod:1000041"), so requests find the entries the bulk imports stored.
+
+    Raises:
+        ValueError: If source is not a valid MP or COD id
+    """
+    if source_type == "mp":
+        source = canonical_mp_id(source)
+    elif source_type == "cod":
+        source = canonical_cod_id(source)
+    return f"{source_type}:{source}" if source_type in ("mp", "cod", "icsd", "url") else None
 
 
 def create_structure(name: str, dims: List[int], structure_type: Optional[str] = None, 
@@ -350,43 +341,42 @@ def create_structure(name: str, dims: List[int], structure_type: Optional[str] =
     """
     name_lower = name.lower().strip()
     
-    # First, check if the name itself is in the compound database (e.g., "sio2", "tio2")
-    if name_lower in COMPOUND_DATABASE:
-        data = COMPOUND_DATABASE[name_lower]
+    # Look up the compound database through the precomputed index: exact key,
+    # alias or formula match on the name first, then the compound's element set
+    compound_key = find_compound(name, compound, structure_type)
+    data = COMPOUND_DATABASE[compound_key] if compound_key is not None else None
+    
+    # Fall back to the external catalog (CHATMAT_CATALOG) for unknown materials
+    if data is None and name_lower not in MATERIAL_DATABASE:
+        data = lookup_catalog(name, compound)
+        if data is not None:
+            compound_key = data["key"]
+    
+    if data is not None and len(data["elements"]) >= 2:
         struct_type = structure_type or data["structure"]
         a = lattice_param or data.get("a", 5.0)
         
-        print(f"🔍 Found {name_lower} in compound database: {data['name']}, structure={struct_type}, elements={data['elements']}")
+        source = "compound database" if compound_key in COMPOUND_DATABASE else "catalog"
+        print(f"🔍 Found {compound_key} in {source}: {data['name']}, structure={struct_type}, elements={data['elements']}")
         
         try:
-            if struct_type == "rocksalt":
-                atoms = create_rocksalt(data["elements"], a)
-            elif struct_type == "zincblende":
-                atoms = create_zincblende(data["elements"], a)
-            elif struct_type == "wurtzite":
-                c = data.get("c", a * 1.63)
-                atoms = create_wurtzite(data["elements"], a, c)
-            elif struct_type == "perovskite":
-                atoms = create_perovskite(data["elements"], a)
-            elif struct_type == "rutile":
-                c = data.get("c", a * 0.64)
-                atoms = create_rutile(data["elements"], a, c)
-            elif struct_type == "quartz":
-                c = data.get("c", a * 1.10) if "c" in data else a * 1.10
-                atoms = create_quartz(data["elements"], a, c)
-            elif struct_type == "cristobalite":
-                atoms = create_cristobalite(data["elements"], a)
+            if struct_type not in PROTOTYPES and "sites" in data:
+                # Catalog prototype given as spacegroup + Wyckoff sites
+                cellpar = data["cellpar"] if not lattice_param else [a, a, data.get("c", a)] + data["cellpar"][3:]
+                atoms = build_from_sites(data["spacegroup"], data["sites"], cellpar)
             else:
-                atoms = create_zincblende(data["elements"], a)
+                if struct_type not in PROTOTYPES or n_species(struct_type) < 2:
+                    # Default to zincblende for compounds
+                    struct_type = "zincblende"
+                atoms = build_prototype(struct_type, data["elements"], a, data.get("c"))
             
-            print(f"✅ Generated structure with {len(atoms)} atoms: {set(atoms.get_chemical_symbols())}")
-            print(f"   Atom symbols: {atoms.get_chemical_symbols()}")
+            print(f"✅ Generated structure with {len(atoms)} atoms: {composition(atoms)}")
             
             # Verify structure has multiple atoms
             if len(atoms) < 2:
                 raise ValueError(f"Structure has only {len(atoms)} atom(s), expected multiple atoms")
             
-            atoms = atoms * tuple(dims)
+            atoms = supercell(atoms, dims)
             print(f"✅ After supercell {dims}: {len(atoms)} atoms")
             return atoms
             
@@ -394,94 +384,32 @@ def create_structure(name: str, dims: List[int], structure_type: Optional[str] =
             print(f"❌ Error creating {struct_type} structure: {e}")
             raise HTTPException(
                 status_code=500,
-                detail=f"Failed to create {struct_type} structure for {name_lower}: {str(e)}"
+                detail=f"Failed to create {struct_type} structure for {compound_key}: {str(e)}"
             )
     
-    # Check if it's a compound
+    # Unknown compound: try to create a simple structure from the first element
     if compound and len(compound) >= 2:
-        compound_key = "".join(sorted([e.lower() for e in compound]))
-        # Also create a direct compound name (e.g., "sio" from ["Si", "O"])
-        compound_name = "".join([e.lower() for e in compound])
-        # For binary compounds, try common patterns: "sio2", "tio2", etc.
-        compound_name_with_num = None
-        if len(compound) == 2:
-            compound_name_with_num = f"{compound[0].lower()}{compound[1].lower()}2"
-        
-        # Try to find in compound database
-        for key, data in COMPOUND_DATABASE.items():
-            # Check multiple matching strategies
-            matches = (compound_key in key or 
-                      all(e.lower() in key for e in compound) or
-                      compound_name in key or
-                      name_lower in key)
-            
-            # For binary compounds, also check with number suffix
-            if compound_name_with_num:
-                matches = matches or compound_name_with_num in key
-            
-            if matches:
-                struct_type = structure_type or data["structure"]
-                a = lattice_param or data.get("a", 5.0)
-                
-                if struct_type == "rocksalt":
-                    atoms = create_rocksalt(data["elements"], a)
-                elif struct_type == "zincblende":
-                    atoms = create_zincblende(data["elements"], a)
-                elif struct_type == "wurtzite":
-                    c = data.get("c", a * 1.63)
-                    atoms = create_wurtzite(data["elements"], a, c)
-                elif struct_type == "perovskite":
-                    atoms = create_perovskite(data["elements"], a)
-                elif struct_type == "rutile":
-                    c = data.get("c", a * 0.64)
-                    atoms = create_rutile(data["elements"], a, c)
-                elif struct_type == "quartz":
-                    c = data.get("c", a * 1.10)  # Default c/a ratio for quartz
-                    atoms = create_quartz(data["elements"], a, c)
-                elif struct_type == "cristobalite":
-                    atoms = create_cristobalite(data["elements"], a)
-                else:
-                    # Default to zincblende for binary compounds
-                    atoms = create_zincblende(data["elements"], a)
-                
-                atoms = atoms * tuple(dims)
-                return atoms
-        
-        # If not found, try to create a simple binary structure
         try:
-            atoms = bulk(compound[0], "fcc", a=lattice_param or 4.0)
-            atoms = atoms * tuple(dims)
+            atoms = build_prototype("fcc", [compound[0]], lattice_param or 4.0)
+            atoms = supercell(atoms, dims)
             return atoms
         except:
             pass
     
-    # Check element database
-    if name_lower in MATERIAL_DATABASE:
-        data = MATERIAL_DATABASE[name_lower]
+    # Check element database (or a single-element catalog entry)
+    if name_lower in MATERIAL_DATABASE or data is not None:
+        if data is None:
+            data = MATERIAL_DATABASE[name_lower]
+            # Capitalize element symbol for ASE (e.g., "au" -> "Au")
+            element_symbol = name_lower.capitalize() if len(name_lower) <= 2 else name_lower
+        else:
+            element_symbol = data["elements"][0]
         struct_type = structure_type or data["structure"]
         a = lattice_param or data["a"]
         
-        # Capitalize element symbol for ASE (e.g., "au" -> "Au")
-        element_symbol = name_lower.capitalize() if len(name_lower) <= 2 else name_lower
-        
-        # Use cubic=True to get conventional cell with multiple atoms instead of primitive cell
-        if struct_type == "hcp":
-            c = data.get("c", a * 1.633)  # Default c/a ratio
-            atoms = bulk(element_symbol, "hcp", a=a, c=c, cubic=False)
-        elif struct_type == "diamond":
-            atoms = bulk(element_symbol, "diamond", a=a, cubic=True)
-        elif struct_type == "bcc":
-            atoms = bulk(element_symbol, "bcc", a=a, cubic=True)
-        elif struct_type == "fcc":
-            atoms = bulk(element_symbol, "fcc", a=a, cubic=True)
-        elif struct_type == "sc":
-            atoms = bulk(element_symbol, "sc", a=a, cubic=True)
-        else:
-            # Default based on database - use cubic=True for cubic structures
-            if data["structure"] in ["fcc", "bcc", "sc", "diamond"]:
-                atoms = bulk(element_symbol, data["structure"], a=a, cubic=True)
-            else:
-                atoms = bulk(element_symbol, data["structure"], a=a)
+        if struct_type not in PROTOTYPES or n_species(struct_type) > 1:
+            struct_type = data["structure"]
+        atoms = build_prototype(struct_type, [element_symbol], a, data.get("c"))
     else:
         # Try to guess structure type or use default
         struct_type = structure_type or "fcc"
@@ -490,34 +418,63 @@ def create_structure(name: str, dims: List[int], structure_type: Optional[str] =
         # Capitalize element symbol for ASE
         element_symbol = name_lower.capitalize() if len(name_lower) <= 2 else name_lower
         
+        if struct_type not in PROTOTYPES or n_species(struct_type) > 1:
+            struct_type = "fcc"
         try:
-            if struct_type == "hcp":
-                atoms = bulk(element_symbol, "hcp", a=a, c=a*1.633, cubic=False)
-            elif struct_type == "diamond":
-                atoms = bulk(element_symbol, "diamond", a=a, cubic=True)
-            elif struct_type == "bcc":
-                atoms = bulk(element_symbol, "bcc", a=a, cubic=True)
-            elif struct_type == "sc":
-                atoms = bulk(element_symbol, "sc", a=a, cubic=True)
-            else:
-                atoms = bulk(element_symbol, "fcc", a=a, cubic=True)
+            atoms = build_prototype(struct_type, [element_symbol], a)
         except Exception as e:
-            # Last resort: try with default parameters
-            try:
-                atoms = bulk(element_symbol, "fcc", a=4.0)
-            except Exception as e2:
-                raise HTTPException(status_code=400, 
-                    detail=f"Could not generate structure for '{name}'. Error: {str(e2)}. Please specify a valid element or compound.")
+            raise HTTPException(status_code=400, 
+                detail=f"Could not generate structure for '{name}'. Error: {str(e)}. Please specify a valid element or compound.")
     
     # Apply Supercell
-    atoms = atoms * tuple(dims)
+    atoms = supercell(atoms, dims)
     return atoms
 
 
+def estimate_unit_cell_atoms(name: str, structure_type: Optional[str] = None,
+                             compound: Optional[List[str]] = None) -> int:
+    """
+    Number of atoms in the unit cell create_structure() would build, without building it.
+
+    Follows the same lookup order as create_structure (compound index, catalog,
+    element database, guessed prototype), so the atom count of a supercell is
+    this value times the product of the supercell dimensions.
+    """
+    name_lower = name.lower().strip()
+    compound_key = find_compound(name, compound, structure_type)
+    data = COMPOUND_DATABASE[compound_key] if compound_key is not None else None
+    if data is None and name_lower not in MATERIAL_DATABASE:
+        data = lookup_catalog(name, compound)
+
+    if data is not None and len(data["elements"]) >= 2:
+        struct_type = structure_type or data["structure"]
+        if struct_type not in PROTOTYPES and "sites" in data:
+            return len(build_from_sites(data["spacegroup"], data["sites"], data["cellpar"]))
+        if struct_type not in PROTOTYPES or n_species(struct_type) < 2:
+            struct_type = "zincblende"
+        return prototype_size(struct_type)
+
+    if compound and len(compound) >= 2:
+        return prototype_size("fcc")
+
+    if data is None:
+        data = MATERIAL_DATABASE.get(name_lower)
+    if data is not None:
+        struct_type = structure_type or data["structure"]
+        if struct_type not in PROTOTYPES or n_species(struct_type) > 1:
+            struct_type = data["structure"]
+    else:
+        struct_type = structure_type or "fcc"
+        if struct_type not in PROTOTYPES or n_species(struct_type) > 1:
+            struct_type = "fcc"
+    return prototype_size(struct_type)
+
+
 # ============================================================================
 # External Structure Fetching Functions
 # ============================================================================
 
+@coalesce(fetches)
 def fetch_from_materials_project(material_id: str, api_key: Optional[str] = None) -> Atoms:
     """
     Fetch structure from Materials Project database.
@@ -542,7 +499,8 @@ def fetch_from_materials_project(material_id: str, api_key: Optional[str] = None
                 detail="Materials Project API key required. Set MP_API_KEY environment variable or provide api_key parameter."
             )
         
-        with MPRester(api_key) as mpr:
+        mp_kwargs = {"endpoint": config.MP_ENDPOINT} if config.MP_ENDPOINT else {}
+        with MPRester(api_key, **mp_kwargs) as mpr:
             structure = mpr.get_structure_by_material_id(material_id)
             # Convert pymatgen Structure to ASE Atoms
             from pymatgen.io.ase import AseAtomsAdaptor
@@ -562,6 +520,7 @@ def fetch_from_materials_project(material_id: str, api_key: Optional[str] = None
         )
 
 
+@coalesce(fetches)
 def fetch_from_cod(cod_id: Union[str, int]) -> Atoms:
     """
     Fetch structure from Crystallography Open Database (COD).
@@ -570,7 +529,7 @@ def fetch_from_cod(cod_id: Union[str, int]) -> Atoms:
         cod_id: COD entry ID (e.g., "2000001" or 2000001)
         
     Returns:
-        Atoms object from COD
+        Atoms object from COD, normalized (see cod_import.normalize_structure)
         
     Raises:
         HTTPException: If structure cannot be fetched
@@ -578,21 +537,21 @@ def fetch_from_cod(cod_id: Union[str, int]) -> Atoms:
     try:
         import requests
         
-        cod_id_str = str(cod_id).zfill(9)  # COD IDs are 9 digits
-        url = f"http://www.crystallography.net/cod/{cod_id_str}.cif"
-        
-        response = requests.get(url, timeout=10)
+        response = requests.get(cod_url(cod_id), timeout=10)
         if response.status_code != 200:
             raise HTTPException(
                 status_code=404,
                 detail=f"COD entry {cod_id} not found. Check if the ID is correct."
             )
         
-        # Read CIF from string
-        cif_string = response.text
-        atoms = read(io.StringIO(cif_string), format="cif")
+        # Parse and normalize like a bulk import (see cod_import.py)
+        atoms, error = parse_cif(response.text, canonical_cod_id(cod_id))
+        if error:
+            raise ValueError(error)
         return atoms
         
+    except HTTPException:
+        raise
     except ImportError:
         raise HTTPException(
             status_code=500,
@@ -605,6 +564,7 @@ def fetch_from_cod(cod_id: Union[str, int]) -> Atoms:
         )
 
 
+@coalesce(fetches)
 def fetch_from_icsd(icsd_id: Union[str, int], username: Optional[str] = None, 
                     password: Optional[str] = None) -> Atoms:
     """
@@ -679,6 +639,8 @@ def load_structure_from_file(file_path: str, format: Optional[str] = None) -> At
                 detail=f"File not found: {file_path}"
             )
         
+        from ase.io import read
+        
         if format:
             atoms = read(file_path, format=format)
         else:
@@ -699,6 +661,44 @@ def load_structure_from_file(file_path: str, format: Optional[str] = None) -> At
         )
 
 
+def iter_structures_from_file(file_path: str, format: Optional[str] = None) -> Iterator[Atoms]:
+    """
+    Read all frames of a (multi-frame) structure file one at a time.
+
+    Unlike load_structure_from_file, which returns only the last frame, this
+    yields every frame through ase.io.iread, so that trajectories and MD dumps
+    are never held in memory as a whole (for formats ASE reads incrementally,
+    such as extxyz).
+
+    Args:
+        file_path: Path to structure file
+        format: Optional format specification (e.g., "extxyz", "traj", "cif")
+
+    Yields:
+        One Atoms object per frame
+
+    Raises:
+        HTTPException: If the file does not exist (404) or cannot be parsed (400)
+    """
+    if not os.path.exists(file_path):
+        raise HTTPException(status_code=404, detail=f"File not found: {file_path}")
+
+    from ase.io import iread
+
+    frame = 0
+    try:
+        for atoms in iread(file_path, index=":", format=format):
+            yield atoms
+            frame += 1
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Error reading frame {frame} of {os.path.basename(file_path)}: {str(e) or type(e).__name__}"
+        )
+
+
 def load_structure_from_string(content: str, format: str) -> Atoms:
     """
     Load structure from a string (e.g., CIF content, POSCAR content).
@@ -714,6 +714,8 @@ def load_structure_from_string(content: str, format: str) -> Atoms:
         HTTPException: If structure cannot be loaded
     """
     try:
+        from ase.io import read
+        
         atoms = read(io.StringIO(content), format=format)
         if atoms is None:
             raise HTTPException(
@@ -729,6 +731,7 @@ def load_structure_from_string(content: str, format: str) -> Atoms:
         )
 
 
+@coalesce(fetches)
 def fetch_structure_from_url(url: str, format: Optional[str] = None) -> Atoms:
     """
     Fetch structure from a URL (e.g., direct link to CIF file).
@@ -745,6 +748,7 @@ def fetch_structure_from_url(url: str, format: Optional[str] = None) -> Atoms:
     """
     try:
         import requests
+        from ase.io import read
         
         response = requests.get(url, timeout=30)
         if response.status_code != 200:
@@ -840,8 +844,19 @@ def get_structure(source: str, source_type: str = "auto", **kwargs) -> Atoms:
                     detail=f"Could not auto-detect source type for '{source}'. Please specify source_type."
                 )
     
+    # Remote structures are cached as unit cells, shared across worker processes
+    try:
+        cache_key = structure_cache_key(source_type, source)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if source_type in ("mp", "cod"):
+        source = cache_key.partition(":")[2]
+    cached = structure_cache.get(cache_key) if cache_key else None
+
     # Fetch based on source type
-    if source_type == "mp":
+    if cached is not None:
+        atoms = cached.copy()
+    elif source_type == "mp":
         atoms = fetch_from_materials_project(source, kwargs.get("api_key"))
     elif source_type == "cod":
         atoms = fetch_from_cod(source)
@@ -863,12 +878,14 @@ def get_structure(source: str, source_type: str = "auto", **kwargs) -> Atoms:
             status_code=400,
             detail=f"Unknown source_type: {source_type}. Valid options: mp, cod, icsd, file, url, string, auto"
         )
+    if cache_key and cached is None:
+        structure_cache.set(cache_key, atoms.copy())
     
     # Apply supercell if specified
     if "dims" in kwargs:
         dims = kwargs["dims"]
         if isinstance(dims, list) and len(dims) == 3:
-            atoms = atoms * tuple(dims)
+            atoms = supercell(atoms, dims)
     
     return atoms
 
@@ -913,58 +930,22 @@ def parse_llm_structure_response(llm_response: str) -> Dict[str, Any]:
         except json.JSONDecodeError:
             pass
     
-    # Fallback: try to extract information using regex patterns
-    result = {
-        "material_name": "Si",
-        "structure_type": None,
-        "lattice_parameter": None,
-        "supercell_dims": [1, 1, 1],
-        "compound": None
-    }
-    
-    # Extract material name
-    element_pattern = r'\b([A-Z][a-z]?)\b'
-    elements = re.findall(element_pattern, llm_response)
-    if elements:
-        # Filter out common words
-        common_words = {"The", "For", "Get", "Calculate", "Energy", "Force", "Structure"}
-        valid_elements = [e for e in elements if e not in common_words]
-        if valid_elements:
-            result["material_name"] = valid_elements[0]
-    
-    # Extract structure type
-    structure_keywords = {
-        "fcc": ["fcc", "face-centered cubic", "face centered cubic"],
-        "bcc": ["bcc", "body-centered cubic", "body centered cubic"],
-        "hcp": ["hcp", "hexagonal close-packed"],
-        "diamond": ["diamond", "diamond cubic"],
-        "zincblende": ["zincblende", "zinc blende"],
-        "rocksalt": ["rocksalt", "rock salt", "nacl structure"]
-    }
-    
-    text_lower = llm_response.lower()
-    for struct_type, keywords in structure_keywords.items():
-        if any(kw in text_lower for kw in keywords):
-            result["structure_type"] = struct_type
-            break
-    
-    # Extract lattice parameter
-    lattice_match = re.search(r'[al]\s*[=:]\s*([\d.]+)', text_lower)
-    if lattice_match:
-        result["lattice_parameter"] = float(lattice_match.group(1))
-    
-    # Extract supercell
-    supercell_match = re.search(r'(\d+)\s*[x×]\s*(\d+)\s*[x×]\s*(\d+)', text_lower)
-    if supercell_match:
-        result["supercell_dims"] = [
-            int(supercell_match.group(1)),
-            int(supercell_match.group(2)),
-            int(supercell_match.group(3))
-        ]
-    
-    return result
+    # Fallback: interpret the text like a user request
+    parsed = _interpreter().interpret(llm_response)
+    return {key: parsed[key] for key in
+            ("material_name", "structure_type", "lattice_parameter", "supercell_dims", "compound")}
 
 
+def _interpreter():
+    """The interpret module (imported lazily, it builds its vocabulary from this module)."""
+    try:
+        from . import interpret
+    except ImportError:
+        import interpret
+    return interpret
+
+
+@coalesce(llm_calls)
 def generate_structure_with_openai(description: str, api_key: Optional[str] = None, 
                                    model: str = "gpt-4o-mini") -> Atoms:
     """
@@ -994,18 +975,7 @@ def generate_structure_with_openai(description: str, api_key: Optional[str] = No
         client = OpenAI(api_key=api_key)
         
         # Create a prompt for structure generation
-        system_prompt = """You are a materials science expert. Given a description of a crystal structure, 
-extract the following information and return it as JSON:
-- material_name: Element symbol or compound name (e.g., "Si", "NaCl", "GaN", "MoS2", "Graphene")
-- structure_type: Crystal structure type (fcc, bcc, hcp, diamond, zincblende, rocksalt, wurtzite, perovskite, rutile, quartz, cristobalite, layered, 2d) or null
-- lattice_parameter: Lattice parameter in Angstroms (float) or null. For 2D materials, this is the in-plane lattice parameter.
-- supercell_dims: Supercell dimensions as [nx, ny, nz] (default: [1, 1, 1])
-- compound: List of element symbols for compounds (e.g., ["Na", "Cl"], ["Mo", "S"], ["C"]) or null for elements
-
-For complex structures, extract as much information as possible. If the structure description is too complex, 
-suggest the closest simple structure that can be generated. For layered/2D materials, use structure_type "layered" or "2d".
-
-Return ONLY valid JSON, no additional text."""
+        system_prompt = _interpreter().LLM_SYSTEM_PROMPT
 
         user_prompt = f"Extract structure parameters from this description: {description}"
         
@@ -1047,6 +1017,7 @@ Return ONLY valid JSON, no additional text."""
         )
 
 
+@coalesce(llm_calls)
 def generate_structure_with_anthropic(description: str, api_key: Optional[str] = None,
                                       model: str = "claude-3-haiku-20240307") -> Atoms:
     """
@@ -1075,18 +1046,7 @@ def generate_structure_with_anthropic(description: str, api_key: Optional[str] =
         
         client = Anthropic(api_key=api_key)
         
-        system_prompt = """You are a materials science expert. Given a description of a crystal structure, 
-extract the following information and return it as JSON:
-- material_name: Element symbol or compound name (e.g., "Si", "NaCl", "GaN", "MoS2", "Graphene")
-- structure_type: Crystal structure type (fcc, bcc, hcp, diamond, zincblende, rocksalt, wurtzite, perovskite, rutile, quartz, cristobalite, layered, 2d) or null
-- lattice_parameter: Lattice parameter in Angstroms (float) or null. For 2D materials, this is the in-plane lattice parameter.
-- supercell_dims: Supercell dimensions as [nx, ny, nz] (default: [1, 1, 1])
-- compound: List of element symbols for compounds (e.g., ["Na", "Cl"], ["Mo", "S"], ["C"]) or null for elements
-
-For complex structures, extract as much information as possible. If the structure description is too complex, 
-suggest the closest simple structure that can be generated. For layered/2D materials, use structure_type "layered" or "2d".
-
-Return ONLY valid JSON, no additional text."""
+        system_prompt = _interpreter().LLM_SYSTEM_PROMPT
 
         user_prompt = f"Extract structure parameters from this description: {description}"
         
@@ -1167,15 +1127,16 @@ def generate_structure_with_llm(description: str, provider: str = "openai",
         )
 
 
+@coalesce(llm_calls)
 def generate_structure_with_ollama(description: str, model: str = "llama3", 
-                                   base_url: str = "http://localhost:11434") -> Atoms:
+                                   base_url: Optional[str] = None) -> Atoms:
     """
     Generate structure using Ollama (local LLM).
     
     Args:
         description: Natural language description of the structure
         model: Ollama model name (llama3, mistral, etc.)
-        base_url: Ollama API base URL
+        base_url: Ollama API base URL (default: CHATMAT_OLLAMA_URL, http://localhost:11434)
         
     Returns:
         Atoms object
@@ -1186,21 +1147,11 @@ def generate_structure_with_ollama(description: str, model: str = "llama3",
     try:
         import requests
         
-        system_prompt = """You are a materials science expert. Given a description of a crystal structure, 
-extract the following information and return it as JSON:
-- material_name: Element symbol or compound name (e.g., "Si", "NaCl", "GaN", "MoS2", "Graphene")
-- structure_type: Crystal structure type (fcc, bcc, hcp, diamond, zincblende, rocksalt, wurtzite, perovskite, rutile, quartz, cristobalite, layered, 2d) or null
-- lattice_parameter: Lattice parameter in Angstroms (float) or null. For 2D materials, this is the in-plane lattice parameter.
-- supercell_dims: Supercell dimensions as [nx, ny, nz] (default: [1, 1, 1])
-- compound: List of element symbols for compounds (e.g., ["Na", "Cl"], ["Mo", "S"], ["C"]) or null for elements
-
-For complex structures, extract as much information as possible. If the structure description is too complex, 
-suggest the closest simple structure that can be generated. For layered/2D materials, use structure_type "layered" or "2d".
-
-Return ONLY valid JSON, no additional text."""
+        system_prompt = _interpreter().LLM_SYSTEM_PROMPT
 
         user_prompt = f"Extract structure parameters from this description: {description}"
         
+        base_url = (base_url or config.OLLAMA_URL).rstrip("/")
         response = requests.post(
             f"{base_url}/api/chat",
             json={
@@ -1248,6 +1199,7 @@ Return ONLY valid JSON, no additional text."""
         )
 
 
+@coalesce(llm_calls)
 def generate_structure_with_gemini(description: str, api_key: str, model: str) -> Atoms:
     """
     Generate structure using Gemini API.
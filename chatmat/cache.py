@@ -0,0 +1,200 @@
+"""
+Structure and result caches for ChatMat.
+
+Each cache keeps a small in-process LRU and, when CHATMAT_CACHE_DIR is set,
+a SQLite file in that directory as the backing store. All worker processes of
+a multi-worker deployment open the same file, so a structure fetched or a
+result computed by one worker is reused by the others.
+
+Caches of large or short-lived values (full structures, job records) can be
+bounded by age (ttl) and by the number of stored entries (max_rows); both
+bounds apply to the SQLite store as well, which is pruned on every write.
+"""
+
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, Optional, Tuple, Union
+
+try:
+    from . import config
+except ImportError:
+    import config
+
+_MISSING = object()
+# A bound, or a callable returning it (read at use, so it follows config changes)
+Bound = Union[None, float, Callable[[], Optional[float]]]
+
+
+class SharedCache:
+    """Key/value cache with an in-memory LRU in front of an optional SQLite store."""
+
+    def __init__(self, name: str, path: Optional[str] = None, max_items: Optional[int] = None,
+                 ttl: Bound = None, max_rows: Bound = None):
+        """
+        Args:
+            name: Cache namespace (table rows are keyed by name and key)
+            path: SQLite file. Defaults to <CHATMAT_CACHE_DIR>/cache.sqlite; memory-only if unset
+            max_items: Size of the in-process LRU (default: CHATMAT_CACHE_SIZE)
+            ttl: Seconds an entry is kept, in memory and on disk (None or <= 0: forever)
+            max_rows: Entries kept in the SQLite store, newest first (None or <= 0: unbounded)
+        """
+        self.name = name
+        self._path = path
+        self._max_items = max_items
+        self._ttl = ttl
+        self._max_rows = max_rows
+        # key -> (created, value)
+        self._memory: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def path(self) -> Optional[str]:
+        if self._path:
+            return self._path
+        if config.CACHE_DIR:
+            return os.path.join(config.CACHE_DIR, "cache.sqlite")
+        return None
+
+    @property
+    def max_items(self) -> int:
+        return self._max_items if self._max_items is not None else config.CACHE_SIZE
+
+    @staticmethod
+    def _bound(value: Bound) -> Optional[float]:
+        value = value() if callable(value) else value
+        return value if value is not None and value > 0 else None
+
+    @property
+    def ttl(self) -> Optional[float]:
+        return self._bound(self._ttl)
+
+    @property
+    def max_rows(self) -> Optional[int]:
+        rows = self._bound(self._max_rows)
+        return int(rows) if rows is not None else None
+
+    def _expired(self, created: float) -> bool:
+        ttl = self.ttl
+        return ttl is not None and time.time() - created > ttl
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Stable hash key from arbitrary (repr-able) parts."""
+        return hashlib.sha256(repr(parts).encode()).hexdigest()
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        """Per-thread, per-process SQLite connection (connections must not cross a fork)."""
+        path = self.path
+        if path is None:
+            return None
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid() or self._local.path != path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            conn = sqlite3.connect(path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS cache ("
+                         "name TEXT, key TEXT, value BLOB, created REAL, PRIMARY KEY (name, key))")
+            conn.commit()
+            self._local.conn, self._local.pid, self._local.path = conn, os.getpid(), path
+        return conn
+
+    def _remember(self, key: str, value: Any, created: Optional[float] = None) -> None:
+        with self._lock:
+            self._memory[key] = (time.time() if created is None else created, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_items:
+                self._memory.popitem(last=False)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if not self._expired(entry[0]):
+                    self._memory.move_to_end(key)
+                    return entry[1]
+                del self._memory[key]
+
+        conn = self._connection()
+        if conn is None:
+            return default
+        row = conn.execute("SELECT value, created FROM cache WHERE name = ? AND key = ?",
+                           (self.name, key)).fetchone()
+        if row is None or self._expired(row[1]):
+            return default
+        value = pickle.loads(row[0])
+        self._remember(key, value, row[1])
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self._remember(key, value)
+        conn = self._connection()
+        if conn is not None:
+            conn.execute("INSERT OR REPLACE INTO cache (name, key, value, created) VALUES (?, ?, ?, ?)",
+                         (self.name, key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), time.time()))
+            self._prune(conn)
+            conn.commit()
+
+    def set_many(self, items: Iterable[Tuple[str, Any]]) -> None:
+        """Store several values in one transaction."""
+        items = list(items)
+        for key, value in items:
+            self._remember(key, value)
+        conn = self._connection()
+        if conn is not None and items:
+            now = time.time()
+            conn.executemany("INSERT OR REPLACE INTO cache (name, key, value, created) VALUES (?, ?, ?, ?)",
+                             [(self.name, key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), now)
+                              for key, value in items])
+            self._prune(conn)
+            conn.commit()
+
+    def _prune(self, conn: sqlite3.Connection) -> None:
+        """Delete stored entries older than ttl or beyond the newest max_rows (caller commits)."""
+        ttl, max_rows = self.ttl, self.max_rows
+        if ttl is not None:
+            conn.execute("DELETE FROM cache WHERE name = ? AND created < ?", (self.name, time.time() - ttl))
+        if max_rows is not None:
+            conn.execute("DELETE FROM cache WHERE name = ? AND key NOT IN "
+                         "(SELECT key FROM cache WHERE name = ? ORDER BY created DESC LIMIT ?)",
+                         (self.name, self.name, max_rows))
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._memory.pop(key, None)
+        conn = self._connection()
+        if conn is not None:
+            conn.execute("DELETE FROM cache WHERE name = ? AND key = ?", (self.name, key))
+            conn.commit()
+
+    def __contains__(self, key: str) -> bool:
+        """True if key has a live entry (without loading it from the SQLite store)."""
+        with self._lock:
+            entry = self._memory.get(key)
+        if entry is not None and not self._expired(entry[0]):
+            return True
+        conn = self._connection()
+        if conn is None:
+            return False
+        row = conn.execute("SELECT created FROM cache WHERE name = ? AND key = ?", (self.name, key)).fetchone()
+        return row is not None and not self._expired(row[0])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+        conn = self._connection()
+        if conn is not None:
+            conn.execute("DELETE FROM cache WHERE name = ?", (self.name,))
+            conn.commit()
+
+
+# Unit-cell structures from external sources (before any supercell is applied)
+structure_cache = SharedCache("structures")
+# /calculate/ responses for deterministic requests
+result_cache = SharedCache("results")
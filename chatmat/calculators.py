@@ -0,0 +1,162 @@
+"""
+Foundation model management for ChatMat.
+
+The calculator is created once per process and kept resident, instead of
+being rebuilt for every request. The model package (iann) is imported lazily
+on first use, so importing ChatMat stays cheap; the backend warm-up calls
+get_calculator() explicitly to move that cost to startup.
+
+With CHATMAT_NEIGHBOR_LISTS=1, calculators with a set_neighbor_list()
+method are given the Verlet list of the structure's topology before each
+evaluation, so repeated evaluations of one structure (relaxation steps, MD
+frames) do not rebuild it every time. The iann MLCalculator builds its own
+graph and has no such method, so this is a hook for calculators that do.
+"""
+
+import threading
+from typing import Tuple
+
+import numpy as np
+from ase import Atoms
+
+try:
+    from . import config
+    from .decomposition import evaluate_decomposed, needs_decomposition
+    from .neighbors import shared_neighbor_list
+    from .symmetry import evaluate_with_symmetry
+    from .threads import apply_torch_limits
+except ImportError:
+    import config
+    from decomposition import evaluate_decomposed, needs_decomposition
+    from neighbors import shared_neighbor_list
+    from symmetry import evaluate_with_symmetry
+    from threads import apply_torch_limits
+
+_calculator = None
+_calculator_lock = threading.Lock()
+# ASE calculators keep per-structure state, so evaluations are serialized
+_evaluation_lock = threading.Lock()
+
+
+def test_foundation_model(atoms: Atoms):
+    """
+    Simulates a foundation model calculation.
+    Returns: Energy (eV) and Forces (eV/A)
+    """
+    # Simulate processing time or model loading
+    n_atoms = len(atoms)
+
+    # Generate dummy data that looks realistic
+    # Energy: Rough approximation (e.g., -5 eV per atom) plus some noise
+    total_energy = -5.0 * n_atoms + np.random.normal(0, 0.1)
+
+    # Forces: Random small vectors for each atom
+    forces = np.random.normal(0, 0.05, (n_atoms, 3))
+
+    return total_energy, forces
+
+
+def load_calculator():
+    """Create a new MLCalculator for the configured foundation model."""
+    from iann.foundations import foundation_model
+    from iann.calculators import MLCalculator
+
+    return MLCalculator(
+        model_path=foundation_model(config.MODEL_NAME),  # painn_oc.pt: trained on OC20+OC22
+        compute_forces=True,
+        device=config.DEVICE)
+
+
+def get_calculator():
+    """Return the process-wide calculator, loading the model on first use."""
+    global _calculator
+    if _calculator is None:
+        with _calculator_lock:
+            if _calculator is None:
+                _calculator = load_calculator()
+                # The model imports torch, which starts with one thread per core
+                apply_torch_limits()
+    return _calculator
+
+
+def is_loaded() -> bool:
+    """True once the resident calculator has been created."""
+    return _calculator is not None
+
+
+def share_neighbor_list(calc, atoms: Atoms) -> bool:
+    """
+    Hand the calculator the shared Verlet list of atoms' topology (see neighbors.py).
+
+    Only with CHATMAT_NEIGHBOR_LISTS set, and only calculators that accept
+    one (a set_neighbor_list() method) get it; the others build their own
+    neighbor lists as before.
+
+    Returns:
+        True if the calculator was given the list
+    """
+    if not config.NEIGHBOR_LISTS or config.NEIGHBOR_SKIN <= 0:
+        return False
+    setter = getattr(calc, "set_neighbor_list", None)
+    if setter is None:
+        return False
+    setter(shared_neighbor_list(atoms))
+    return True
+
+
+def supports_chunks(calc) -> bool:
+    """True if calc reports per-atom energies, which chunked evaluation stitches together."""
+    return "energies" in getattr(calc, "implemented_properties", ())
+
+
+def evaluate_chunk(atoms: Atoms) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Per-atom energies and forces of one chunk of a decomposed structure.
+
+    Runs without the evaluation lock: it is called either under that lock or
+    in a forked worker process that has its own copy of the calculator.
+    """
+    if config.MODEL_NAME == "mock":
+        return np.random.normal(-5.0, 0.01, len(atoms)), np.random.normal(0, 0.05, (len(atoms), 3))
+    atoms.calc = get_calculator()
+    return atoms.get_potential_energies(), atoms.get_forces()
+
+
+def evaluate(atoms: Atoms) -> Tuple[float, np.ndarray]:
+    """
+    Evaluate energy and forces with the resident foundation model.
+
+    Perfect supercells are evaluated through their unit cell (see symmetry.py,
+    CHATMAT_SYMMETRY_REDUCTION). Structures too large for the memory ceiling
+    (CHATMAT_DECOMP_MEMORY_MB) are evaluated in spatial chunks, see
+    decomposition.py, if the model reports per-atom energies; otherwise they
+    are evaluated whole.
+
+    Returns:
+        (energy in eV, forces in eV/A as an (N, 3) array)
+    """
+    if config.SYMMETRY_REDUCTION:
+        return evaluate_with_symmetry(atoms, _evaluate)
+    return _evaluate(atoms)
+
+
+def _evaluate(atoms: Atoms) -> Tuple[float, np.ndarray]:
+    if config.MODEL_NAME == "mock":
+        return test_foundation_model(atoms)
+
+    calc = get_calculator()  # loaded before forking chunk workers, so they share it
+    if needs_decomposition(len(atoms)):
+        if supports_chunks(calc):
+            # Also with CHATMAT_DECOMP_PROCESSES > 1: the chunk workers are forked under the
+            # lock, so no other thread is inside the model (a fork copies its locks and state
+            # mid-call) and only one request at a time runs a pool of them
+            with _evaluation_lock:
+                return evaluate_decomposed(atoms, evaluate_chunk)
+        print(f"⚠️ The model reports no per-atom energies; evaluating {len(atoms)} atoms without chunks")
+
+    with _evaluation_lock:
+        atoms.calc = calc
+        share_neighbor_list(calc, atoms)
+        energy = atoms.get_potential_energy()
+        forces = atoms.get_forces()
+    return energy, forces
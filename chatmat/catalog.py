@@ -0,0 +1,237 @@
+"""
+External material catalog for ChatMat.
+
+Large prototype catalogs (tens of thousands of entries) are stored as a
+directory of columnar NumPy arrays and opened with memory mapping, so that
+importing the catalog costs nothing and a lookup only touches the pages it
+needs. Because the pages are shared through the OS page cache, every worker
+process can open the same catalog without growing its own memory.
+
+Catalog layout (one directory):
+    catalog.json      - version, entry count, structure type names
+    keys.npy          - sorted lowercase lookup keys (fixed-width unicode)
+    names.npy         - human-readable names
+    formulas.npy      - sorted normalized formulas (see normalize_formula)
+    formula_rows.npy  - row number for each entry of formulas.npy
+    structure.npy     - structure type code (index into catalog.json "structures")
+    spacegroup.npy    - spacegroup number, 0 if not given
+    cellpar.npy       - (N, 6) cell parameters [a, b, c, alpha, beta, gamma]
+    elements.npy      - (N, max_elements) atomic numbers, zero padded
+    site_offsets.npy  - (N + 1) offsets into the Wyckoff site arrays
+    site_numbers.npy  - atomic number of every Wyckoff site
+    site_coords.npy   - (M, 3) fractional coordinates of every Wyckoff site
+
+Rows are returned as dictionaries shaped like COMPOUND_DATABASE entries.
+"""
+
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from ase.data import atomic_numbers, chemical_symbols
+
+try:
+    from . import config
+    from .build_structures import (MATERIAL_DATABASE, COMPOUND_DATABASE, parse_formula,
+                                   normalize_formula, _formula_from_key)
+except ImportError:
+    import config
+    from build_structures import (MATERIAL_DATABASE, COMPOUND_DATABASE, parse_formula,
+                                  normalize_formula, _formula_from_key)
+
+CATALOG_VERSION = 1
+
+# Structure types of the built-in databases that use a hexagonal cell
+_HEXAGONAL_STRUCTURES = {"hcp", "wurtzite", "quartz"}
+
+
+class MaterialCatalog:
+    """Read-only, memory-mapped view of a catalog directory."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "catalog.json")) as f:
+            meta = json.load(f)
+        if meta.get("version") != CATALOG_VERSION:
+            raise ValueError(f"Unsupported catalog version {meta.get('version')} in {path}")
+        self.structures: List[str] = meta["structures"]
+        self.n_entries: int = meta["n_entries"]
+
+        def column(name):
+            return np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+
+        self.keys = column("keys")
+        self.names = column("names")
+        self.formulas = column("formulas")
+        self.formula_rows = column("formula_rows")
+        self.structure = column("structure")
+        self.spacegroup = column("spacegroup")
+        self.cellpar = column("cellpar")
+        self.elements = column("elements")
+        self.site_offsets = column("site_offsets")
+        self.site_numbers = column("site_numbers")
+        self.site_coords = column("site_coords")
+
+    def __len__(self) -> int:
+        return self.n_entries
+
+    def __contains__(self, key: str) -> bool:
+        return self.find(key) is not None
+
+    def find(self, key: str) -> Optional[int]:
+        """Return the row of an exact (case-insensitive) key match, or None."""
+        key = key.lower().strip()
+        row = int(np.searchsorted(self.keys, key))
+        if row < self.n_entries and self.keys[row] == key:
+            return row
+        return None
+
+    def find_formula(self, formula: str) -> List[int]:
+        """Return all rows whose normalized formula equals `formula`, in key order."""
+        lo = int(np.searchsorted(self.formulas, formula, side="left"))
+        hi = int(np.searchsorted(self.formulas, formula, side="right"))
+        return sorted(int(r) for r in self.formula_rows[lo:hi])
+
+    def row(self, row: int) -> Dict[str, Any]:
+        """Materialize a single catalog row as a database-style dictionary."""
+        a, b, c, alpha, beta, gamma = (float(x) for x in self.cellpar[row])
+        entry: Dict[str, Any] = {
+            "key": str(self.keys[row]),
+            "name": str(self.names[row]),
+            "structure": self.structures[int(self.structure[row])],
+            "elements": [chemical_symbols[z] for z in self.elements[row] if z],
+            "a": a,
+            "cellpar": [a, b, c, alpha, beta, gamma],
+        }
+        if c != a:
+            entry["c"] = c
+        spacegroup = int(self.spacegroup[row])
+        start, stop = int(self.site_offsets[row]), int(self.site_offsets[row + 1])
+        if spacegroup and stop > start:
+            entry["spacegroup"] = spacegroup
+            entry["sites"] = [
+                (chemical_symbols[int(z)], tuple(float(x) for x in xyz))
+                for z, xyz in zip(self.site_numbers[start:stop], self.site_coords[start:stop])
+            ]
+        return entry
+
+    def lookup(self, name: str, compound: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Look up an entry by key, then by formula (from `name` or `compound`).
+
+        Returns:
+            Database-style dictionary, or None if the catalog has no match
+        """
+        row = self.find(name)
+        if row is None:
+            counts = parse_formula(name.strip())
+            if counts is None and compound and len(compound) >= 2:
+                counts = {e.strip().capitalize(): 1 for e in compound}
+            if counts:
+                rows = self.find_formula(normalize_formula(counts))
+                row = rows[0] if rows else None
+        return self.row(row) if row is not None else None
+
+
+def _default_cellpar(structure: str, a: float, c: Optional[float]) -> List[float]:
+    """Cell parameters for a database entry that only gives "a" and "c"."""
+    if structure in _HEXAGONAL_STRUCTURES:
+        return [a, a, c or a * 1.633, 90.0, 90.0, 120.0]
+    return [a, a, c or a, 90.0, 90.0, 90.0]
+
+
+def write_catalog(path: str, entries: Iterable[Tuple[str, Dict[str, Any]]]) -> int:
+    """
+    Write catalog entries to `path` in the memory-mappable column format.
+
+    Each entry is a (key, data) pair where data follows the COMPOUND_DATABASE
+    layout ("structure", "elements", "a", optional "c", "name") and may also
+    carry "cellpar", "spacegroup", "sites" [(symbol, (x, y, z)), ...] and
+    "formula".
+
+    Returns:
+        Number of entries written
+    """
+    rows = sorted(((key.lower().strip(), data) for key, data in entries), key=lambda kv: kv[0])
+    n = len(rows)
+    max_elements = max((len(data["elements"]) for _, data in rows), default=1)
+
+    structures: List[str] = []
+    structure_codes = np.zeros(n, dtype=np.int16)
+    spacegroups = np.zeros(n, dtype=np.int16)
+    cellpars = np.zeros((n, 6), dtype=np.float64)
+    elements = np.zeros((n, max_elements), dtype=np.uint8)
+    site_offsets = np.zeros(n + 1, dtype=np.int64)
+    site_numbers: List[int] = []
+    site_coords: List[Tuple[float, float, float]] = []
+    formulas: List[str] = []
+
+    for i, (key, data) in enumerate(rows):
+        if data["structure"] not in structures:
+            structures.append(data["structure"])
+        structure_codes[i] = structures.index(data["structure"])
+        cellpars[i] = data.get("cellpar") or _default_cellpar(data["structure"], data["a"], data.get("c"))
+        elements[i, :len(data["elements"])] = [atomic_numbers[e] for e in data["elements"]]
+        for symbol, xyz in data.get("sites", []):
+            site_numbers.append(atomic_numbers[symbol])
+            site_coords.append(tuple(xyz))
+        site_offsets[i + 1] = len(site_numbers)
+        spacegroups[i] = data.get("spacegroup", 0) if data.get("sites") else 0
+        counts = parse_formula(data["formula"]) if data.get("formula") else None
+        formulas.append(normalize_formula(counts or _formula_from_key(key, data["elements"])))
+
+    keys = np.array([key for key, _ in rows], dtype=str)
+    formula_array = np.array(formulas, dtype=str)
+    formula_order = np.argsort(formula_array, kind="stable")
+
+    os.makedirs(path, exist_ok=True)
+    columns = {
+        "keys": keys,
+        "names": np.array([data.get("name", key) for key, data in rows], dtype=str),
+        "formulas": formula_array[formula_order],
+        "formula_rows": formula_order.astype(np.int64),
+        "structure": structure_codes,
+        "spacegroup": spacegroups,
+        "cellpar": cellpars,
+        "elements": elements,
+        "site_offsets": site_offsets,
+        "site_numbers": np.array(site_numbers, dtype=np.uint8),
+        "site_coords": np.array(site_coords, dtype=np.float64).reshape(-1, 3),
+    }
+    for name, array in columns.items():
+        np.save(os.path.join(path, f"{name}.npy"), array)
+    with open(os.path.join(path, "catalog.json"), "w") as f:
+        json.dump({"version": CATALOG_VERSION, "n_entries": n, "structures": structures}, f)
+    return n
+
+
+def export_builtin_catalog(path: str) -> int:
+    """Write MATERIAL_DATABASE and COMPOUND_DATABASE as a catalog (useful as a seed or for tests)."""
+    entries = [(key, {**data, "elements": [key.capitalize()]}) for key, data in MATERIAL_DATABASE.items()]
+    entries += list(COMPOUND_DATABASE.items())
+    return write_catalog(path, entries)
+
+
+_catalog: Optional[MaterialCatalog] = None
+_catalog_path: Optional[str] = None
+
+
+def get_catalog(path: Optional[str] = None) -> Optional[MaterialCatalog]:
+    """
+    Return the process-wide catalog, opening it on first use.
+
+    Args:
+        path: Catalog directory (default: CHATMAT_CATALOG)
+
+    Returns:
+        MaterialCatalog, or None if no catalog is configured
+    """
+    global _catalog, _catalog_path
+    path = path or config.CATALOG
+    if not path:
+        return None
+    if _catalog is None or _catalog_path != path:
+        _catalog = MaterialCatalog(path)
+        _catalog_path = path
+    return _catalog
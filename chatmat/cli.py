@@ -0,0 +1,386 @@
+"""
+Command-line interface for ChatMat.
+
+    python -m chatmat screen Si Cu NaCl GaN --dims 2,2,2 --output results.csv
+    python -m chatmat screen --csv materials.csv --output results.parquet --processes 16
+    python -m chatmat import-cod 1000041 9008565 --ids-file cod_ids.txt --processes 8
+    python -m chatmat import-mp mp-149 mp-13 --ids-file mp_ids.txt
+
+`screen` builds many structures in a process pool, a chunk of tasks per
+pool task, evaluates them with the resident calculator in the main process
+and streams the results to CSV (or Parquet, if pyarrow is installed) batch
+by batch. Tasks that already have an "ok" row in the output are skipped, so
+an interrupted run resumes where it stopped; failed tasks (timeouts, out of
+memory, ...) are tried again and get a new row.
+
+The CSV input has a header with the columns name, structure_type, a, dims
+and optionally compound (e.g. "Na Cl") and source_type (mp, cod, ...);
+dims are written as "2x2x2" or "2,2,2". Empty cells use the defaults.
+
+`import-cod` downloads (or reads from --dir) COD CIFs, normalizes them and
+writes them to the structure store in CHATMAT_CACHE_DIR; see cod_import.py.
+`import-mp` does the same for Materials Project ids with batched queries
+(mp_import.py). `screen` fetches the Materials Project entries of its tasks
+this way before building them.
+"""
+
+import argparse
+import contextlib
+import csv
+import glob
+import io
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+import numpy as np
+
+try:
+    from . import config
+except ImportError:
+    import config
+
+RESULT_FIELDS = ["id", "name", "structure_type", "a", "dims", "source_type", "status", "n_atoms",
+                 "energy", "energy_per_atom", "max_force", "build_s", "eval_s", "error"]
+
+
+# --- Inputs ---
+def parse_dims(value: Optional[str], default: List[int]) -> List[int]:
+    if not value:
+        return list(default)
+    parts = value.replace("x", ",").replace(" ", ",").split(",")
+    dims = [int(p) for p in parts if p]
+    if len(dims) != 3:
+        raise ValueError(f"Supercell dims must have 3 entries, got '{value}'")
+    return dims
+
+
+def read_tasks(names: List[str], csv_path: Optional[str], dims: List[int]) -> List[Dict[str, Any]]:
+    """Screening tasks from material names and/or a CSV file."""
+    rows = [{"name": name} for name in names]
+    if csv_path:
+        with open(csv_path, newline="") as f:
+            rows += [{k.strip(): (v or "").strip() for k, v in row.items() if k} for row in csv.DictReader(f)]
+
+    tasks = []
+    for row in rows:
+        task = {
+            "name": row["name"],
+            "structure_type": row.get("structure_type") or None,
+            "a": float(row["a"]) if row.get("a") else None,
+            "dims": parse_dims(row.get("dims"), dims),
+            "compound": row.get("compound", "").replace(",", " ").split() or None,
+            "source_type": row.get("source_type") or None,
+        }
+        task["id"] = "|".join(str(task[k]) for k in ("name", "structure_type", "a", "dims", "compound", "source_type"))
+        tasks.append(task)
+    return tasks
+
+
+# --- Building (runs in worker processes) ---
+def build_chunk(tasks: List[Dict[str, Any]]) -> List[tuple]:
+    """Build the structures of several tasks in one pool task (less pickling and scheduling per structure)."""
+    return [build_task(task) for task in tasks]
+
+
+def build_task(task: Dict[str, Any]):
+    """Build the structure of one task; returns (atoms, None, seconds) or (None, error, seconds)."""
+    try:
+        from .build_structures import create_structure, get_structure
+    except ImportError:
+        from build_structures import create_structure, get_structure
+
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            if task["source_type"] and task["source_type"] != "auto":
+                atoms = get_structure(task["name"], source_type=task["source_type"], dims=task["dims"])
+            else:
+                atoms = create_structure(task["name"], task["dims"], structure_type=task["structure_type"],
+                                         lattice_param=task["a"], compound=task["compound"])
+        return atoms, None, time.perf_counter() - start
+    except Exception as e:
+        return None, getattr(e, "detail", None) or str(e) or type(e).__name__, time.perf_counter() - start
+
+
+# --- Output ---
+class ResultWriter:
+    """Appends result rows to a CSV file, or to part files of a Parquet dataset directory."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.parquet = path.endswith(".parquet")
+        if self.parquet:
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise SystemExit("❌ Parquet output needs pyarrow (pip install pyarrow); use a .csv output instead.")
+            os.makedirs(path, exist_ok=True)
+
+    def done_ids(self) -> Set[str]:
+        """IDs of tasks that already have a successful result (for resuming); failed ones are retried."""
+        if self.parquet:
+            import pyarrow.parquet as pq
+            ids = set()
+            for part in glob.glob(os.path.join(self.path, "part-*.parquet")):
+                table = pq.read_table(part, columns=["id", "status"]).to_pydict()
+                ids.update(i for i, status in zip(table["id"], table["status"]) if status == "ok")
+            return ids
+        if not os.path.exists(self.path):
+            return set()
+        with open(self.path, newline="") as f:
+            return {row["id"] for row in csv.DictReader(f) if row["status"] == "ok"}
+
+    def write(self, rows: List[Dict[str, Any]]) -> None:
+        if not rows:
+            return
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pylist([{k: row.get(k) for k in RESULT_FIELDS} for row in rows])
+            part = len(glob.glob(os.path.join(self.path, "part-*.parquet")))
+            pq.write_table(table, os.path.join(self.path, f"part-{part:06d}.parquet"))
+            return
+        new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        with open(self.path, "a", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS, extrasaction="ignore")
+            if new_file:
+                writer.writeheader()
+            writer.writerows(rows)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+# --- Screening ---
+def _result_row(task: Dict[str, Any], **fields) -> Dict[str, Any]:
+    row = {k: task[k] for k in ("id", "name", "structure_type", "a", "source_type")}
+    row["dims"] = "x".join(str(n) for n in task["dims"])
+    row.update(fields)
+    return row
+
+
+def _built(tasks: List[Dict[str, Any]], processes: int, chunk_size: int = 8) -> Iterator[tuple]:
+    """Yield (task, atoms, error, build_s) as chunks of structures finish building, keeping the pool bounded."""
+    if processes <= 1:
+        for task in tasks:
+            yield (task,) + build_task(task)
+        return
+    chunk_size = max(1, chunk_size)
+    chunks = (tasks[start:start + chunk_size] for start in range(0, len(tasks), chunk_size))
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        pending = {}
+        for chunk in chunks:
+            pending[pool.submit(build_chunk, chunk)] = chunk
+            if len(pending) >= 2 * processes:
+                break
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                chunk = pending.pop(future)
+                for task, built in zip(chunk, future.result()):
+                    yield (task,) + built
+                for next_chunk in chunks:
+                    pending[pool.submit(build_chunk, next_chunk)] = next_chunk
+                    break
+
+
+def screen(tasks: List[Dict[str, Any]], writer: ResultWriter, processes: int = 1, batch_size: int = 32,
+           resume: bool = True, chunk_size: int = 8) -> Dict[str, int]:
+    """
+    Build, evaluate and write results for all tasks.
+
+    Structures are evaluated one by one: the calculator takes a single
+    structure per call, and the model is resident in this process only.
+
+    Returns:
+        Counts of "ok", "failed" and "skipped" (already in the output) tasks,
+        and of "duplicates" (input rows repeating an earlier task)
+    """
+    try:
+        from .calculators import evaluate
+    except ImportError:
+        from calculators import evaluate
+
+    # The same row twice in the input is screened once
+    unique = list({task["id"]: task for task in tasks}.values())
+    done = writer.done_ids() if resume else set()
+    todo = [task for task in unique if task["id"] not in done]
+    _prefetch_mp(todo)
+    counts = {"ok": 0, "failed": 0, "skipped": len(unique) - len(todo), "duplicates": len(tasks) - len(unique)}
+    if counts["duplicates"]:
+        print(f"⏭️  Ignoring {counts['duplicates']} duplicate task(s) in the input", file=sys.stderr)
+    if counts["skipped"]:
+        print(f"⏭️  Skipping {counts['skipped']} task(s) already in {writer.path}", file=sys.stderr)
+
+    start = time.perf_counter()
+    batch: List[Dict[str, Any]] = []
+    for task, atoms, error, build_s in _built(todo, processes, chunk_size):
+        if atoms is None:
+            batch.append(_result_row(task, status="failed", error=error, build_s=build_s))
+            counts["failed"] += 1
+        else:
+            eval_start = time.perf_counter()
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    energy, forces = evaluate(atoms)
+                n_atoms = len(atoms)
+                batch.append(_result_row(
+                    task, status="ok", n_atoms=n_atoms, energy=float(energy),
+                    energy_per_atom=float(energy) / n_atoms,
+                    max_force=float(np.linalg.norm(forces, axis=1).max()) if n_atoms else 0.0,
+                    build_s=build_s, eval_s=time.perf_counter() - eval_start))
+                counts["ok"] += 1
+            except Exception as e:
+                batch.append(_result_row(task, status="failed", error=str(e) or type(e).__name__,
+                                         build_s=build_s, eval_s=time.perf_counter() - eval_start))
+                counts["failed"] += 1
+
+        if len(batch) >= batch_size:
+            writer.write(batch)
+            batch = []
+            _progress(counts, len(todo), start)
+    writer.write(batch)
+    _progress(counts, len(todo), start)
+    return counts
+
+
+def _prefetch_mp(tasks: List[Dict[str, Any]]) -> None:
+    """Fetch the Materials Project entries of all tasks in batches, instead of one request per task."""
+    ids = sorted({task["name"] for task in tasks if task["source_type"] == "mp"})
+    if len(ids) < 2:
+        return
+    try:
+        from .mp_import import fetch_materials_project
+    except ImportError:
+        from mp_import import fetch_materials_project
+    try:
+        reports = fetch_materials_project(ids)
+    except Exception as e:
+        # The tasks fetch their entries one by one (and report failures) instead
+        print(f"⚠️ Batched Materials Project fetch failed: {e}", file=sys.stderr)
+        return
+    fetched = sum(report["status"] == "ok" for report in reports)
+    print(f"📥 Fetched {fetched} Materials Project structure(s) in batches", file=sys.stderr)
+
+
+def _progress(counts: Dict[str, int], total: int, start: float) -> None:
+    finished = counts["ok"] + counts["failed"]
+    elapsed = time.perf_counter() - start
+    rate = finished / elapsed if elapsed > 0 else 0.0
+    eta = (total - finished) / rate if rate > 0 else float("nan")
+    print(f"📊 {finished}/{total} done ({counts['failed']} failed), {rate:.1f}/s, "
+          f"elapsed {elapsed:.0f} s, ETA {eta:.0f} s", file=sys.stderr)
+
+
+# --- Imports into the structure store ---
+def _read_ids(args, parser) -> List[str]:
+    if not config.CACHE_DIR:
+        parser.error(f"{args.command} needs CHATMAT_CACHE_DIR, where the structure store is kept")
+    ids = list(args.ids)
+    if args.ids_file:
+        with open(args.ids_file) as f:
+            ids += [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    return ids
+
+
+def _summarize(reports: List[Dict[str, Any]], name: str, start: float) -> int:
+    counts = {"ok": 0, "skipped": 0, "error": 0}
+    for report in reports:
+        counts[report["status"]] += 1
+        if report["status"] == "error":
+            print(f"❌ {report[name]}: {report['error']}", file=sys.stderr)
+    print(f"✅ Imported {counts['ok']}, skipped {counts['skipped']}, failed {counts['error']} "
+          f"in {time.perf_counter() - start:.1f} s", file=sys.stderr)
+    return 0 if counts["error"] == 0 else 1
+
+
+def import_cod_command(args, parser) -> int:
+    try:
+        from .cod_import import import_cod
+    except ImportError:
+        from cod_import import import_cod
+
+    ids = _read_ids(args, parser)
+    if not ids and not args.dir:
+        parser.error("import-cod needs COD ids, --ids-file or --dir")
+    start = time.perf_counter()
+    reports = import_cod(ids, args.dir, processes=args.processes, concurrency=args.concurrency,
+                         skip_existing=not args.refetch)
+    return _summarize(reports, "source", start)
+
+
+def import_mp_command(args, parser) -> int:
+    try:
+        from .mp_import import fetch_materials_project
+    except ImportError:
+        from mp_import import fetch_materials_project
+
+    ids = _read_ids(args, parser)
+    if not ids:
+        parser.error("import-mp needs material ids or --ids-file")
+    start = time.perf_counter()
+    reports = fetch_materials_project(ids, batch_size=min(args.batch_size, 1000), processes=args.processes,
+                                      skip_existing=not args.refetch, rate=args.rate)
+    return _summarize(reports, "material_id", start)
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="chatmat", description="ChatMat command-line tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    screen_parser = commands.add_parser("screen", help="Build and evaluate many structures")
+    screen_parser.add_argument("materials", nargs="*", help="Material names (e.g. Si Cu NaCl)")
+    screen_parser.add_argument("--csv", help="CSV with name, structure_type, a, dims[, compound, source_type]")
+    screen_parser.add_argument("--dims", default="1,1,1", help="Default supercell dims (e.g. 2,2,2)")
+    screen_parser.add_argument("--output", "-o", default="screen_results.csv",
+                               help="Output .csv file or .parquet dataset directory")
+    screen_parser.add_argument("--processes", "-j", type=int, default=os.cpu_count() or 1,
+                               help="Processes building structures (default: all cores)")
+    screen_parser.add_argument("--batch-size", type=int, default=32, help="Results written per batch")
+    screen_parser.add_argument("--chunk-size", type=int, default=8, help="Structures built per pool task")
+    screen_parser.add_argument("--no-resume", action="store_true",
+                               help="Recompute tasks that already have an ok row in the output")
+    screen_parser.add_argument("--model", help="Model name (default: CHATMAT_MODEL; 'mock' for testing)")
+    screen_parser.add_argument("--device", help="Model device (default: CHATMAT_DEVICE)")
+
+    import_parser = commands.add_parser("import-cod", help="Import COD structures into the structure store")
+    import_parser.add_argument("ids", nargs="*", help="COD ids (e.g. 1000041 cod-9008565)")
+    import_parser.add_argument("--ids-file", help="File with one COD id per line")
+    import_parser.add_argument("--dir", help="Directory with <id>.cif files (searched recursively)")
+    import_parser.add_argument("--processes", "-j", type=int, default=os.cpu_count() or 1,
+                               help="Processes parsing CIFs (default: all cores)")
+    import_parser.add_argument("--concurrency", type=int, default=8, help="Simultaneous downloads")
+    import_parser.add_argument("--refetch", action="store_true", help="Import entries that are already stored")
+
+    mp_parser = commands.add_parser("import-mp", help="Import Materials Project structures into the structure store")
+    mp_parser.add_argument("ids", nargs="*", help="Material ids (e.g. mp-149 mp-13)")
+    mp_parser.add_argument("--ids-file", help="File with one material id per line")
+    mp_parser.add_argument("--batch-size", type=int, default=100, help="Ids per query (at most 1000)")
+    mp_parser.add_argument("--processes", "-j", type=int, default=1, help="Processes converting structures")
+    mp_parser.add_argument("--rate", type=float, help="Requests per second (default: CHATMAT_MP_RATE_LIMIT)")
+    mp_parser.add_argument("--refetch", action="store_true", help="Import entries that are already stored")
+
+    args = parser.parse_args(argv)
+    if args.command == "import-cod":
+        return import_cod_command(args, parser)
+    if args.command == "import-mp":
+        return import_mp_command(args, parser)
+    if args.command == "screen":
+        if args.model:
+            config.MODEL_NAME = args.model
+        if args.device:
+            config.DEVICE = args.device
+        tasks = read_tasks(args.materials, args.csv, parse_dims(args.dims, [1, 1, 1]))
+        if not tasks:
+            parser.error("screen needs material names or --csv")
+        writer = ResultWriter(args.output)
+        print(f"🔬 Screening {len(tasks)} structure(s) with {args.processes} build process(es) "
+              f"-> {args.output}", file=sys.stderr)
+        counts = screen(tasks, writer, args.processes, args.batch_size, resume=not args.no_resume,
+                        chunk_size=args.chunk_size)
+        print(f"✅ Done: {counts['ok']} ok, {counts['failed']} failed, {counts['skipped']} skipped, "
+              f"{counts['duplicates']} duplicate(s)", file=sys.stderr)
+        return 0 if counts["failed"] == 0 else 1
+    return 0
@@ -0,0 +1,253 @@
+"""
+Bulk import of Crystallography Open Database (COD) structures.
+
+    import_cod(ids=[1000041, 9008565], processes=8)
+    import_cod(directory="cod/cif")           # a local COD mirror, <id>.cif files
+
+Entries are processed in batches. The CIFs of a batch are downloaded by a
+bounded pool of threads (or read from the directory) and handed to a process
+pool as they arrive. There they are parsed and normalized, and the results
+are written to the structure store (cache.structure_cache, key "cod:<id>"),
+where get_structure() and /calculate/ find them without downloading again.
+
+Normalization makes every stored structure an ordered, periodic unit cell:
+    - partial occupancies are resolved: each site keeps its majority species,
+      and sites that are mostly vacant are dropped
+    - the cell is rotated into the standard orientation (a along x, b in the
+      xy plane); the lattice vectors the CIF chose are kept, so supercell
+      dimensions keep their meaning
+    - positions are wrapped into the cell
+    - CIF bookkeeping arrays (spacegroup_kinds) are removed
+
+Every id or file gets a report entry with "status" "ok", "skipped" (already
+stored) or "error" and the reason, so one bad CIF does not stop an import.
+"""
+
+import glob
+import io
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+from ase import Atoms
+from ase.data import atomic_numbers
+
+try:
+    from . import config
+    from .cache import SharedCache, structure_cache
+    from .compact import composition
+except ImportError:
+    import config
+    from cache import SharedCache, structure_cache
+    from compact import composition
+
+_session = threading.local()
+
+
+def canonical_cod_id(value: Union[str, int]) -> str:
+    """
+    COD id without prefix or zero padding ("cod-001000041" -> "1000041").
+
+    Raises:
+        ValueError: If value is not a COD id
+    """
+    text = str(value).strip().lower()
+    if text.startswith("cod-"):
+        text = text[4:]
+    if not text.isdigit():
+        raise ValueError(f"'{value}' is not a COD id")
+    return str(int(text))
+
+
+def cod_url(cod_id: Union[str, int]) -> str:
+    return f"{config.COD_URL.rstrip('/')}/{canonical_cod_id(cod_id).zfill(7)}.cif"
+
+
+def normalize_structure(atoms: Atoms) -> Atoms:
+    """
+    Ordered, wrapped, standard-oriented copy of a structure read from a CIF.
+
+    Returns:
+        A new Atoms with info["partial_sites"] (sites that had partial or mixed
+        occupancy) and info["dropped_sites"] (of those, the mostly vacant ones)
+    """
+    occupancy = atoms.info.get("occupancy") or {}
+    kinds = atoms.arrays.get("spacegroup_kinds")
+    numbers = atoms.numbers.copy()
+    keep = np.ones(len(atoms), dtype=bool)
+    partial = 0
+    if occupancy and kinds is not None:
+        symbols = atoms.get_chemical_symbols()
+        for index, kind in enumerate(kinds):
+            site = occupancy.get(str(kind)) or {symbols[index]: 1.0}
+            if len(site) == 1 and next(iter(site.values())) >= 1.0 - 1e-3:
+                continue
+            partial += 1
+            species, fraction = max(site.items(), key=lambda item: item[1])
+            if 1.0 - sum(site.values()) > fraction:
+                keep[index] = False
+            else:
+                numbers[index] = atomic_numbers[species]
+
+    cell, _ = atoms.cell.standard_form()
+    normalized = Atoms(numbers=numbers[keep], cell=atoms.cell, pbc=True,
+                       scaled_positions=atoms.get_scaled_positions(wrap=True)[keep])
+    normalized.set_cell(cell, scale_atoms=True)
+    normalized.wrap()
+
+    spacegroup = atoms.info.get("spacegroup")
+    normalized.info = {"partial_sites": partial, "dropped_sites": int((~keep).sum())}
+    if spacegroup is not None:
+        normalized.info["spacegroup"] = int(getattr(spacegroup, "no", spacegroup))
+    return normalized
+
+
+def parse_cif(source: str, cod_id: Optional[str] = None,
+              is_path: bool = False) -> Tuple[Optional[Atoms], Optional[str]]:
+    """
+    Parse and normalize one CIF (text, or a path if is_path). Runs in the worker processes.
+
+    Returns:
+        (atoms, None) or (None, error message)
+    """
+    from ase.io import read
+    try:
+        atoms = read(source if is_path else io.StringIO(source), format="cif")
+        if len(atoms) == 0:
+            return None, "CIF contains no atoms"
+        atoms = normalize_structure(atoms)
+        if len(atoms) == 0:
+            return None, "No fully occupied sites"
+        if cod_id is not None:
+            atoms.info["cod_id"] = cod_id
+        return atoms, None
+    except Exception as e:
+        return None, f"Could not parse CIF: {str(e) or type(e).__name__}"
+
+
+def _download(cod_id: str, timeout: float, session=None) -> Tuple[Optional[str], Optional[str]]:
+    """(CIF text, None) or (None, error) for one COD entry; one pooled session per thread unless given one."""
+    if session is None:
+        import requests
+
+        session = getattr(_session, "session", None)
+        if session is None:
+            session = _session.session = requests.Session()
+    try:
+        response = session.get(cod_url(cod_id), timeout=timeout)
+    except Exception as e:  # requests.RequestException, or the given session's transport errors
+        return None, f"Download failed: {e}"
+    if response.status_code != 200:
+        return None, f"HTTP {response.status_code} from COD"
+    return response.text, None
+
+
+def _items(ids: Optional[Iterable[Union[str, int]]], directory: Optional[str]) -> List[Dict[str, Any]]:
+    items = []
+    for value in ids or []:
+        try:
+            items.append({"cod_id": canonical_cod_id(value), "source": str(value)})
+        except ValueError as e:
+            items.append({"cod_id": None, "source": str(value), "error": str(e)})
+    if directory:
+        if not os.path.isdir(directory):
+            raise FileNotFoundError(f"No such directory: {directory}")
+        for path in sorted(glob.glob(os.path.join(directory, "**", "*.cif"), recursive=True)):
+            stem = os.path.splitext(os.path.basename(path))[0]
+            try:
+                items.append({"cod_id": canonical_cod_id(stem), "source": path, "path": path})
+            except ValueError:
+                items.append({"cod_id": None, "source": path, "error": "File name is not a COD id (<id>.cif)"})
+    return items
+
+
+def _report(item: Dict[str, Any], atoms: Optional[Atoms] = None, error: Optional[str] = None,
+            status: Optional[str] = None) -> Dict[str, Any]:
+    entry = {"cod_id": item["cod_id"], "source": item["source"], "status": status or ("error" if error else "ok")}
+    if atoms is not None:
+        entry.update(n_atoms=len(atoms), formula=composition(atoms),
+                     partial_sites=atoms.info["partial_sites"], dropped_sites=atoms.info["dropped_sites"])
+    if error:
+        entry["error"] = error
+    return entry
+
+
+def import_cod(ids: Optional[Iterable[Union[str, int]]] = None, directory: Optional[str] = None,
+               processes: int = 1, concurrency: int = 8, batch_size: int = 256,
+               skip_existing: bool = True, timeout: float = 30.0,
+               store: Optional[SharedCache] = None, session=None) -> List[Dict[str, Any]]:
+    """
+    Fetch or read, parse, normalize and store COD structures.
+
+    Args:
+        ids: COD ids to download (from CHATMAT_COD_URL)
+        directory: Directory searched recursively for <id>.cif files
+        processes: Parser processes (1 parses in this process)
+        concurrency: Simultaneous downloads
+        batch_size: Entries in flight at once, which bounds memory
+        skip_existing: Do not fetch entries that are already stored
+        timeout: Seconds per download
+        store: Structure store (default: cache.structure_cache)
+        session: HTTP session with the requests API, shared by the download
+            threads (default: one requests.Session per thread)
+
+    Returns:
+        One report entry per id or file, in input order
+    """
+    store = store if store is not None else structure_cache
+    items = _items(ids, directory)
+    reports: List[Optional[Dict[str, Any]]] = [None] * len(items)
+    pool = ProcessPoolExecutor(max_workers=processes) if processes > 1 else None
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as downloads:
+            for start in range(0, len(items), batch_size):
+                _import_batch(items, range(start, min(start + batch_size, len(items))), reports,
+                              store, skip_existing, downloads, pool, timeout, session)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return reports
+
+
+def _import_batch(items, indices, reports, store, skip_existing, downloads, pool, timeout, session) -> None:
+    stored, parsing = [], {}
+
+    def finish(index: int, atoms: Optional[Atoms], error: Optional[str]) -> None:
+        reports[index] = _report(items[index], atoms, error)
+        if atoms is not None:
+            stored.append((f"cod:{items[index]['cod_id']}", atoms))
+
+    def parse(index: int, source: str, is_path: bool) -> None:
+        args = (source, items[index]["cod_id"], is_path)
+        if pool is None:
+            finish(index, *parse_cif(*args))
+        else:
+            parsing[pool.submit(parse_cif, *args)] = index
+
+    fetching = {}
+    for index in indices:
+        item = items[index]
+        if "error" in item:
+            reports[index] = _report(item, error=item["error"])
+        elif skip_existing and f"cod:{item['cod_id']}" in store:
+            reports[index] = _report(item, status="skipped")
+        elif "path" in item:
+            parse(index, item["path"], True)
+        else:
+            fetching[downloads.submit(_download, item["cod_id"], timeout, session)] = index
+
+    # CIFs go to the parsers as soon as they are downloaded
+    for future in as_completed(fetching):
+        index = fetching[future]
+        text, error = future.result()
+        if error:
+            reports[index] = _report(items[index], error=error)
+        else:
+            parse(index, text, False)
+    while parsing:
+        finished, _ = wait(parsing, return_when=FIRST_COMPLETED)
+        for future in finished:
+            finish(parsing.pop(future), *future.result())
+    store.set_many(stored)
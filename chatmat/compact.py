@@ -0,0 +1,111 @@
+"""
+Lightweight structure container for the in-service pipeline.
+
+ASE Atoms objects are convenient but carry per-object overhead, copy all of
+their arrays when tiled with `atoms * dims` (one Python-level copy per
+repeat), and make it tempting to build per-atom symbol string lists just
+for logging. CompactStructure keeps only what the pipeline needs, as
+contiguous NumPy arrays:
+
+    numbers    (N,) int atomic numbers
+    positions  (N, 3) float Cartesian positions in A
+    cell       (3, 3) float cell vectors
+    pbc        (3,) bool periodic boundary conditions
+
+from_atoms() and to_atoms() share the numbers and positions arrays instead
+of copying them, so converting at the model boundary is free. Editing one
+side in place is therefore visible on the other.
+"""
+
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+from ase import Atoms
+from ase.data import chemical_symbols
+
+try:
+    from .symmetry import mark_supercell
+except ImportError:
+    from symmetry import mark_supercell
+
+
+class CompactStructure:
+    """Atomic numbers, positions, cell and pbc as contiguous NumPy arrays."""
+
+    __slots__ = ("numbers", "positions", "cell", "pbc", "info")
+
+    def __init__(self, numbers, positions, cell, pbc=True, info: Optional[dict] = None):
+        self.numbers = np.ascontiguousarray(numbers, dtype=int)
+        self.positions = np.ascontiguousarray(positions, dtype=float).reshape(-1, 3)
+        self.cell = np.ascontiguousarray(cell, dtype=float).reshape(3, 3)
+        self.pbc = np.broadcast_to(np.asarray(pbc, dtype=bool), (3,)).copy()
+        self.info = info if info is not None else {}
+        if len(self.numbers) != len(self.positions):
+            raise ValueError(f"{len(self.numbers)} atomic numbers but {len(self.positions)} positions")
+
+    def __len__(self) -> int:
+        return len(self.numbers)
+
+    def __repr__(self) -> str:
+        return f"CompactStructure({self.formula()}, pbc={self.pbc.tolist()})"
+
+    @classmethod
+    def from_atoms(cls, atoms: Atoms) -> "CompactStructure":
+        """View atoms without copying its numbers and positions (other per-atom arrays are dropped)."""
+        return cls(atoms.arrays["numbers"], atoms.arrays["positions"], atoms.cell.array, atoms.pbc,
+                   dict(atoms.info))
+
+    def to_atoms(self) -> Atoms:
+        """Atoms sharing this structure's numbers and positions arrays."""
+        atoms = Atoms(cell=self.cell, pbc=self.pbc, info=dict(self.info))
+        atoms.arrays = {"numbers": self.numbers, "positions": self.positions}
+        return atoms
+
+    def copy(self) -> "CompactStructure":
+        return CompactStructure(self.numbers.copy(), self.positions.copy(), self.cell.copy(), self.pbc,
+                                dict(self.info))
+
+    def repeat(self, dims: Iterable[int]) -> "CompactStructure":
+        """
+        Tile the structure into a (n1, n2, n3) supercell.
+
+        Atoms are ordered like `atoms * dims` in ASE (one copy of the cell per
+        (m0, m1, m2), m2 fastest), so the result can be evaluated through its
+        unit cell (see symmetry.unit_cell_of).
+        """
+        dims = tuple(int(n) for n in dims)
+        offsets = np.indices(dims).reshape(3, -1).T @ self.cell
+        positions = (offsets[:, None, :] + self.positions[None, :, :]).reshape(-1, 3)
+        numbers = np.tile(self.numbers, len(offsets))
+        cell = self.cell * np.asarray(dims, dtype=float)[:, None]
+        return CompactStructure(numbers, positions, cell, self.pbc, dict(self.info))
+
+    def species_counts(self) -> Dict[str, int]:
+        """Number of atoms of each element, without building a per-atom symbol list."""
+        values, counts = np.unique(self.numbers, return_counts=True)
+        return {chemical_symbols[z]: int(n) for z, n in zip(values, counts)}
+
+    def formula(self) -> str:
+        """Composition such as 'Cl108 Na108' (elements in alphabetical order)."""
+        return " ".join(f"{symbol}{n}" for symbol, n in sorted(self.species_counts().items())) or "empty"
+
+
+def supercell(atoms: Atoms, dims: Iterable[int]) -> Atoms:
+    """
+    Equivalent to `mark_supercell(atoms * tuple(dims), dims)`, tiled in one vectorized step.
+
+    Structures with per-atom data beyond numbers and positions (tags, magnetic
+    moments, CIF site labels, constraints) are tiled by ASE so that nothing
+    is lost.
+    """
+    dims = [int(n) for n in dims]
+    if set(atoms.arrays) != {"numbers", "positions"} or atoms.constraints or atoms.calc is not None:
+        return mark_supercell(atoms * tuple(dims), dims)
+    return mark_supercell(CompactStructure.from_atoms(atoms).repeat(dims).to_atoms(), dims)
+
+
+def composition(atoms) -> str:
+    """Composition of Atoms or a CompactStructure, for logging."""
+    if not isinstance(atoms, CompactStructure):
+        atoms = CompactStructure.from_atoms(atoms)
+    return atoms.formula()
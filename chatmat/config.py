@@ -0,0 +1,107 @@
+"""
+Runtime configuration for ChatMat.
+
+All settings are read from environment variables when the module is first
+imported, so they can be set in the shell, in run_backend.sh or by a process
+manager. Modules read them as `config.<NAME>` at call time, which also lets
+tests override a value with a simple assignment.
+"""
+
+import os
+from typing import List
+
+
+def _env_list(name: str, default: str) -> List[str]:
+    """Comma-separated environment variable as a list of lowercase items."""
+    value = os.getenv(name, default)
+    return [item.strip().lower() for item in value.split(",") if item.strip()]
+
+
+# --- Foundation model ---
+# Model file passed to iann's foundation_model(), or "mock" for the random test model
+MODEL_NAME = os.getenv("CHATMAT_MODEL", "painn_oc.pt")
+DEVICE = os.getenv("CHATMAT_DEVICE", "cpu")  # use "cuda" for GPU
+# Verlet neighbor lists shared with the calculator across evaluations of one topology (see neighbors.py).
+# Opt-in: only calculators with a set_neighbor_list() method use them, and iann's MLCalculator has none
+NEIGHBOR_LISTS = os.getenv("CHATMAT_NEIGHBOR_LISTS", "0").lower() not in ("0", "false", "no")
+NEIGHBOR_CUTOFF = float(os.getenv("CHATMAT_NEIGHBOR_CUTOFF", "6.0"))  # A, the model's radial cutoff
+NEIGHBOR_SKIN = float(os.getenv("CHATMAT_NEIGHBOR_SKIN", "0.5"))  # A; 0 disables the shared lists
+NEIGHBOR_CACHE_SIZE = int(os.getenv("CHATMAT_NEIGHBOR_CACHE_SIZE", "32"))  # topologies kept per process
+
+# --- External services ---
+# Base URLs, overridable to point at mirrors or the local stand-ins in benchmarks/mock_servers.py
+COD_URL = os.getenv("CHATMAT_COD_URL", "http://www.crystallography.net/cod")
+MP_ENDPOINT = os.getenv("CHATMAT_MP_ENDPOINT")  # None = mp-api default endpoint
+MP_RATE_LIMIT = float(os.getenv("CHATMAT_MP_RATE_LIMIT", "5"))  # bulk fetch requests per second (0 = unlimited)
+OLLAMA_URL = os.getenv("CHATMAT_OLLAMA_URL", "http://localhost:11434")
+# Directory of a memory-mapped material catalog (see catalog.py), consulted after the built-in databases
+CATALOG = os.getenv("CHATMAT_CATALOG")
+
+# Evaluate perfect supercells through their unit cell (energy scaled, forces tiled)
+SYMMETRY_REDUCTION = os.getenv("CHATMAT_SYMMETRY_REDUCTION", "1").lower() not in ("0", "false", "no")
+
+# --- Startup ---
+# Warm-up steps run before /health reports ready: "imports", "structures", "model"
+WARMUP = _env_list("CHATMAT_WARMUP", "imports,structures,model")
+
+# --- Caches ---
+# Directory of the SQLite file shared by all worker processes (memory-only if unset)
+CACHE_DIR = os.getenv("CHATMAT_CACHE_DIR")
+CACHE_SIZE = int(os.getenv("CHATMAT_CACHE_SIZE", "256"))  # entries kept in memory per process
+# Directory of the append-only store of computed structures and results (disabled if unset)
+RESULTS_DIR = os.getenv("CHATMAT_RESULTS_DIR")
+# Reuse results of equivalent structures requested under another name, source, cell,
+# atom order or origin (see fingerprint.py)
+DEDUP = os.getenv("CHATMAT_DEDUP", "1").lower() not in ("0", "false", "no")
+DEDUP_TOLERANCE = float(os.getenv("CHATMAT_DEDUP_TOLERANCE", "0.01"))  # A, on neighbor distances
+DEDUP_MAX_ATOMS = int(os.getenv("CHATMAT_DEDUP_MAX_ATOMS", "2000"))  # larger (irreducible) cells are not indexed
+
+# --- Admission control ---
+# Per-atom costs of one evaluation, used to estimate a request before building it
+BYTES_PER_ATOM = int(os.getenv("CHATMAT_BYTES_PER_ATOM", "200000"))
+SECONDS_PER_ATOM = float(os.getenv("CHATMAT_SECONDS_PER_ATOM", "0.001"))
+MAX_ATOMS = int(os.getenv("CHATMAT_MAX_ATOMS", "1000000"))  # larger requests are rejected (413)
+MAX_MEMORY_MB = float(os.getenv("CHATMAT_MAX_MEMORY_MB", "8192"))  # estimated peak per request (413 above)
+SYNC_MAX_SECONDS = float(os.getenv("CHATMAT_SYNC_MAX_SECONDS", "30"))  # slower requests become jobs (202)
+ATOMS_BUDGET = int(os.getenv("CHATMAT_ATOMS_BUDGET", "200000"))  # atoms being processed at once per worker
+JOB_WORKERS = int(os.getenv("CHATMAT_JOB_WORKERS", "1"))  # threads running queued jobs per worker
+JOB_TTL = float(os.getenv("CHATMAT_JOB_TTL", "86400"))  # s a finished job (and its result) is kept; 0 = forever
+# Assumed unit-cell size of external structures (mp/cod/...) that are not cached yet
+UNKNOWN_CELL_ATOMS = int(os.getenv("CHATMAT_UNKNOWN_CELL_ATOMS", "64"))
+MAX_UPLOAD_MB = float(os.getenv("CHATMAT_MAX_UPLOAD_MB", "4096"))  # /ingest/ uploads (413 above)
+INTERPRET_MAX_TEXTS = int(os.getenv("CHATMAT_INTERPRET_MAX_TEXTS", "1000"))  # /interpret batch size (413 above)
+DEFECTS_MAX_VARIANTS = int(os.getenv("CHATMAT_DEFECTS_MAX_VARIANTS", "10000"))  # /defects/ variants (413 above)
+
+# --- Visualization ---
+# Larger structures are sent to the visualizer as a unit cell + repeats or a clipped
+# region of at most this many atoms; the full XYZ is a separate download
+VIZ_MAX_ATOMS = int(os.getenv("CHATMAT_VIZ_MAX_ATOMS", "5000"))
+# Full structures behind the download links are kept this long (s) and at most this many on disk
+VIZ_FULL_TTL = float(os.getenv("CHATMAT_VIZ_FULL_TTL", "3600"))
+VIZ_FULL_MAX_STORED = int(os.getenv("CHATMAT_VIZ_FULL_MAX_STORED", "32"))
+
+# --- Large structures ---
+# Structures whose estimated evaluation memory exceeds this are evaluated in spatial
+# chunks that fit into it, if the model reports per-atom energies (0 = off, the default)
+DECOMP_MEMORY_MB = float(os.getenv("CHATMAT_DECOMP_MEMORY_MB", "0"))
+# Halo around each chunk in Angstrom. Forces on chunk atoms are exact only if it covers the
+# model's receptive field (message-passing layers x cutoff); the default of twice a 6 A
+# cutoff covers one layer, so results of multi-layer models such as PaiNN are approximate
+DECOMP_HALO = float(os.getenv("CHATMAT_DECOMP_HALO", "12.0"))
+DECOMP_PROCESSES = int(os.getenv("CHATMAT_DECOMP_PROCESSES", "1"))  # chunks evaluated in parallel
+
+# --- Deployment ---
+HOST = os.getenv("CHATMAT_HOST", "127.0.0.1")
+PORT = int(os.getenv("CHATMAT_PORT", "8000"))
+WORKERS = int(os.getenv("CHATMAT_WORKERS", "1"))
+# Threads per worker for torch/BLAS; 0 = CPU count divided by the number of workers
+THREADS_PER_WORKER = int(os.getenv("CHATMAT_THREADS_PER_WORKER", "0"))
+INTEROP_THREADS = int(os.getenv("CHATMAT_INTEROP_THREADS", "0"))  # torch inter-op threads per worker; 0 = default
+# Pin workers to core sets: "" = no pinning, "auto" = split the available cores evenly,
+# or one Linux CPU list per worker separated by ";" (e.g. "0-3;4-7")
+CPU_AFFINITY = os.getenv("CHATMAT_CPU_AFFINITY", "")
+# Crashed workers are restarted after WORKER_RESTART_DELAY s, doubling with each crash; more than
+# WORKER_MAX_RESTARTS crashes of one worker within WORKER_RESTART_WINDOW s stop the server (exit status 1)
+WORKER_RESTART_DELAY = float(os.getenv("CHATMAT_WORKER_RESTART_DELAY", "1"))
+WORKER_MAX_RESTARTS = int(os.getenv("CHATMAT_WORKER_MAX_RESTARTS", "5"))
+WORKER_RESTART_WINDOW = float(os.getenv("CHATMAT_WORKER_RESTART_WINDOW", "60"))
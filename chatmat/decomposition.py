@@ -0,0 +1,208 @@
+"""
+Spatial domain decomposition for evaluating very large structures.
+
+The cell is cut into a grid of chunks along its periodic axes. Each chunk is
+evaluated as a cluster: its own ("core") atoms plus every atom, including
+periodic images, within a halo of the chunk. The cluster keeps the
+periodicity of axes that are not cut. With a halo at least as wide as the
+model's receptive field, the per-atom energies and forces of the core atoms
+equal those of the full structure. The total energy is the sum of the core
+per-atom energies, and the forces of the core atoms are stitched together.
+
+The chunk size is chosen so that one cluster fits into the configured
+memory ceiling (CHATMAT_DECOMP_MEMORY_MB, with CHATMAT_BYTES_PER_ATOM per
+atom). Chunks can be evaluated in parallel processes (CHATMAT_DECOMP_PROCESSES),
+in which case each process gets its share of the ceiling.
+"""
+
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterator, List, Optional, Tuple
+
+import numpy as np
+from ase import Atoms
+
+try:
+    from . import config
+except ImportError:
+    import config
+
+# evaluate_chunk(cluster) -> (per-atom energies, forces) for all cluster atoms
+ChunkEvaluator = Callable[[Atoms], Tuple[np.ndarray, np.ndarray]]
+
+
+def max_chunk_atoms(processes: int = 1) -> Optional[int]:
+    """Largest cluster (core + halo atoms) that fits into the memory ceiling, or None if unlimited."""
+    if config.DECOMP_MEMORY_MB <= 0:
+        return None
+    return max(1, int(config.DECOMP_MEMORY_MB * 2**20 / config.BYTES_PER_ATOM / max(1, processes)))
+
+
+def needs_decomposition(n_atoms: int) -> bool:
+    """True if evaluating n_atoms at once would exceed the memory ceiling."""
+    limit = max_chunk_atoms()
+    return limit is not None and n_atoms > limit
+
+
+def _axis_widths(atoms: Atoms) -> np.ndarray:
+    """Distance between opposite cell faces along each axis."""
+    reciprocal = np.linalg.inv(atoms.cell.array).T
+    return 1.0 / np.linalg.norm(reciprocal, axis=1)
+
+
+def plan_grid(atoms: Atoms, halo: float, max_atoms: int) -> Tuple[int, int, int]:
+    """
+    Number of chunks along each cell axis so that a cluster stays below max_atoms.
+
+    Only periodic axes are cut. The widest chunk dimension is split first;
+    splitting stops once chunks are narrower than half the halo, because the
+    cluster size is then dominated by the halo.
+    """
+    widths = _axis_widths(atoms)
+    grid = [1, 1, 1]
+
+    def cluster_size(grid):
+        # Fraction of the cell covered by a chunk window (chunk plus halo on both sides), per axis
+        return len(atoms) * math.prod(1 / n + 2 * halo / w if n > 1 else 1 for w, n in zip(widths, grid))
+
+    while cluster_size(grid) > max_atoms:
+        candidates = [k for k in range(3) if atoms.pbc[k] and widths[k] / (grid[k] + 1) >= halo / 2]
+        if not candidates:
+            print(f"⚠️ Chunks of ~{cluster_size(grid):.0f} atoms still exceed the limit of {max_atoms}; "
+                  f"the halo ({halo} A) dominates")
+            break
+        k = max(candidates, key=lambda k: widths[k] / grid[k])
+        grid[k] += 1
+    return tuple(grid)
+
+
+def iter_clusters(atoms: Atoms, grid: Tuple[int, int, int], halo: float) -> Iterator[Tuple[np.ndarray, Atoms]]:
+    """
+    Yield (core_indices, cluster) for every chunk of the grid.
+
+    The first len(core_indices) atoms of each cluster are the core atoms, in
+    the order of core_indices; the rest is the halo.
+    """
+    cell = atoms.cell.array
+    frac = atoms.cell.scaled_positions(atoms.positions)
+    split = [grid[k] > 1 for k in range(3)]
+    for k in range(3):
+        if split[k]:
+            frac[:, k] = np.mod(frac[:, k], 1.0)
+    positions = frac @ cell
+
+    # Core chunk of every atom, grouped with a single sort
+    bins = np.zeros((len(atoms), 3), dtype=np.int64)
+    for k in range(3):
+        if split[k]:
+            bins[:, k] = np.minimum((frac[:, k] * grid[k]).astype(np.int64), grid[k] - 1)
+    chunk_id = (bins[:, 0] * grid[1] + bins[:, 1]) * grid[2] + bins[:, 2]
+    order = np.argsort(chunk_id, kind="stable")
+    boundaries = np.searchsorted(chunk_id[order], np.arange(grid[0] * grid[1] * grid[2] + 1))
+
+    # Per axis and chunk index: {image shift: mask of atoms whose image lies in the halo window}
+    halo_frac = halo / _axis_widths(atoms)
+    windows = []
+    for k in range(3):
+        per_chunk = []
+        for j in range(grid[k]):
+            if not split[k]:
+                per_chunk.append({0: None})  # whole axis, kept periodic
+                continue
+            lo, hi = j / grid[k] - halo_frac[k], (j + 1) / grid[k] + halo_frac[k]
+            reach = int(math.ceil(halo_frac[k]))
+            masks = {}
+            for shift in range(-reach, reach + 1):
+                mask = (frac[:, k] + shift >= lo) & (frac[:, k] + shift < hi)
+                if mask.any():
+                    masks[shift] = mask
+            per_chunk.append(masks)
+        windows.append(per_chunk)
+
+    pbc = [bool(atoms.pbc[k]) and not split[k] for k in range(3)]
+    for j0 in range(grid[0]):
+        for j1 in range(grid[1]):
+            for j2 in range(grid[2]):
+                c = (j0 * grid[1] + j1) * grid[2] + j2
+                core = order[boundaries[c]:boundaries[c + 1]]
+                if len(core) == 0:
+                    continue
+                halo_indices, halo_positions = [], []
+                for s0, m0 in windows[0][j0].items():
+                    for s1, m1 in windows[1][j1].items():
+                        for s2, m2 in windows[2][j2].items():
+                            mask = np.ones(len(atoms), dtype=bool)
+                            for m in (m0, m1, m2):
+                                if m is not None:
+                                    mask &= m
+                            if s0 == s1 == s2 == 0:
+                                mask[core] = False  # the unshifted core atoms come first
+                            indices = np.flatnonzero(mask)
+                            if len(indices):
+                                halo_indices.append(indices)
+                                halo_positions.append(positions[indices] + np.array([s0, s1, s2]) @ cell)
+                indices = np.concatenate([core] + halo_indices)
+                cluster_positions = np.concatenate([positions[core]] + halo_positions)
+                cluster = Atoms(numbers=atoms.numbers[indices], positions=cluster_positions,
+                                cell=cell, pbc=pbc)
+                yield core, cluster
+
+
+def _evaluate_core(evaluate_chunk: ChunkEvaluator, n_core: int, cluster: Atoms):
+    energies, forces = evaluate_chunk(cluster)
+    return np.asarray(energies)[:n_core], np.asarray(forces)[:n_core]
+
+
+def evaluate_decomposed(atoms: Atoms, evaluate_chunk: ChunkEvaluator, halo: Optional[float] = None,
+                        max_atoms: Optional[int] = None,
+                        processes: Optional[int] = None) -> Tuple[float, np.ndarray]:
+    """
+    Evaluate a large structure chunk by chunk.
+
+    Args:
+        atoms: Structure to evaluate
+        evaluate_chunk: Returns per-atom energies and forces of a cluster. Must be a
+            module-level function when processes > 1.
+        halo: Halo width in Angstrom (default: CHATMAT_DECOMP_HALO)
+        max_atoms: Largest cluster to evaluate at once (default: from the memory ceiling)
+        processes: Chunks evaluated in parallel (default: CHATMAT_DECOMP_PROCESSES)
+
+    Returns:
+        (total energy in eV, forces in eV/A as an (N, 3) array)
+    """
+    halo = config.DECOMP_HALO if halo is None else halo
+    processes = max(1, config.DECOMP_PROCESSES if processes is None else processes)
+    max_atoms = max_atoms or max_chunk_atoms(processes) or len(atoms)
+
+    grid = plan_grid(atoms, halo, max_atoms)
+    print(f"🧩 Evaluating {len(atoms)} atoms in a {grid[0]}x{grid[1]}x{grid[2]} chunk grid "
+          f"(halo {halo} A, {processes} process(es))")
+
+    energy = 0.0
+    forces = np.zeros((len(atoms), 3))
+    if processes == 1:
+        for core, cluster in iter_clusters(atoms, grid, halo):
+            core_energies, core_forces = _evaluate_core(evaluate_chunk, len(core), cluster)
+            energy += float(core_energies.sum())
+            forces[core] = core_forces
+        return energy, forces
+
+    # Fork so that workers share the resident model instead of loading it again
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    with ProcessPoolExecutor(max_workers=processes, mp_context=context) as pool:
+        pending: List = []
+        for core, cluster in iter_clusters(atoms, grid, halo):
+            pending.append((core, pool.submit(_evaluate_core, evaluate_chunk, len(core), cluster)))
+            # Bound the number of clusters held in memory at once
+            if len(pending) >= 2 * processes:
+                core, future = pending.pop(0)
+                core_energies, core_forces = future.result()
+                energy += float(core_energies.sum())
+                forces[core] = core_forces
+        for core, future in pending:
+            core_energies, core_forces = future.result()
+            energy += float(core_energies.sum())
+            forces[core] = core_forces
+    return energy, forces
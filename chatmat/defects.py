@@ -0,0 +1,278 @@
+"""
+Vacancies, substitutions and random alloys on top of a perfect supercell.
+
+A family of defected structures shares one base supercell. Each variant is
+stored only as the indices of its defect sites and their new atomic numbers
+(0 = vacancy), so generating thousands of variants copies nothing. The
+arrays of a variant are built when it is needed, by one fancy-indexing step
+over the shared positions array.
+
+    base = CompactStructure.from_atoms(create_structure("nacl", [3, 3, 3]))
+    for variant in generate_variants(base, [Defect("Na")]):              # unique Na vacancies
+        ...
+    generate_variants(base, [Defect("Na", "K", fraction=0.25)], n=20)    # 20 random alloys
+
+Equivalent defects are generated once. Single defects are enumerated per
+class of equivalent sites, and each variant records its multiplicity (the
+number of equivalent sites). Random multi-site variants are compared by the
+species and classes of their sites plus the minimum-image distances
+between them. Two sites are equivalent when they have the same species and
+the same sorted distances to each neighbor species. This captures the
+translations of a supercell and the point symmetry of most crystals without
+a symmetry library.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from ase import Atoms
+from ase.data import atomic_numbers, chemical_symbols
+from ase.geometry import get_distances
+from ase.neighborlist import neighbor_list
+
+try:
+    from .compact import CompactStructure
+    from .symmetry import unit_cell_of
+except ImportError:
+    from compact import CompactStructure
+    from symmetry import unit_cell_of
+
+# Neighbor shell used to classify sites, in units of (volume per atom)^(1/3)
+CLASS_CUTOFF_FACTOR = 2.5
+# Distances (A) are compared after rounding to this many decimals
+DECIMALS = 3
+# Random variants with more defect sites than this are deduplicated only if identical
+SIGNATURE_MAX_SITES = 32
+
+
+class TooManyVariants(ValueError):
+    """Enumerating every single-site defect would exceed the allowed number of variants."""
+
+
+@dataclass
+class Defect:
+    """
+    Replace `count` (or `fraction` of the) `host` atoms by `replace_with`
+    (an element symbol, or None for vacancies).
+    """
+    host: str
+    replace_with: Optional[str] = None
+    count: Optional[int] = None
+    fraction: Optional[float] = None
+
+    @property
+    def label(self) -> str:
+        return f"{self.replace_with or 'V'}_{self.host}"
+
+
+class Variant:
+    """One defected structure: defect sites and their new atomic numbers over a shared base."""
+
+    __slots__ = ("base", "sites", "numbers", "label", "multiplicity")
+
+    def __init__(self, base: CompactStructure, sites: np.ndarray, numbers: np.ndarray, label: str,
+                 multiplicity: int = 1):
+        self.base = base
+        self.sites = sites
+        self.numbers = numbers
+        self.label = label
+        self.multiplicity = multiplicity
+
+    def __len__(self) -> int:
+        return len(self.base) - int(np.count_nonzero(self.numbers == 0))
+
+    def __repr__(self) -> str:
+        return f"Variant({self.label}, sites={self.sites.tolist()})"
+
+    def to_compact(self) -> CompactStructure:
+        numbers = self.base.numbers.copy()
+        numbers[self.sites] = self.numbers
+        keep = numbers != 0
+        info = {k: v for k, v in self.base.info.items() if k != "supercell_dims"}
+        info.update(self.describe())
+        return CompactStructure(numbers[keep], self.base.positions[keep], self.base.cell, self.base.pbc, info)
+
+    def to_atoms(self) -> Atoms:
+        return self.to_compact().to_atoms()
+
+    def describe(self) -> Dict[str, Any]:
+        return {"defect": self.label, "sites": self.sites.tolist(),
+                "species": [chemical_symbols[z] if z else "V" for z in self.numbers.tolist()],
+                "multiplicity": self.multiplicity}
+
+
+def site_classes(structure: Union[CompactStructure, Atoms]) -> np.ndarray:
+    """
+    Class of every atom; atoms with equal classes have equivalent environments.
+
+    Perfect supercells are classified through their unit cell, so every copy of
+    a unit-cell atom is in the same class.
+    """
+    if isinstance(structure, CompactStructure):
+        atoms = structure.to_atoms()
+    else:
+        atoms = structure
+    reduced = unit_cell_of(atoms)
+    unit = reduced[0] if reduced is not None else atoms
+    n_unit = len(unit)
+
+    volume_per_atom = abs(unit.cell.volume) / n_unit if unit.pbc.all() else 1.0
+    cutoff = CLASS_CUTOFF_FACTOR * volume_per_atom ** (1 / 3)
+    i, j, d = neighbor_list("ijd", unit, cutoff)
+    order = np.lexsort((d, unit.numbers[j], i))
+    i, neighbors, d = i[order], unit.numbers[j][order], np.round(d[order], DECIMALS)
+    bounds = np.searchsorted(i, np.arange(n_unit + 1))
+    signatures = [(int(unit.numbers[a]), tuple(zip(neighbors[bounds[a]:bounds[a + 1]].tolist(),
+                                                   d[bounds[a]:bounds[a + 1]].tolist())))
+                  for a in range(n_unit)]
+    _, unit_classes = np.unique([hash(s) for s in signatures], return_inverse=True)
+    # Copies of the unit cell follow each other (see CompactStructure.repeat)
+    return unit_classes[np.arange(len(atoms)) % n_unit]
+
+
+def _number(symbol: str) -> int:
+    try:
+        return atomic_numbers[symbol]
+    except KeyError:
+        raise ValueError(f"Unknown element '{symbol}'") from None
+
+
+def _host_sites(base: CompactStructure, defects: Sequence[Defect]) -> Dict[int, np.ndarray]:
+    sites = {}
+    for defect in defects:
+        z = _number(defect.host)
+        if z not in sites:
+            sites[z] = np.flatnonzero(base.numbers == z)
+            if len(sites[z]) == 0:
+                raise ValueError(f"The structure has no {defect.host} atoms")
+    return sites
+
+
+def _counts(defects: Sequence[Defect], host_sites: Dict[int, np.ndarray]) -> List[int]:
+    counts = []
+    for defect in defects:
+        n_host = len(host_sites[_number(defect.host)])
+        if defect.fraction is not None:
+            count = int(round(defect.fraction * n_host))
+        else:
+            count = 1 if defect.count is None else int(defect.count)
+        if count < 1:
+            raise ValueError(f"{defect.label}: no sites to change (count {count})")
+        counts.append(count)
+    for z, sites in host_sites.items():
+        wanted = sum(c for d, c in zip(defects, counts) if _number(d.host) == z)
+        if wanted > len(sites):
+            raise ValueError(f"{wanted} {chemical_symbols[z]} sites requested, the structure has {len(sites)}")
+    return counts
+
+
+def _label(defects: Sequence[Defect], counts: Sequence[int]) -> str:
+    return "+".join(f"{count if count > 1 else ''}{defect.label}" for defect, count in zip(defects, counts))
+
+
+def _signature(base: CompactStructure, classes: np.ndarray, sites: np.ndarray, numbers: np.ndarray):
+    """Key that is equal for equivalent multi-site variants (see module docstring)."""
+    if len(sites) > SIGNATURE_MAX_SITES:
+        order = np.argsort(sites)
+        return ("exact", sites[order].tobytes(), numbers[order].tobytes())
+    keys = sorted(zip(classes[sites].tolist(), numbers.tolist()))
+    _, distances = get_distances(base.positions[sites], cell=base.cell, pbc=base.pbc)
+    upper = np.triu_indices(len(sites), k=1)
+    first, second = numbers[upper[0]], numbers[upper[1]]
+    pairs = sorted(zip(np.minimum(first, second).tolist(), np.maximum(first, second).tolist(),
+                       np.round(distances[upper], DECIMALS).tolist()))
+    return tuple(keys), tuple(pairs)
+
+
+def generate_variants(base: Union[CompactStructure, Atoms], defects: Sequence[Defect],
+                      n: Optional[int] = None, seed: int = 0, unique: bool = True,
+                      max_attempts: Optional[int] = None, max_variants: Optional[int] = None) -> Iterator[Variant]:
+    """
+    Stream defected variants of a base structure.
+
+    The request is checked when this is called; the variants are generated
+    lazily as the returned iterator is consumed.
+
+    Args:
+        base: Perfect (super)cell; Atoms are viewed without copying
+        defects: Defects applied together in every variant
+        n: Number of random variants. None enumerates every single-site defect
+           (one per class of equivalent sites if unique)
+        seed: Random seed, so a family can be regenerated
+        unique: Skip variants equivalent to one already generated
+        max_attempts: Random draws before giving up on finding n unique
+           variants (default: 20 * n)
+        max_variants: Limit on the number of variants enumerated with n=None
+
+    Raises:
+        TooManyVariants: If n=None would enumerate more than max_variants
+        ValueError: For unknown elements or hosts, too many sites, or n=None
+            with more than one defect site
+    """
+    if isinstance(base, Atoms):
+        base = CompactStructure.from_atoms(base)
+    if not defects:
+        raise ValueError("No defects given")
+    host_sites = _host_sites(base, defects)
+    counts = _counts(defects, host_sites)
+    new_numbers = np.concatenate([np.full(count, _number(d.replace_with) if d.replace_with else 0)
+                                  for d, count in zip(defects, counts)])
+    label = _label(defects, counts)
+    if n is None:
+        if sum(counts) != 1:
+            raise ValueError("Give the number of variants n for defects with more than one site")
+        sites, multiplicity = _single_sites(base, host_sites[_number(defects[0].host)], unique)
+        if max_variants is not None and len(sites) > max_variants:
+            raise TooManyVariants(f"{len(sites)} {'distinct ' if unique else ''}{label} variants; "
+                                  f"the limit is {max_variants}")
+        return _enumerate(base, sites, multiplicity, new_numbers, label)
+    return _sample(base, defects, counts, host_sites, new_numbers, label, n, seed, unique,
+                   20 * n if max_attempts is None else max_attempts)
+
+
+def _single_sites(base, candidates, unique) -> Tuple[np.ndarray, np.ndarray]:
+    """Site of every single-site variant (one per class of equivalent sites if unique) and its multiplicity."""
+    if not unique:
+        return candidates, np.ones(len(candidates), dtype=int)
+    _, first, multiplicity = np.unique(site_classes(base)[candidates], return_index=True, return_counts=True)
+    order = np.argsort(first)
+    return candidates[first[order]], multiplicity[order]
+
+
+def _enumerate(base, sites, multiplicity, new_numbers, label) -> Iterator[Variant]:
+    for k, count in enumerate(multiplicity.tolist()):
+        yield Variant(base, sites[k:k + 1], new_numbers, label, multiplicity=count)
+
+
+def _sample(base, defects, counts, host_sites, new_numbers, label, n, seed, unique,
+            max_attempts) -> Iterator[Variant]:
+    rng = np.random.default_rng(seed)
+    wanted = {z: sum(c for d, c in zip(defects, counts) if _number(d.host) == z) for z in host_sites}
+    classes = site_classes(base) if unique else None
+    seen = set()
+    generated = 0
+    for _ in range(max_attempts):
+        if generated >= n:
+            break
+        parts = [rng.choice(sites, wanted[z], replace=False) for z, sites in host_sites.items()]
+        sites = _assign(defects, counts, host_sites, parts)
+        if unique:
+            key = _signature(base, classes, sites, new_numbers)
+            if key in seen:
+                continue
+            seen.add(key)
+        generated += 1
+        yield Variant(base, sites, new_numbers, f"{label}#{generated}")
+
+
+def _assign(defects, counts, host_sites, parts) -> np.ndarray:
+    """Sites of every defect, in the order of defects; defects on one host take consecutive drawn sites."""
+    drawn = dict(zip(host_sites, parts))
+    used = {z: 0 for z in host_sites}
+    sites = []
+    for defect, count in zip(defects, counts):
+        z = _number(defect.host)
+        sites.append(drawn[z][used[z]:used[z] + count])
+        used[z] += count
+    return np.concatenate(sites)
@@ -0,0 +1,146 @@
+"""
+Canonical structure fingerprints and an index of computed results.
+
+The same crystal reaches /calculate/ under different names and routes
+("Si" from the builtin generator, "mp-149" from Materials Project), as a
+different supercell, or with its atoms ordered or origin-shifted
+differently. The result cache is keyed by the request, so it misses all of
+these. A fingerprint describes the structure itself:
+
+    formula          reduced formula, species by atomic number, e.g. (("Na", 1), ("Cl", 1))
+    volume_per_atom  A^3
+    descriptor       per center species and neighbor species, the mean, min
+                     and max over atoms of the sorted distances to the
+                     nearest K_NEIGHBORS neighbors
+
+The descriptor and volume per atom do not depend on atom order, origin,
+cell choice or the number of repeats, so two structures match when their
+formulas are equal and their descriptors agree within a tolerance (in A).
+K_NEIGHBORS spans several coordination shells: polymorphs with the same
+first shell and density, such as fcc and hcp or zinc blende and wurtzite,
+differ only further out (fcc and hcp from the 19th neighbor on).
+Energies are stored per atom and scaled to the size of the matching
+structure; the largest force is the same for equivalent structures.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+from ase import Atoms
+from ase.data import chemical_symbols
+from ase.neighborlist import neighbor_list
+
+try:
+    from . import config
+    from .cache import SharedCache
+    from .symmetry import unit_cell_of
+except ImportError:
+    import config
+    from cache import SharedCache
+    from symmetry import unit_cell_of
+
+K_NEIGHBORS = 32
+# Neighbor search radius in units of (volume per atom)^(1/3), ~110 atoms in range
+CUTOFF_FACTOR = 3.0
+# Part of the index keys; bumped when the descriptor changes so old entries are not compared
+VERSION = 2
+
+
+@dataclass(eq=False)
+class Fingerprint:
+    """Order-, origin- and supercell-invariant description of a periodic structure."""
+    formula: Tuple[Tuple[str, int], ...]
+    volume_per_atom: float
+    descriptor: np.ndarray
+
+    @property
+    def length(self) -> float:
+        """Volume per atom as a length (A), comparable with the descriptor distances."""
+        return self.volume_per_atom ** (1 / 3)
+
+    def matches(self, other: "Fingerprint", tolerance: Optional[float] = None) -> bool:
+        """True if both describe the same structure within tolerance (A, default: CHATMAT_DEDUP_TOLERANCE)."""
+        tolerance = config.DEDUP_TOLERANCE if tolerance is None else tolerance
+        return (self.formula == other.formula
+                and abs(self.length - other.length) <= tolerance
+                and self.descriptor.shape == other.descriptor.shape
+                and float(np.abs(self.descriptor - other.descriptor).max(initial=0.0)) <= tolerance)
+
+
+def fingerprint(atoms: Atoms) -> Optional[Fingerprint]:
+    """
+    Fingerprint of a periodic structure.
+
+    Perfect supercells are fingerprinted through their unit cell.
+
+    Returns:
+        The fingerprint, or None for non-periodic or empty structures and for
+        cells larger than CHATMAT_DEDUP_MAX_ATOMS
+    """
+    if len(atoms) == 0 or not atoms.pbc.all():
+        return None
+    reduced = unit_cell_of(atoms)
+    if reduced is not None:
+        atoms = reduced[0]
+    if len(atoms) > config.DEDUP_MAX_ATOMS or atoms.cell.volume <= 0:
+        return None
+
+    numbers = atoms.numbers
+    species, counts = np.unique(numbers, return_counts=True)
+    divisor = np.gcd.reduce(counts)
+    formula = tuple((chemical_symbols[z], int(n // divisor)) for z, n in zip(species, counts))
+    volume_per_atom = atoms.cell.volume / len(atoms)
+    cutoff = CUTOFF_FACTOR * volume_per_atom ** (1 / 3)
+
+    # Sorted distances from every atom to its nearest neighbors of each species
+    i, j, d = neighbor_list("ijd", atoms, cutoff)
+    neighbor_species = np.searchsorted(species, numbers[j])
+    order = np.lexsort((d, neighbor_species, i))
+    i, neighbor_species, d = i[order], neighbor_species[order], d[order]
+    group = i * len(species) + neighbor_species
+    starts = np.flatnonzero(np.r_[True, np.diff(group) != 0]) if len(group) else np.zeros(0, dtype=int)
+    rank = np.arange(len(group)) - np.repeat(starts, np.diff(np.r_[starts, len(group)]))
+    keep = rank < K_NEIGHBORS
+    environments = np.full((len(atoms), len(species), K_NEIGHBORS), cutoff)
+    environments[i[keep], neighbor_species[keep], rank[keep]] = d[keep]
+
+    center_species = np.searchsorted(species, numbers)
+    parts = []
+    for s in range(len(species)):
+        env = environments[center_species == s]
+        parts += [env.mean(axis=0), env.min(axis=0), env.max(axis=0)]
+    return Fingerprint(formula, float(volume_per_atom), np.concatenate([part.ravel() for part in parts]))
+
+
+class StructureIndex:
+    """Results of evaluated structures, looked up by fingerprint with a tolerance."""
+
+    def __init__(self, name: str = "fingerprints"):
+        self.cache = SharedCache(name)
+
+    def _bucket(self, fp: Fingerprint, offset: int = 0) -> str:
+        # Buckets are one tolerance wide in volume per atom, so a match is in the same or a neighboring one
+        width = max(config.DEDUP_TOLERANCE, 1e-6)
+        return self.cache.make_key(VERSION, config.MODEL_NAME, fp.formula, int(np.floor(fp.length / width)) + offset)
+
+    def lookup(self, fp: Fingerprint) -> Optional[Dict[str, Any]]:
+        """Stored result of an equivalent structure: {"energy_per_atom", "max_force", "fingerprint"}, or None."""
+        for offset in (0, -1, 1):
+            for entry in self.cache.get(self._bucket(fp, offset), []):
+                if fp.matches(entry["fingerprint"]):
+                    return entry
+        return None
+
+    def add(self, fp: Fingerprint, energy_per_atom: float, forces: np.ndarray) -> None:
+        key = self._bucket(fp)
+        entries = self.cache.get(key, [])
+        if any(fp.matches(entry["fingerprint"]) for entry in entries):
+            return
+        forces = np.asarray(forces)
+        max_force = float(np.linalg.norm(forces, axis=1).max()) if len(forces) else 0.0
+        self.cache.set(key, entries + [{"fingerprint": fp, "energy_per_atom": float(energy_per_atom),
+                                        "max_force": max_force}])
+
+
+structure_index = StructureIndex()
@@ -2,7 +2,65 @@
  * Backend API connector for FastAPI server
  */
 
-const BACKEND_URL = "http://127.0.0.1:8000/calculate/";
+const BACKEND_BASE = "http://127.0.0.1:8000";
+const BACKEND_URL = BACKEND_BASE + "/calculate/";
+const JOBS_URL = BACKEND_BASE + "/jobs/";
+const INTERPRET_URL = BACKEND_BASE + "/interpret";
+const JOB_POLL_MS = 2000;
+
+/**
+ * Absolute URL of a backend path such as visualization.full_xyz_url
+ */
+export function backendUrl(path) {
+  return BACKEND_BASE + path;
+}
+
+/**
+ * Interpret a request on the server (the same parser the API and the LLM fallback use).
+ * Returns the parsed request in the shape of parseMaterialRequest(), plus the
+ * size estimate, or null if the backend cannot be reached.
+ */
+export async function interpretRequest(text) {
+  try {
+    const response = await fetch(INTERPRET_URL, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ text })
+    });
+    if (!response.ok) {
+      return null;
+    }
+    const result = await response.json();
+    return {
+      material_name: result.request.material_name,
+      ...result.request.structure_details,
+      estimate: result.estimate,
+      admission: result.admission
+    };
+  } catch (error) {
+    return null;
+  }
+}
+
+/**
+ * Poll a queued calculation (HTTP 202 from /calculate/) until it finishes
+ */
+async function waitForJob(jobId) {
+  while (true) {
+    await new Promise(resolve => setTimeout(resolve, JOB_POLL_MS));
+    const response = await fetch(JOBS_URL + jobId);
+    if (!response.ok) {
+      return { success: false, error: `Job ${jobId}: HTTP ${response.status}` };
+    }
+    const job = await response.json();
+    if (job.status === "done") {
+      return { success: true, data: job.result };
+    }
+    if (job.status === "failed") {
+      return { success: false, error: job.error?.detail || `Job ${jobId} failed` };
+    }
+  }
+}
 
 export async function sendCalculationRequest(parsed, useGPU = false, llmProvider = null, userInput = '') {
   // Ensure all values are properly typed
@@ -19,6 +77,11 @@ export async function sendCalculationRequest(parsed, useGPU = false, llmProvider
       compound: parsed.compound ? parsed.compound.map(x => String(x)) : null,
       source_type: parsed.source_type ? String(parsed.source_type) : null,
       source_params: parsed.source_params || {},
+      surface: parsed.surface ? parsed.surface.map(x => parseInt(x)) : null,
+      layers: parsed.layers ? parseInt(parsed.layers) : null,
+      vacuum: parsed.vacuum !== null && parsed.vacuum !== undefined ? parseFloat(parsed.vacuum) : null,
+      adsorbate: parsed.adsorbate ? String(parsed.adsorbate) : null,
+      adsorbate_site: parsed.adsorbate_site ? String(parsed.adsorbate_site) : null,
       use_llm: Boolean(useGPU),
       llm_provider: llmProvider || null,
       llm_params: useGPU && llmProvider ? {
@@ -38,7 +101,11 @@ export async function sendCalculationRequest(parsed, useGPU = false, llmProvider
       body: JSON.stringify(payload)
     });
 
-    if (response.ok) {
+    if (response.status === 202) {
+      // Large structure: the backend runs it as a background job
+      const queued = await response.json();
+      return await waitForJob(queued.job_id);
+    } else if (response.ok) {
       const data = await response.json();
       return { success: true, data };
     } else {
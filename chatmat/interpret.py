@@ -0,0 +1,337 @@
+"""
+Natural-language request interpretation for ChatMat.
+
+One interpreter serves the /interpret endpoint, the frontend (through that
+endpoint) and the regex fallback of parse_llm_structure_response(). Its
+vocabulary is built once at import time from MATERIAL_DATABASE,
+COMPOUND_DATABASE and the prototype table, and all patterns are compiled
+once, so adding a material or structure type to those tables is enough for
+it to be recognized everywhere, including in the LLM system prompt.
+
+    interpret("2x2x2 supercell of rock salt NaCl with a=5.6")
+    -> {"material_name": "NaCl", "supercell_dims": [2, 2, 2], "structure_type": "rocksalt",
+        "lattice_parameter": 5.6, "compound": ["Na", "Cl"], "source_type": None, ...}
+    interpret("Pt(111) 4x4 slab, 4 layers, 15 A vacuum with CO on hollow site")
+    -> {"material_name": "Pt", "supercell_dims": [4, 4, 1], "surface": [1, 1, 1], "layers": 4,
+        "vacuum": 15.0, "adsorbate": "CO", "adsorbate_site": "hollow", ...}
+"""
+
+import copy
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from ase.data import chemical_symbols
+
+try:
+    from .build_structures import COMPOUND_DATABASE, MATERIAL_DATABASE, _formula_from_key, parse_formula
+    from .prototypes import PROTOTYPES
+except ImportError:
+    from build_structures import COMPOUND_DATABASE, MATERIAL_DATABASE, _formula_from_key, parse_formula
+    from prototypes import PROTOTYPES
+
+# Extra spellings of structure types (the type names themselves are always recognized)
+STRUCTURE_ALIASES: Dict[str, List[str]] = {
+    "fcc": ["face-centered cubic", "face centered cubic"],
+    "bcc": ["body-centered cubic", "body centered cubic"],
+    "hcp": ["hexagonal close-packed", "hexagonal close packed"],
+    "diamond": ["diamond cubic"],
+    "sc": ["simple cubic"],
+    "zincblende": ["zinc blende", "sphalerite"],
+    "rocksalt": ["rock salt", "nacl structure"],
+}
+# Extra names of compounds (database names and formulas are always recognized)
+COMPOUND_ALIASES: Dict[str, str] = {"quartz": "sio2", "cristobalite": "sio2_cristobalite"}
+# Element spellings that are not database names
+ELEMENT_ALIASES: Dict[str, str] = {"aluminium": "al", "carbon": "c"}
+# Capitalized words that look like element symbols but are not meant as such
+COMMON_WORDS = {"the", "for", "get", "calculate", "energy", "force", "structure", "supercell",
+                "bulk", "of", "a", "an", "in", "on", "at", "i"}
+# Lowercase element symbols that are also English words
+_AMBIGUOUS_SYMBOLS = {"be", "as", "in", "at", "no", "he", "so", "i", "c", "w", "v"}
+
+DEFAULT_MATERIAL = "Si"
+DEFAULT_SURFACE = (1, 1, 1)
+
+
+def _alternation(words) -> re.Pattern:
+    """Whole-word pattern matching any of words, longest first."""
+    ordered = sorted(set(words), key=len, reverse=True)
+    return re.compile(r'(?<![\w-])(' + "|".join(re.escape(w) for w in ordered) + r')(?![\w-])')
+
+
+def _strip_note(name: str) -> str:
+    return re.sub(r'\s*\(.*\)\s*$', '', name.lower()).strip()
+
+
+def _build_vocabulary():
+    structures = {name: name for name in PROTOTYPES}
+    for name, aliases in STRUCTURE_ALIASES.items():
+        structures.update({alias: name for alias in aliases})
+
+    compounds: Dict[str, str] = {}
+    for key, data in COMPOUND_DATABASE.items():
+        if "_" not in key:
+            compounds.setdefault(key, key)
+        compounds.setdefault(_strip_note(data.get("name", "")), key)
+    for alias, key in COMPOUND_ALIASES.items():
+        compounds.setdefault(alias, key)
+
+    elements: Dict[str, str] = {}
+    for key, data in MATERIAL_DATABASE.items():
+        elements.setdefault(_strip_note(data.get("name", "")), key)
+        if len(key) == 2 and key not in _AMBIGUOUS_SYMBOLS:
+            elements.setdefault(key, key)
+    elements.update(ELEMENT_ALIASES)
+    elements.pop("", None)
+    compounds.pop("", None)
+    return structures, compounds, elements
+
+
+STRUCTURE_WORDS, COMPOUND_WORDS, ELEMENT_WORDS = _build_vocabulary()
+
+_STRUCTURE_PATTERN = _alternation(STRUCTURE_WORDS)
+_COMPOUND_PATTERN = _alternation(COMPOUND_WORDS)
+_ELEMENT_PATTERN = _alternation(ELEMENT_WORDS)
+_SUPERCELL_PATTERNS = [
+    re.compile(r'(\d+)\s*[x×]\s*(\d+)\s*[x×]\s*(\d+)'),
+    re.compile(r'supercell\s*[:\s]+(\d+)\s*[x×,]\s*(\d+)\s*[x×,]\s*(\d+)'),
+    re.compile(r'(?<![\d.])(\d+)\s+(\d+)\s+(\d+)(?![\d.])'),
+]
+_LATTICE_PATTERNS = [
+    re.compile(r'(?<![\w])[al]\s*[=:]\s*(\d+(?:\.\d*)?)'),
+    re.compile(r'lattice\s*(?:parameter|constant)?\s*[:=]?\s*(\d+(?:\.\d*)?)'),
+]
+# Surfaces: "Pt(111) 4x4 slab, 4 layers, 15 A vacuum, CO on hollow site"
+_MILLER_PATTERN = re.compile(r'\((-?\d)\s*,?\s*(-?\d)\s*,?\s*(-?\d)(?:\s*,?\s*(-?\d))?\)'
+                             r'|(?<![\w.-])(\d)(\d)(\d)(\d)?(?=\s+(?:surface|slab|facet))')
+_SLAB_PATTERN = re.compile(r'\b(?:slab|surface)s?\b')
+_LAYERS_PATTERN = re.compile(r'(\d+)[\s-]*(?:atomic\s+)?layers?\b')
+_VACUUM_PATTERNS = [
+    re.compile(r'(\d+(?:\.\d*)?)\s*(?:å|a|angstroms?)?\s*(?:of\s+)?vacuum'),
+    re.compile(r'vacuum\s*(?:of\s*)?[=:]?\s*(\d+(?:\.\d*)?)'),
+]
+_SLAB_SIZE_PATTERN = re.compile(r'(?<![\d.])(\d+)\s*[x×]\s*(\d+)(?!\s*[x×]\s*\d)')
+_ADSORBATE_PATTERN = re.compile(r'\b([A-Z][a-z]?\d*(?:[A-Z][a-z]?\d*)*)\s+'
+                                r'(?:adsorbate|adatom|(?:adsorbed\s+)?(?:on|at)\s+(?:an?\s+|the\s+)?'
+                                r'(top|ontop|on-top|bridge|hollow|fcc|hcp)\b)')
+# "CO on Pt(111) hollow site", "H adsorbed on Cu(100)", "O on top of Ni(111)": the slab material is
+# the token carrying the Miller index, the adsorbate the species before "on"/"at"
+_ADSORBED_ON_PATTERN = re.compile(r'\b([A-Z][a-z]?\d*(?:[A-Z][a-z]?\d*)*)\s+(?:adsorbed\s+)?(?:on|at)\s+'
+                                  r'(?:(?:an?|the)\s+)?(?:(top|ontop|on-top|bridge|hollow|fcc|hcp)'
+                                  r'(?:\s+sites?)?\s+of\s+)?(?=[A-Z][A-Za-z0-9]*\s*\(-?\d)')
+_SITE_PATTERN = re.compile(r'\b(top|ontop|on-top|bridge|hollow|fcc|hcp)\s+(?:sites?|positions?)\b',
+                           re.IGNORECASE)
+_SITE_WORDS = {"ontop": "top", "on-top": "top", "fcc": "hollow", "hcp": "hollow"}
+_MP_PATTERN = re.compile(r'\bmp-\d+\b', re.IGNORECASE)
+_COD_PATTERN = re.compile(r'\bcod-?(\d+)\b', re.IGNORECASE)
+_URL_PATTERN = re.compile(r'https?://\S+')
+_FILE_PATTERN = re.compile(r'[/\\]|\.(cif|xyz|extxyz|vasp|poscar|traj)$', re.IGNORECASE)
+_FORMULA_PATTERN = re.compile(r'\b(?:[A-Z][a-z]?\d*){2,}\b')
+_SYMBOL_PATTERN = re.compile(r'\b([A-Z][a-z]?)\b')
+_SYMBOLS = set(chemical_symbols[1:])
+
+# System prompt shared by the LLM providers, listing the structure types the builder supports
+LLM_SYSTEM_PROMPT = f"""You are a materials science expert. Given a description of a crystal structure,
+extract the following information and return it as JSON:
+- material_name: Element symbol or compound name (e.g., "Si", "NaCl", "GaN", "MoS2", "Graphene")
+- structure_type: Crystal structure type ({", ".join(PROTOTYPES)}, layered, 2d) or null
+- lattice_parameter: Lattice parameter in Angstroms (float) or null. For 2D materials, this is the in-plane lattice parameter.
+- supercell_dims: Supercell dimensions as [nx, ny, nz] (default: [1, 1, 1])
+- compound: List of element symbols for compounds (e.g., ["Na", "Cl"], ["Mo", "S"], ["C"]) or null for elements
+
+For complex structures, extract as much information as possible. If the structure description is too complex,
+suggest the closest simple structure that can be generated. For layered/2D materials, use structure_type "layered" or "2d".
+
+Return ONLY valid JSON, no additional text."""
+
+
+def _compound_result(key: str) -> Dict[str, Any]:
+    data = COMPOUND_DATABASE[key]
+    counts = _formula_from_key(key, data["elements"])
+    name = "".join(f"{el}{n if n > 1 else ''}" for el, n in counts.items())
+    return {"material_name": name, "compound": list(data["elements"]), "structure_type": data["structure"]}
+
+
+def _blank(text: str, match: re.Match) -> str:
+    """text with the match replaced by spaces, so later patterns do not see it."""
+    return text[:match.start()] + " " * (match.end() - match.start()) + text[match.end():]
+
+
+def _surface(text: str, result: Dict[str, Any]) -> str:
+    """Fill in the surface fields of result; returns text without the surface phrases."""
+    for pattern in (_ADSORBED_ON_PATTERN, _ADSORBATE_PATTERN):
+        match = pattern.search(text)
+        if match and (match.group(1) in _SYMBOLS or parse_formula(match.group(1))):
+            result["adsorbate"] = match.group(1)
+            site = match.group(2)
+            result["adsorbate_site"] = _SITE_WORDS.get(site, site) if site else None
+            text = _blank(text, match)
+            break
+    if result["adsorbate"] and result["adsorbate_site"] is None:
+        match = _SITE_PATTERN.search(text)
+        if match:
+            site = match.group(1).lower()
+            result["adsorbate_site"] = _SITE_WORDS.get(site, site)
+            text = _blank(text, match)
+
+    match = _MILLER_PATTERN.search(text)
+    if match:
+        indices = [int(n) for n in match.groups() if n is not None]
+        if len(indices) == 4:
+            indices = [indices[0], indices[1], indices[3]]
+        if any(indices):
+            result["surface"] = indices
+        text = _blank(text, match)
+    if result["surface"] is None and (_SLAB_PATTERN.search(text.lower()) or result["adsorbate"]):
+        result["surface"] = list(DEFAULT_SURFACE)
+    if result["surface"] is None:
+        return text
+
+    match = _LAYERS_PATTERN.search(text.lower())
+    if match:
+        result["layers"] = int(match.group(1))
+        text = _blank(text, match)
+    for pattern in _VACUUM_PATTERNS:
+        match = pattern.search(text.lower())
+        if match:
+            result["vacuum"] = float(match.group(1))
+            text = _blank(text, match)
+            break
+    match = _SLAB_SIZE_PATTERN.search(text.lower())
+    if match:
+        result["supercell_dims"] = [int(match.group(1)), int(match.group(2)), 1]
+        text = _blank(text, match)
+    return text
+
+
+@lru_cache(maxsize=4096)
+def _interpret(text: str) -> Dict[str, Any]:
+    result: Dict[str, Any] = {
+        "material_name": DEFAULT_MATERIAL,
+        "supercell_dims": [1, 1, 1],
+        "structure_type": None,
+        "lattice_parameter": None,
+        "compound": None,
+        "source_type": None,
+        "source_params": {},
+        "surface": None,
+        "layers": None,
+        "vacuum": None,
+        "adsorbate": None,
+        "adsorbate_site": None,
+        "recognized": False,
+    }
+    text = _surface(text, result)
+    text_lower = text.lower()
+
+    for pattern in _SUPERCELL_PATTERNS:
+        match = pattern.search(text_lower)
+        if match and result["surface"] is None:
+            result["supercell_dims"] = [int(n) for n in match.groups()]
+            break
+
+    match = _STRUCTURE_PATTERN.search(text_lower)
+    if match:
+        result["structure_type"] = STRUCTURE_WORDS[match.group(1)]
+
+    for pattern in _LATTICE_PATTERNS:
+        match = pattern.search(text_lower)
+        if match:
+            result["lattice_parameter"] = float(match.group(1))
+            break
+
+    # External sources
+    match = _MP_PATTERN.search(text)
+    if match:
+        result.update(material_name=match.group(0).lower(), source_type="mp", recognized=True)
+        return result
+    match = _COD_PATTERN.search(text)
+    if match:
+        result.update(material_name=match.group(1), source_type="cod", recognized=True)
+        return result
+    match = _URL_PATTERN.search(text)
+    if match:
+        result.update(material_name=match.group(0), source_type="url", recognized=True)
+        return result
+    if _FILE_PATTERN.search(text.strip()) and " " not in text.strip():
+        result.update(material_name=text.strip(), source_type="file", recognized=True)
+        return result
+
+    # Compounds by name or database key ("sodium chloride", "nacl", "quartz")
+    match = _COMPOUND_PATTERN.search(text_lower)
+    if match:
+        found = _compound_result(COMPOUND_WORDS[match.group(1)])
+        result.update(material_name=found["material_name"], compound=found["compound"], recognized=True)
+        if match.group(1) in COMPOUND_ALIASES:
+            # "quartz" or "cristobalite" also names the structure
+            result["structure_type"] = result["structure_type"] or found["structure_type"]
+        return result
+
+    # Formulas written out ("SiO2", "GaAs", "MoS2")
+    for match in _FORMULA_PATTERN.finditer(text):
+        counts = parse_formula(match.group(0))
+        if counts and all(el in _SYMBOLS for el in counts) and len(counts) >= 2:
+            result.update(material_name=match.group(0), compound=list(counts), recognized=True)
+            return result
+
+    # Elements by name ("silicon") or lowercase symbol ("cu")
+    match = _ELEMENT_PATTERN.search(text_lower)
+    if match:
+        key = ELEMENT_WORDS[match.group(1)]
+        result.update(material_name=key.capitalize(), recognized=True)
+        return result
+
+    # Element symbols ("Fe", "W")
+    for match in _SYMBOL_PATTERN.finditer(text):
+        symbol = match.group(1)
+        if symbol in _SYMBOLS and symbol.lower() not in COMMON_WORDS:
+            result.update(material_name=symbol, recognized=True)
+            return result
+
+    return result
+
+
+def interpret(text: str) -> Dict[str, Any]:
+    """
+    Interpret a natural-language structure request.
+
+    Args:
+        text: Request such as "2x2x2 supercell of GaN" or "mp-149"
+
+    Returns:
+        material_name, supercell_dims, structure_type, lattice_parameter,
+        compound, source_type, source_params and the slab fields surface,
+        layers, vacuum, adsorbate and adsorbate_site (as used in a /calculate/
+        request), plus "recognized": False when no material was found and the
+        default (Si) was used
+    """
+    # Cached per text; callers get their own copy to modify
+    return copy.deepcopy(_interpret(text.strip()))
+
+
+def interpret_batch(texts: List[str]) -> List[Dict[str, Any]]:
+    return [interpret(text) for text in texts]
+
+
+def calculation_request(text: str, parsed: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """The /calculate/ request body for an interpreted text (without LLM options)."""
+    parsed = parsed or interpret(text)
+    return {
+        "intent": "CALCULATE",
+        "material_name": parsed["material_name"],
+        "user_input": text,
+        "structure_details": {
+            "supercell_dims": parsed["supercell_dims"],
+            "structure_type": parsed["structure_type"],
+            "lattice_parameter": parsed["lattice_parameter"],
+            "compound": parsed["compound"],
+            "source_type": parsed["source_type"],
+            "source_params": parsed["source_params"],
+            "surface": parsed["surface"],
+            "layers": parsed["layers"],
+            "vacuum": parsed["vacuum"],
+            "adsorbate": parsed["adsorbate"],
+            "adsorbate_site": parsed["adsorbate_site"],
+        },
+    }
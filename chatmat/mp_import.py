@@ -0,0 +1,241 @@
+"""
+Bulk fetch of Materials Project structures.
+
+fetch_from_materials_project() opens an MPRester and sends one request per
+id. For screening hundreds of entries, fetch_materials_project() instead
+queries the summary endpoint of the MP REST API for many ids at once:
+
+    GET {endpoint}/materials/summary/?material_ids=mp-149,mp-13,...&_fields=material_id,structure
+
+It uses one long-lived HTTP session (X-API-KEY header), and requests are
+limited by a token bucket (CHATMAT_MP_RATE_LIMIT per second). Answers with
+HTTP 429 are retried after the time the server asks for. The structures come
+back as pymatgen dictionaries and are converted to Atoms without pymatgen,
+optionally in a process pool. They are written to the structure store under
+"mp:<id>", where get_structure() finds them.
+
+CHATMAT_MP_ENDPOINT points the client at another MP-compatible server, such
+as a local mirror or a test stub.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+from ase import Atoms
+from ase.data import atomic_numbers
+
+try:
+    from . import config
+    from .cache import SharedCache, structure_cache
+    from .compact import composition
+except ImportError:
+    import config
+    from cache import SharedCache, structure_cache
+    from compact import composition
+
+DEFAULT_ENDPOINT = "https://api.materialsproject.org"
+
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average, with bursts of up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        Take one token, sleeping until one is available.
+
+        Returns:
+            Seconds waited
+        """
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Taking the token now (possibly going negative) keeps waiting threads in order
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class MPClient:
+    """Minimal Materials Project REST client: one session, rate limited, batched summary queries."""
+
+    def __init__(self, api_key: Optional[str] = None, endpoint: Optional[str] = None,
+                 rate: Optional[float] = None, timeout: float = 60.0, retries: int = 5, session=None):
+        """
+        Args:
+            session: HTTP session with the requests API (default: a new requests.Session)
+        """
+        self._owns_session = session is None
+        if session is None:
+            import requests
+            session = requests.Session()
+
+        self.endpoint = (endpoint or config.MP_ENDPOINT or DEFAULT_ENDPOINT).rstrip("/")
+        self.bucket = TokenBucket(config.MP_RATE_LIMIT if rate is None else rate)
+        self.timeout = timeout
+        self.retries = retries
+        self.requests = 0
+        self.session = session
+        if api_key:
+            self.session.headers["X-API-KEY"] = api_key
+
+    def __enter__(self) -> "MPClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self._owns_session:
+            self.session.close()
+
+    def get(self, path: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        JSON response of one GET request, retrying rate-limited (429) and unavailable (503) answers.
+
+        Raises:
+            RuntimeError: On other HTTP errors, or when the retries are used up
+        """
+        for attempt in range(self.retries + 1):
+            self.bucket.acquire()
+            self.requests += 1
+            response = self.session.get(f"{self.endpoint}/{path.lstrip('/')}", params=params,
+                                        timeout=self.timeout)
+            if response.status_code in (429, 503) and attempt < self.retries:
+                retry_after = response.headers.get("Retry-After", "")
+                time.sleep(float(retry_after) if retry_after.replace(".", "", 1).isdigit() else 2.0 ** attempt)
+                continue
+            if response.status_code != 200:
+                raise RuntimeError(f"HTTP {response.status_code} from {self.endpoint}: {response.text[:200]}")
+            return response.json()
+        raise RuntimeError(f"Still rate limited by {self.endpoint} after {self.retries} retries")
+
+    def summaries(self, material_ids: List[str], fields=("material_id", "structure")) -> List[Dict[str, Any]]:
+        """Summary documents of the given materials (missing ids are simply absent)."""
+        payload = self.get("/materials/summary/", {
+            "material_ids": ",".join(material_ids),
+            "_fields": ",".join(fields),
+            "_limit": len(material_ids),
+        })
+        return payload.get("data", [])
+
+
+def structure_to_atoms(structure: Dict[str, Any], material_id: Optional[str] = None) -> Atoms:
+    """
+    Atoms from a pymatgen Structure dictionary (as returned by the MP API).
+
+    Disordered sites take their majority species, as in cod_import.normalize_structure.
+    """
+    numbers, scaled = [], []
+    for site in structure["sites"]:
+        species = max(site["species"], key=lambda s: s.get("occu", 1.0))
+        numbers.append(atomic_numbers[species["element"]])
+        scaled.append(site["abc"])
+    atoms = Atoms(numbers=numbers, cell=np.array(structure["lattice"]["matrix"], dtype=float), pbc=True,
+                  scaled_positions=np.array(scaled, dtype=float).reshape(-1, 3))
+    if material_id:
+        atoms.info["mp_id"] = material_id
+    return atoms
+
+
+def _convert(doc: Dict[str, Any]):
+    try:
+        return structure_to_atoms(doc["structure"], doc["material_id"]), None
+    except Exception as e:
+        return None, f"Could not convert structure: {str(e) or type(e).__name__}"
+
+
+def canonical_mp_id(value: str) -> str:
+    """
+    Raises:
+        ValueError: If value is not a Materials Project id ("mp-149", "mvc-123", ...)
+    """
+    text = str(value).strip().lower()
+    prefix, _, number = text.partition("-")
+    if not (prefix.isalpha() and number.isdigit()):
+        raise ValueError(f"'{value}' is not a Materials Project id")
+    return text
+
+
+def fetch_materials_project(ids: Iterable[str], api_key: Optional[str] = None, batch_size: int = 100,
+                            processes: int = 1, skip_existing: bool = True, rate: Optional[float] = None,
+                            store: Optional[SharedCache] = None,
+                            client: Optional[MPClient] = None) -> List[Dict[str, Any]]:
+    """
+    Fetch many Materials Project structures with batched queries and store them.
+
+    Args:
+        ids: Material ids such as "mp-149"
+        api_key: MP API key (default: MP_API_KEY environment variable)
+        batch_size: Ids per summary query
+        processes: Processes converting structures (1 converts in this process)
+        skip_existing: Do not fetch ids that are already stored
+        rate: Requests per second (default: CHATMAT_MP_RATE_LIMIT)
+        store: Structure store (default: cache.structure_cache)
+        client: MPClient to use (default: a new one for api_key and rate)
+
+    Returns:
+        One report per id, in input order: {"material_id", "status" ("ok",
+        "skipped" or "error"), "n_atoms", "formula"} or {..., "error"}
+    """
+    store = store if store is not None else structure_cache
+    reports: List[Dict[str, Any]] = []
+    todo: Dict[str, List[int]] = {}
+    for value in ids:
+        try:
+            material_id = canonical_mp_id(value)
+        except ValueError as e:
+            reports.append({"material_id": str(value), "status": "error", "error": str(e)})
+            continue
+        reports.append({"material_id": material_id, "status": "skipped"})
+        if not (skip_existing and f"mp:{material_id}" in store):
+            todo.setdefault(material_id, []).append(len(reports) - 1)
+
+    def report(material_id, **fields):
+        for index in todo[material_id]:
+            reports[index] = {"material_id": material_id, **fields}
+
+    pending = list(todo)
+    if not pending:
+        return reports
+    pool = ProcessPoolExecutor(max_workers=processes) if processes > 1 else None
+    try:
+        client = client or MPClient(api_key or os.getenv("MP_API_KEY"), rate=rate)
+        with client:
+            for start in range(0, len(pending), batch_size):
+                batch = pending[start:start + batch_size]
+                try:
+                    docs = [doc for doc in client.summaries(batch) if doc.get("material_id") in todo]
+                except Exception as e:
+                    for material_id in batch:
+                        report(material_id, status="error", error=str(e) or type(e).__name__)
+                    continue
+                results = pool.map(_convert, docs, chunksize=16) if pool else map(_convert, docs)
+                stored = []
+                for doc, (atoms, error) in zip(docs, results):
+                    if atoms is None:
+                        report(doc["material_id"], status="error", error=error)
+                    else:
+                        stored.append((f"mp:{doc['material_id']}", atoms))
+                        report(doc["material_id"], status="ok", n_atoms=len(atoms), formula=composition(atoms))
+                store.set_many(stored)
+                found = {doc["material_id"] for doc in docs}
+                for material_id in batch:
+                    if material_id not in found:
+                        report(material_id, status="error", error="Not found in Materials Project")
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return reports
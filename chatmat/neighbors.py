@@ -0,0 +1,170 @@
+"""
+Verlet neighbor lists shared across evaluations of the same topology.
+
+Relaxation steps, MD frames and repeated evaluations of one structure move
+the atoms only a little, yet a model rebuilds its neighbor list from scratch
+for each of them. A VerletList is built with a cutoff of `cutoff + skin`
+(by ASE's cell-list algorithm, O(N)). It stays valid until some atom has
+moved more than skin / 2 from where it was when the list was built, or the
+cell, pbc or species change. Until then, the pairs within `cutoff` are
+found by recomputing the distances of the listed pairs only.
+
+shared_neighbor_list(atoms) returns the list for a structure's topology
+(species, pbc and atom count), so frames that are separate Atoms objects
+share one list. The lists are kept in a small LRU (CHATMAT_NEIGHBOR_CACHE_SIZE).
+VerletList has the update()/get_neighbors() interface of ase.neighborlist.
+NeighborList. It is a building block: calculators.py passes it to model
+calculators that accept one (set_neighbor_list()) when
+CHATMAT_NEIGHBOR_LISTS is set. The bundled iann MLCalculator builds its own
+graph and does not take one.
+
+    nl = shared_neighbor_list(atoms)            # CHATMAT_NEIGHBOR_CUTOFF, CHATMAT_NEIGHBOR_SKIN
+    i, j, vectors, distances = nl.pairs(atoms)  # both directions, within the cutoff
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import numpy as np
+from ase import Atoms
+from ase.neighborlist import primitive_neighbor_list
+
+try:
+    from . import config
+except ImportError:
+    import config
+
+# Cell and positions count as unchanged within this tolerance (A)
+TOLERANCE = 1e-10
+
+
+class VerletList:
+    """Neighbor list with a skin, rebuilt only when an atom has moved more than skin / 2."""
+
+    def __init__(self, cutoff: float, skin: float = 0.3):
+        self.cutoff = float(cutoff)
+        self.skin = float(skin)
+        self.builds = 0
+        self.updates = 0
+        self._lock = threading.Lock()
+        self._positions = None
+        self._cell = None
+        self._pbc = None
+        self._numbers = None
+        self._i = self._j = self._shifts = None
+        self._first = None
+
+    def __len__(self) -> int:
+        return 0 if self._i is None else len(self._i)
+
+    def __repr__(self) -> str:
+        return f"VerletList(cutoff={self.cutoff}, skin={self.skin}, pairs={len(self)}, builds={self.builds})"
+
+    def needs_rebuild(self, atoms: Atoms) -> bool:
+        if self._positions is None or len(atoms) != len(self._positions):
+            return True
+        if (atoms.pbc != self._pbc).any() or not np.array_equal(atoms.numbers, self._numbers):
+            return True
+        if np.abs(atoms.cell.array - self._cell).max() > TOLERANCE:
+            return True
+        if not len(atoms):
+            return False
+        moved = atoms.positions - self._positions
+        return np.einsum("ij,ij->i", moved, moved).max() > (self.skin / 2) ** 2
+
+    def build(self, atoms: Atoms) -> None:
+        i, j, shifts = primitive_neighbor_list("ijS", atoms.pbc, atoms.cell.array, atoms.positions,
+                                               self.cutoff + self.skin, numbers=atoms.numbers,
+                                               self_interaction=False, use_scaled_positions=False)
+        order = np.argsort(i, kind="stable")
+        self._i, self._j, self._shifts = i[order], j[order], shifts[order]
+        self._first = np.searchsorted(self._i, np.arange(len(atoms) + 1))
+        self._positions = atoms.positions.copy()
+        self._cell = atoms.cell.array.copy()
+        self._pbc = atoms.pbc.copy()
+        self._numbers = atoms.numbers.copy()
+        self.builds += 1
+
+    def update(self, atoms: Atoms) -> bool:
+        """
+        Make the list valid for atoms.
+
+        Returns:
+            True if the list was rebuilt
+        """
+        with self._lock:
+            return self._update(atoms)
+
+    def _update(self, atoms: Atoms) -> bool:
+        self.updates += 1
+        if self.needs_rebuild(atoms):
+            self.build(atoms)
+            return True
+        return False
+
+    def get_neighbors(self, a: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Neighbors of atom a within cutoff + skin, as ase.neighborlist.NeighborList
+        (bothways=True) returns them.
+
+        Returns:
+            (indices, offsets): neighbor j is at positions[j] + offsets @ cell
+        """
+        start, stop = self._first[a], self._first[a + 1]
+        return self._j[start:stop], self._shifts[start:stop]
+
+    def pairs(self, atoms: Atoms) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Pairs within cutoff at the current positions, updating the list if needed.
+
+        Returns:
+            (i, j, vectors from i to j, distances); every pair appears in both directions
+        """
+        with self._lock:
+            self._update(atoms)
+            i, j, shifts = self._i, self._j, self._shifts
+        vectors = atoms.positions[j] - atoms.positions[i] + shifts @ atoms.cell.array
+        distances = np.sqrt(np.einsum("ij,ij->i", vectors, vectors))
+        keep = distances <= self.cutoff
+        return i[keep], j[keep], vectors[keep], distances[keep]
+
+
+def topology_key(atoms: Atoms, cutoff: float, skin: float) -> str:
+    """Key shared by structures with the same species order and pbc (the cell and positions may differ)."""
+    digest = hashlib.blake2b(np.ascontiguousarray(atoms.numbers, dtype=np.int64).tobytes(), digest_size=16)
+    digest.update(np.asarray(atoms.pbc, dtype=bool).tobytes())
+    return f"{len(atoms)}:{digest.hexdigest()}:{cutoff:g}:{skin:g}"
+
+
+_lists: "OrderedDict[str, VerletList]" = OrderedDict()
+_lists_lock = threading.Lock()
+
+
+def shared_neighbor_list(atoms: Atoms, cutoff: Optional[float] = None, skin: Optional[float] = None) -> VerletList:
+    """
+    The Verlet list of atoms' topology, updated for its current positions.
+
+    Args:
+        cutoff: Pair cutoff in A (default: CHATMAT_NEIGHBOR_CUTOFF)
+        skin: Verlet skin in A (default: CHATMAT_NEIGHBOR_SKIN)
+    """
+    cutoff = config.NEIGHBOR_CUTOFF if cutoff is None else cutoff
+    skin = config.NEIGHBOR_SKIN if skin is None else skin
+    key = topology_key(atoms, cutoff, skin)
+    with _lists_lock:
+        nl = _lists.get(key)
+        if nl is None:
+            nl = _lists[key] = VerletList(cutoff, skin)
+            while len(_lists) > max(1, config.NEIGHBOR_CACHE_SIZE):
+                _lists.popitem(last=False)
+        else:
+            _lists.move_to_end(key)
+    nl.update(atoms)
+    return nl
+
+
+def clear() -> None:
+    with _lists_lock:
+        _lists.clear()
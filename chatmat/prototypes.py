@@ -0,0 +1,220 @@
+"""
+Table-driven crystal prototype engine for ChatMat.
+
+Every crystal structure type is a row of PROTOTYPES: a spacegroup, the
+Wyckoff sites (species index + fractional coordinates, optionally naming a
+free parameter) and default free-parameter values. Positions are expanded by
+applying all symmetry operations of the spacegroup at once with NumPy, and the
+expanded fractional coordinates are cached per (spacegroup, sites), so a
+repeated build only has to scale the cached coordinates by the cell.
+
+Adding a structure type is a matter of adding a row to PROTOTYPES.
+"""
+
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from ase import Atoms
+from ase.data import atomic_numbers
+from ase.geometry import cellpar_to_cell
+
+# --- Prototype table ---
+# "lattice": "cubic" (a), "hexagonal" (a, c, gamma=120) or "tetragonal" (a, c)
+# "sites": (species index into the elements list, (x, y, z)); a string coordinate
+#          names a free parameter from "params"
+# "c_over_a": default c/a ratio for non-cubic lattices
+PROTOTYPES: Dict[str, Dict[str, Any]] = {
+    # Elements
+    "fcc": {"spacegroup": 225, "lattice": "cubic", "sites": [(0, (0, 0, 0))]},
+    "bcc": {"spacegroup": 229, "lattice": "cubic", "sites": [(0, (0, 0, 0))]},
+    "sc": {"spacegroup": 221, "lattice": "cubic", "sites": [(0, (0, 0, 0))]},
+    "diamond": {"spacegroup": 227, "lattice": "cubic", "sites": [(0, (0, 0, 0))]},
+    "hcp": {"spacegroup": 194, "lattice": "hexagonal", "c_over_a": 1.633,
+            "sites": [(0, (1/3, 2/3, 1/4))]},
+
+    # Binary and ternary compounds
+    "rocksalt": {"spacegroup": 225, "lattice": "cubic",
+                 "sites": [(0, (0, 0, 0)), (1, (0.5, 0.5, 0.5))]},
+    "zincblende": {"spacegroup": 216, "lattice": "cubic",
+                   "sites": [(0, (0, 0, 0)), (1, (0.25, 0.25, 0.25))]},
+    "wurtzite": {"spacegroup": 186, "lattice": "hexagonal", "c_over_a": 1.63,
+                 "sites": [(0, (1/3, 2/3, 0)), (1, (1/3, 2/3, "u"))],
+                 "params": {"u": 0.375}},
+    "perovskite": {"spacegroup": 221, "lattice": "cubic",
+                   "sites": [(0, (0, 0, 0)), (1, (0.5, 0.5, 0.5)), (2, (0, 0.5, 0.5))]},
+    "rutile": {"spacegroup": 136, "lattice": "tetragonal", "c_over_a": 0.64,
+               "sites": [(0, (0, 0, 0)), (1, ("x", "x", 0))],
+               "params": {"x": 0.3053}},
+    # alpha-quartz, P3_221
+    "quartz": {"spacegroup": 154, "lattice": "hexagonal", "c_over_a": 1.10,
+               "sites": [(0, ("x_si", 0, 2/3)), (1, ("x_o", "y_o", "z_o"))],
+               "params": {"x_si": 0.4697, "x_o": 0.4135, "y_o": 0.2669, "z_o": 0.7858}},
+    # ideal beta-cristobalite, Fd-3m
+    "cristobalite": {"spacegroup": 227, "lattice": "cubic",
+                     "sites": [(0, (0, 0, 0)), (1, (0.125, 0.125, 0.125))]},
+}
+
+# Tolerance (in fractional coordinates) for merging symmetry-equivalent positions
+SYMPREC = 1e-5
+
+
+@lru_cache(maxsize=None)
+def symmetry_operations(spacegroup: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Return all symmetry operations of a spacegroup as stacked arrays.
+
+    Returns:
+        (rotations, translations) with shapes (n_ops, 3, 3) and (n_ops, 3),
+        including inversion and centering translations
+    """
+    from ase.spacegroup import Spacegroup
+
+    symops = Spacegroup(spacegroup).get_symop()
+    rotations = np.array([rot for rot, _ in symops], dtype=float)
+    translations = np.array([trans for _, trans in symops], dtype=float)
+    rotations.flags.writeable = False
+    translations.flags.writeable = False
+    return rotations, translations
+
+
+@lru_cache(maxsize=1024)
+def expand_wyckoff(spacegroup: int, sites: Tuple[Tuple[float, float, float], ...]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Expand Wyckoff sites to all symmetry-equivalent fractional positions.
+
+    Args:
+        spacegroup: International spacegroup number
+        sites: Fractional coordinates of the Wyckoff sites
+
+    Returns:
+        (scaled_positions, site_index): the expanded positions in [0, 1) and,
+        for every position, the index of the site it was generated from.
+        Both arrays are cached and read-only.
+    """
+    rotations, translations = symmetry_operations(spacegroup)
+    basis = np.asarray(sites, dtype=float)
+
+    # (n_ops, n_sites, 3): every operation applied to every site at once
+    images = np.einsum("oij,sj->osi", rotations, basis) + translations[:, None, :]
+    images = np.mod(images, 1.0)
+    # Integer grid keys; the modulo folds coordinates just below 1 onto 0
+    grid = int(round(1 / SYMPREC))
+    keys = np.mod(np.round(images * grid).astype(np.int64), grid)
+
+    positions = []
+    site_index = []
+    for s in range(len(basis)):
+        # Keep the first occurrence of every distinct image, in operation order
+        _, first = np.unique(keys[:, s], axis=0, return_index=True)
+        first.sort()
+        positions.append(images[first, s])
+        site_index.append(np.full(len(first), s))
+
+    scaled_positions = np.concatenate(positions)
+    site_index = np.concatenate(site_index)
+    scaled_positions.flags.writeable = False
+    site_index.flags.writeable = False
+    return scaled_positions, site_index
+
+
+def _resolve_sites(prototype: Dict[str, Any], params: Dict[str, float]) -> Tuple[Tuple[float, float, float], ...]:
+    """Substitute free parameters into the Wyckoff coordinates of a prototype."""
+    values = {**prototype.get("params", {}), **params}
+    return tuple(
+        tuple(float(values[x]) if isinstance(x, str) else float(x) for x in xyz)
+        for _, xyz in prototype["sites"]
+    )
+
+
+def prototype_cellpar(structure: str, a: float, c: Optional[float] = None) -> List[float]:
+    """Cell parameters [a, b, c, alpha, beta, gamma] of a prototype for lattice constants a (and c)."""
+    prototype = PROTOTYPES[structure]
+    lattice = prototype["lattice"]
+    if lattice == "cubic":
+        return [a, a, a, 90.0, 90.0, 90.0]
+    c = c or a * prototype["c_over_a"]
+    return [a, a, c, 90.0, 90.0, 120.0 if lattice == "hexagonal" else 90.0]
+
+
+def n_species(structure: str) -> int:
+    """Number of distinct elements a prototype needs."""
+    return max(species for species, _ in PROTOTYPES[structure]["sites"]) + 1
+
+
+def prototype_size(structure: str) -> int:
+    """Number of atoms in the conventional unit cell of a prototype (from the cached expansion)."""
+    prototype = PROTOTYPES[structure]
+    return len(expand_wyckoff(prototype["spacegroup"], _resolve_sites(prototype, {}))[0])
+
+
+def _atomic_numbers(symbols: Sequence[str]) -> np.ndarray:
+    try:
+        return np.array([atomic_numbers[s] for s in symbols], dtype=int)
+    except KeyError as e:
+        raise ValueError(f"Unknown element symbol: {e.args[0]}")
+
+
+def build_prototype(structure: str, elements: List[str], a: float, c: Optional[float] = None,
+                    **params: float) -> Atoms:
+    """
+    Build the conventional unit cell of a tabulated prototype.
+
+    Args:
+        structure: Prototype name (key of PROTOTYPES, e.g. "rocksalt")
+        elements: Element symbols, one per species of the prototype
+        a: Lattice parameter a
+        c: Optional lattice parameter c (non-cubic prototypes)
+        **params: Overrides for free Wyckoff parameters (e.g., u=0.38)
+
+    Returns:
+        Atoms object of the unit cell
+
+    Raises:
+        ValueError: If the prototype is unknown or not enough elements are given
+    """
+    if structure not in PROTOTYPES:
+        raise ValueError(f"Unknown structure type '{structure}'. Known: {', '.join(PROTOTYPES)}")
+    required = n_species(structure)
+    if len(elements) < required:
+        raise ValueError(f"{structure.capitalize()} structure requires {required} elements, got {len(elements)}")
+
+    prototype = PROTOTYPES[structure]
+    species = np.array([s for s, _ in prototype["sites"]])
+    scaled_positions, site_index = expand_wyckoff(prototype["spacegroup"], _resolve_sites(prototype, params))
+    numbers = _atomic_numbers(elements[:required])[species[site_index]]
+    cell = cellpar_to_cell(prototype_cellpar(structure, a, c))
+    return Atoms(numbers=numbers, scaled_positions=scaled_positions, cell=cell, pbc=True)
+
+
+def build_from_sites(spacegroup: int, sites: List[Tuple[str, Tuple[float, float, float]]],
+                     cellpar: List[float]) -> Atoms:
+    """
+    Build a unit cell from an explicit spacegroup and Wyckoff site list.
+
+    Args:
+        spacegroup: International spacegroup number
+        sites: [(symbol, (x, y, z)), ...] fractional Wyckoff coordinates
+        cellpar: [a, b, c, alpha, beta, gamma]
+
+    Returns:
+        Atoms object of the unit cell
+    """
+    symbols, coords = zip(*sites)
+    scaled_positions, site_index = expand_wyckoff(
+        spacegroup, tuple(tuple(float(x) for x in xyz) for xyz in coords))
+    numbers = _atomic_numbers(symbols)[site_index]
+    return Atoms(numbers=numbers, scaled_positions=scaled_positions,
+                 cell=cellpar_to_cell(cellpar), pbc=True)
+
+
+def warm_cache() -> int:
+    """
+    Expand every tabulated prototype once so that later builds hit the cache.
+
+    Returns:
+        Number of prototypes expanded
+    """
+    for prototype in PROTOTYPES.values():
+        expand_wyckoff(prototype["spacegroup"], _resolve_sites(prototype, {}))
+    return len(PROTOTYPES)
@@ -0,0 +1,200 @@
+"""
+Append-only on-disk store of computed structures and results.
+
+Every /calculate/ result is appended to a directory (CHATMAT_RESULTS_DIR):
+
+    numbers.i32     atomic numbers of all stored structures, back to back
+    positions.f64   (N, 3) positions in A
+    forces.f64      (N, 3) forces in eV/A (NaN when the result was reused
+                    from an equivalent structure and no forces were computed)
+    results.sqlite  one row per result: the atom offset and count into the
+                    arrays, plus metadata (material, source, request params,
+                    model, energy, cell, timings, ...)
+
+Arrays are read back through np.memmap, so slicing one result out of a
+store of any size neither copies nor loads the rest. Appends from several
+worker processes are serialized with a file lock; the metadata row is
+written after its arrays, so readers never see a row without its data.
+"""
+
+import fcntl
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from ase import Atoms
+
+try:
+    from . import config
+except ImportError:
+    import config
+
+# name -> (dtype, values per atom)
+ARRAYS = {"numbers": (np.dtype("<i4"), 1), "positions": (np.dtype("<f8"), 3), "forces": (np.dtype("<f8"), 3)}
+_FILES = {"numbers": "numbers.i32", "positions": "positions.f64", "forces": "forces.f64"}
+_JSON_COLUMNS = ("params", "cell", "pbc", "info", "timings")
+
+
+class ResultsStore:
+    """Memory-mapped arrays plus SQLite metadata for computed structures."""
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path: Store directory (default: CHATMAT_RESULTS_DIR; disabled if unset)
+        """
+        self._path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._maps: Dict[str, np.memmap] = {}
+
+    @property
+    def path(self) -> Optional[str]:
+        return self._path or config.RESULTS_DIR
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, _FILES[name])
+
+    def _connection(self) -> sqlite3.Connection:
+        """Per-thread, per-process SQLite connection (connections must not cross a fork)."""
+        path = os.path.join(self.path, "results.sqlite")
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid() or self._local.path != path:
+            os.makedirs(self.path, exist_ok=True)
+            conn = sqlite3.connect(path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS results ("
+                         "id INTEGER PRIMARY KEY AUTOINCREMENT, offset INTEGER, n_atoms INTEGER, "
+                         "material TEXT, source TEXT, params TEXT, model TEXT, energy REAL, max_force REAL, "
+                         "cell TEXT, pbc TEXT, info TEXT, timings TEXT, cache_key TEXT, created REAL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS results_material ON results (material)")
+            conn.execute("CREATE INDEX IF NOT EXISTS results_cache_key ON results (cache_key)")
+            conn.commit()
+            self._local.conn, self._local.pid, self._local.path = conn, os.getpid(), path
+        return conn
+
+    @contextmanager
+    def _append_lock(self):
+        os.makedirs(self.path, exist_ok=True)
+        with self._lock, open(os.path.join(self.path, "append.lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def append(self, atoms: Atoms, energy: float, forces: Optional[np.ndarray] = None,
+               material: Optional[str] = None, source: Optional[str] = None,
+               params: Optional[dict] = None, timings: Optional[dict] = None,
+               cache_key: Optional[str] = None) -> int:
+        """
+        Store a computed structure and its result.
+
+        Returns:
+            The result id
+        """
+        n_atoms = len(atoms)
+        if forces is None:
+            forces = np.full((n_atoms, 3), np.nan)
+        forces = np.asarray(forces, dtype=float)
+        max_force = float(np.linalg.norm(forces, axis=1).max()) if n_atoms and not np.isnan(forces).any() else None
+        data = {"numbers": atoms.numbers, "positions": atoms.positions, "forces": forces}
+
+        with self._append_lock():
+            # The positions file defines the number of stored atoms; a partial
+            # append interrupted by a crash is cut off here
+            offset = self._stored_atoms()
+            for name, (dtype, width) in ARRAYS.items():
+                with open(self._file(name), "ab") as f:
+                    f.truncate(offset * width * dtype.itemsize)
+                    f.write(np.ascontiguousarray(data[name], dtype=dtype).tobytes())
+            conn = self._connection()
+            cursor = conn.execute(
+                "INSERT INTO results (offset, n_atoms, material, source, params, model, energy, max_force, "
+                "cell, pbc, info, timings, cache_key, created) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (offset, n_atoms, material, source, json.dumps(params or {}, default=str), config.MODEL_NAME,
+                 float(energy), max_force, json.dumps(atoms.cell.array.tolist()), json.dumps(atoms.pbc.tolist()),
+                 json.dumps(atoms.info, default=_jsonable), json.dumps(timings or {}), cache_key, time.time()))
+            conn.commit()
+        return cursor.lastrowid
+
+    def _stored_atoms(self) -> int:
+        path = self._file("positions")
+        dtype, width = ARRAYS["positions"]
+        return os.path.getsize(path) // (width * dtype.itemsize) if os.path.exists(path) else 0
+
+    def _record(self, row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        record = dict(row)
+        for column in _JSON_COLUMNS:
+            record[column] = json.loads(record[column]) if record[column] else None
+        return record
+
+    def get(self, result_id: int) -> Optional[Dict[str, Any]]:
+        """Metadata of one result, or None."""
+        return self._record(self._connection().execute("SELECT * FROM results WHERE id = ?", (result_id,)).fetchone())
+
+    def find(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Latest result stored for a /calculate/ cache key (computed with the current model), or None."""
+        row = self._connection().execute(
+            "SELECT * FROM results WHERE cache_key = ? AND model = ? ORDER BY id DESC LIMIT 1",
+            (cache_key, config.MODEL_NAME)).fetchone()
+        return self._record(row)
+
+    def query(self, material: Optional[str] = None, model: Optional[str] = None,
+              limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        """Metadata of stored results, newest first, optionally filtered by material and model."""
+        where, args = [], []
+        if material:
+            where.append("material = ? COLLATE NOCASE")
+            args.append(material)
+        if model:
+            where.append("model = ?")
+            args.append(model)
+        sql = "SELECT * FROM results" + (" WHERE " + " AND ".join(where) if where else "")
+        rows = self._connection().execute(sql + " ORDER BY id DESC LIMIT ? OFFSET ?", (*args, limit, offset))
+        return [self._record(row) for row in rows]
+
+    def array(self, record: Dict[str, Any], name: str) -> np.ndarray:
+        """Read-only view of one result's numbers, positions or forces (no copy)."""
+        dtype, width = ARRAYS[name]
+        end = record["offset"] + record["n_atoms"]
+        if record["n_atoms"] == 0:
+            return np.empty((0, width) if width > 1 else (0,), dtype=dtype)
+        with self._lock:
+            mapped = self._maps.get(name)
+            if mapped is None or len(mapped) < end:
+                # The files only grow: remap once a result beyond the current mapping is requested
+                size = os.path.getsize(self._file(name)) // (width * dtype.itemsize)
+                shape = (size, width) if width > 1 else (size,)
+                mapped = np.memmap(self._file(name), dtype=dtype, mode="r", shape=shape)
+                self._maps[name] = mapped
+        return mapped[record["offset"]:end]
+
+    def atoms(self, record: Dict[str, Any]) -> Atoms:
+        """The stored structure of a result."""
+        return Atoms(numbers=self.array(record, "numbers"), positions=self.array(record, "positions"),
+                     cell=record["cell"], pbc=record["pbc"], info=record["info"] or {})
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+results_store = ResultsStore()
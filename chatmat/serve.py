@@ -0,0 +1,196 @@
+"""
+Multi-worker (pre-fork) launcher for the ChatMat backend.
+
+The parent process warms up and loads the foundation model once, binds the
+listening socket and then forks the workers. The model weights are therefore
+shared between workers copy-on-write instead of being loaded N times, and
+the structure/result caches are shared through a SQLite file in
+CHATMAT_CACHE_DIR (a temporary directory if unset). Each worker limits its
+torch/BLAS threads to its share of the CPU cores and, with CHATMAT_CPU_AFFINITY,
+is pinned to its own core set (see threads.py).
+
+Workers that die are restarted after an exponentially growing delay. A
+worker that crashes more than CHATMAT_WORKER_MAX_RESTARTS times within
+CHATMAT_WORKER_RESTART_WINDOW seconds (a bad model path, a CUDA error at
+warm-up, ...) stops the whole server with a non-zero exit status instead of
+restarting forever.
+
+Usage:
+    python -m chatmat.backend --workers 4
+"""
+
+import os
+import signal
+import socket
+import tempfile
+import time
+from collections import deque
+from types import ModuleType
+from typing import Deque, Dict, Optional
+
+try:
+    from . import config
+    from .calculators import get_calculator
+    from .threads import configure_worker, limit_threads, threads_per_worker
+except ImportError:
+    import config
+    from calculators import get_calculator
+    from threads import configure_worker, limit_threads, threads_per_worker
+
+
+# Longest delay before restarting a crashed worker (s)
+MAX_RESTART_DELAY = 30.0
+
+
+class RestartBudget:
+    """Backoff delays and a restart limit per worker index."""
+
+    def __init__(self, max_restarts: int, window: float, base_delay: float):
+        self.max_restarts = max_restarts
+        self.window = window
+        self.base_delay = base_delay
+        self._restarts: Dict[int, Deque[float]] = {}
+
+    def next_delay(self, index: int, now: Optional[float] = None) -> Optional[float]:
+        """
+        Record a crash of worker index.
+
+        Returns:
+            Seconds to wait before restarting it, or None if it has used up its
+            restarts within the window
+        """
+        now = time.monotonic() if now is None else now
+        recent = self._restarts.setdefault(index, deque())
+        while recent and now - recent[0] > self.window:
+            recent.popleft()
+        if len(recent) >= self.max_restarts:
+            return None
+        delay = min(MAX_RESTART_DELAY, self.base_delay * 2 ** len(recent))
+        recent.append(now)
+        return delay
+
+
+def _bind(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(backend: ModuleType, sock: socket.socket, index: int, workers: int) -> None:
+    """Body of a forked worker: pin it and limit its threads, then serve on the inherited socket."""
+    import uvicorn
+
+    applied = configure_worker(index, workers)
+    # The model is already loaded; only the per-worker evaluation warm-up is left
+    config.WARMUP = ["model"] if "model" in config.WARMUP else []
+    backend.STARTUP.update(ready=False, steps={}, errors={})
+
+    cores = f" on cores {applied['cores']}" if "cores" in applied else ""
+    print(f"👷 Worker {index} (pid {os.getpid()}) serving with {applied['env']} thread(s){cores}")
+    server = uvicorn.Server(uvicorn.Config(backend.app, lifespan="on"))
+    server.run(sockets=[sock])
+
+
+def serve(backend: ModuleType, host: Optional[str] = None, port: Optional[int] = None,
+          workers: Optional[int] = None) -> int:
+    """
+    Run the backend with several pre-forked worker processes.
+
+    Args:
+        backend: The chatmat.backend module (provides app, warm_up and STARTUP)
+        host: Bind address (default: CHATMAT_HOST)
+        port: Bind port (default: CHATMAT_PORT)
+        workers: Number of worker processes (default: CHATMAT_WORKERS)
+
+    Returns:
+        Exit status: 0 after a normal shutdown, 1 if a worker kept crashing
+    """
+    host = host or config.HOST
+    port = port or config.PORT
+    workers = workers or config.WORKERS
+    if not hasattr(os, "fork"):
+        raise RuntimeError("Multi-worker mode needs os.fork(); run a single worker on this platform.")
+
+    n_threads = threads_per_worker(workers)
+    # Set before the model runtime is imported, so the parent does not spin up a full pool;
+    # torch's inter-op pool can only be sized once, so it is sized here and inherited
+    limit_threads(n_threads, config.INTEROP_THREADS)
+    if not config.CACHE_DIR:
+        config.CACHE_DIR = tempfile.mkdtemp(prefix="chatmat-cache-")
+    print(f"🚀 Starting {workers} workers on {host}:{port} "
+          f"({n_threads} thread(s) each, shared cache in {config.CACHE_DIR})")
+
+    # Everything loaded here is shared with the workers copy-on-write
+    backend.warm_up([step for step in config.WARMUP if step != "model"])
+    if "model" in config.WARMUP and config.MODEL_NAME != "mock":
+        try:
+            get_calculator()
+        except Exception as e:
+            print(f"⚠️ Could not preload the model before fork: {e}")
+
+    sock = _bind(host, port)
+    children: Dict[int, int] = {}
+    stopping = False
+    failed = False
+    budget = RestartBudget(config.WORKER_MAX_RESTARTS, config.WORKER_RESTART_WINDOW, config.WORKER_RESTART_DELAY)
+
+    def spawn(index: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                _run_worker(backend, sock, index, workers)
+            except BaseException as e:
+                print(f"❌ Worker {index} crashed: {e}")
+                code = 1
+            finally:
+                os._exit(code)
+        children[pid] = index
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    for index in range(workers):
+        spawn(index)
+
+    # Supervise: restart workers that die unexpectedly (with backoff) until asked to stop
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        index = children.pop(pid, None)
+        if index is None or stopping:
+            continue
+        delay = budget.next_delay(index)
+        if delay is None:
+            print(f"❌ Worker {index} (pid {pid}) exited with status {status} and crashed "
+                  f"{budget.max_restarts} times within {budget.window:g} s; stopping the server")
+            failed = True
+            stop(None, None)
+            continue
+        print(f"⚠️ Worker {index} (pid {pid}) exited with status {status}; restarting in {delay:g} s")
+        # Short sleeps, so that SIGTERM during the backoff is handled promptly
+        deadline = time.monotonic() + delay
+        while not stopping and time.monotonic() < deadline:
+            time.sleep(min(0.1, delay))
+        if not stopping:
+            spawn(index)
+
+    sock.close()
+    print("👋 All workers stopped")
+    return 1 if failed else 0
@@ -0,0 +1,104 @@
+"""
+Request coalescing ("single flight") for ChatMat.
+
+When the same work is requested several times while it is still running
+(a popular example clicked by many users at once, or several requests for
+the same Materials Project entry), only the first call runs it. The others
+wait for it and receive its result, or its exception. Once the call has
+finished, the next identical call runs again (the caches in cache.py keep
+finished results).
+
+Coalescing is per process; workers of a multi-worker deployment share
+finished results through the SQLite caches instead.
+
+    @coalesce(fetches)
+    def fetch_from_cod(cod_id): ...
+"""
+
+import functools
+import threading
+from typing import Any, Callable, Dict, Optional
+
+try:
+    from .cache import SharedCache
+except ImportError:
+    from cache import SharedCache
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Runs concurrent calls with the same key once and shares the outcome."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self.coalesced = 0  # calls that were served by another call's result
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def do(self, key: str, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Run fn(*args, **kwargs), unless a call with the same key is already running.
+
+        Callers that join a running call get result.copy() when the result has
+        a copy method (Atoms, dicts), so they can modify it independently.
+
+        Raises:
+            Whatever fn raised, in the calling thread and in every waiting one
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result.copy() if hasattr(call.result, "copy") else call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+def coalesce(flight: SingleFlight) -> Callable:
+    """Decorator: coalesce concurrent calls of a function with equal arguments."""
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = SharedCache.make_key(fn.__module__, fn.__qualname__, args, sorted(kwargs.items()))
+            return flight.do(key, fn, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# /calculate/ computations, keyed by the result-cache key of the request
+calculations = SingleFlight("calculations")
+# Structure downloads from external databases
+fetches = SingleFlight("fetches")
+# LLM provider calls
+llm_calls = SingleFlight("llm")
@@ -0,0 +1,283 @@
+"""
+Surface slabs and adsorbates on top of the bulk cells of create_structure().
+
+    build_slab("Pt", (1, 1, 1), size=(4, 4), layers=4, vacuum=7.5)
+    build_slabs("Cu", max_index=2)                     # every distinct facet up to (2, 2, 1)
+    add_adsorbate(slab, "CO", site="hollow")
+
+Elemental fcc, bcc, hcp and diamond crystals use ASE's named builders for
+their low-index facets (fcc111, bcc110, hcp0001, ...). There `layers` counts
+atomic layers and the surface cell is the primitive one, so "Pt(111) 4x4,
+4 layers" has 64 atoms as usual. Every other material and facet is cut from
+the bulk cell with ase.build.surface(), where `layers` counts repeats of the
+bulk cell along the surface normal. `vacuum` is added on each side, and slabs
+are periodic in all three directions, as in OC20/OC22.
+
+The bulk cells and the 1x1 slab of every (material, facet, layers, vacuum)
+are memoized. Larger slabs tile that 1x1 slab with supercell(), so they are
+marked as supercells and evaluated through their 1x1 cell (see symmetry.py)
+until an adsorbate is added.
+"""
+
+import math
+import re
+from functools import lru_cache
+from itertools import product
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from ase import Atoms
+from ase.build import (bcc100, bcc110, bcc111, diamond100, diamond111, fcc100, fcc110, fcc111, hcp0001,
+                       molecule, surface)
+from ase.build import add_adsorbate as _place
+from ase.data import chemical_symbols
+
+try:
+    from .build_structures import MATERIAL_DATABASE, create_structure, estimate_unit_cell_atoms
+    from .compact import supercell
+except ImportError:
+    from build_structures import MATERIAL_DATABASE, create_structure, estimate_unit_cell_atoms
+    from compact import supercell
+
+DEFAULT_LAYERS = 4
+DEFAULT_VACUUM = 7.5  # A on each side
+DEFAULT_HEIGHT = 2.0  # A of an adsorbate above the top layer
+SITES = ("top", "bridge", "hollow")
+
+# Facets with a primitive surface cell builder, per elemental structure type
+SURFACE_BUILDERS = {
+    ("fcc", (1, 0, 0)): fcc100, ("fcc", (1, 1, 0)): fcc110, ("fcc", (1, 1, 1)): fcc111,
+    ("bcc", (1, 0, 0)): bcc100, ("bcc", (1, 1, 0)): bcc110, ("bcc", (1, 1, 1)): bcc111,
+    ("hcp", (0, 0, 1)): hcp0001,
+    ("diamond", (1, 0, 0)): diamond100, ("diamond", (1, 1, 1)): diamond111,
+}
+
+_MILLER_TOKEN = re.compile(r'-?\d')
+
+
+def miller_tuple(miller: Union[str, Sequence[int]]) -> Tuple[int, int, int]:
+    """
+    (h, k, l) from [1, 1, 1], "111", "(1 -1 0)" or a four-index hexagonal "0001".
+
+    Raises:
+        ValueError: For anything that is not three or four indices, or all zeros
+    """
+    indices = [int(n) for n in (_MILLER_TOKEN.findall(miller) if isinstance(miller, str) else miller)]
+    if len(indices) == 4:
+        h, k, i, l = indices
+        if h + k + i != 0:
+            raise ValueError(f"Invalid Miller-Bravais indices {miller}: h + k + i must be 0")
+        indices = [h, k, l]
+    if len(indices) != 3 or not any(indices):
+        raise ValueError(f"Invalid Miller indices {miller}")
+    return tuple(indices)
+
+
+def miller_indices(max_index: int = 1, cubic: bool = True) -> List[Tuple[int, int, int]]:
+    """
+    Distinct facets up to max_index: one of (h, k, l) and (-h, -k, -l), and
+    for cubic crystals one per set of permutations and sign changes.
+    """
+    facets = set()
+    for hkl in product(range(-max_index, max_index + 1), repeat=3):
+        if not any(hkl) or math.gcd(*hkl) != 1:
+            continue
+        if cubic:
+            facets.add(tuple(sorted((abs(n) for n in hkl), reverse=True)))
+        else:
+            facets.add(max(hkl, tuple(-n for n in hkl)))
+    return sorted(facets, key=lambda hkl: (max(map(abs, hkl)), sum(map(abs, hkl)), [-n for n in hkl]))
+
+
+def _named_builder(name: str, miller: Tuple[int, int, int], structure_type: Optional[str],
+                   lattice_param: Optional[float], compound: Optional[Tuple[str, ...]]):
+    """(builder, keyword arguments) for elemental low-index facets, else None."""
+    data = MATERIAL_DATABASE.get(name.lower().strip())
+    if data is None or (compound and len(compound) > 1):
+        return None
+    builder = SURFACE_BUILDERS.get((structure_type or data["structure"], miller))
+    if builder is None:
+        return None
+    kwargs = {"symbol": name.strip().capitalize(), "a": lattice_param or data["a"]}
+    if builder is hcp0001 and "c" in data:
+        kwargs["c"] = data["c"] * kwargs["a"] / data["a"]
+    return builder, kwargs
+
+
+@lru_cache(maxsize=256)
+def _bulk(name: str, structure_type: Optional[str], lattice_param: Optional[float],
+          compound: Optional[Tuple[str, ...]]) -> Atoms:
+    return create_structure(name, [1, 1, 1], structure_type=structure_type, lattice_param=lattice_param,
+                            compound=list(compound) if compound else None)
+
+
+def _cut(bulk: Atoms, miller: Tuple[int, int, int], layers: int, vacuum: float) -> Atoms:
+    slab = surface(bulk, miller, layers, vacuum=vacuum)
+    return Atoms(numbers=slab.numbers, positions=slab.positions, cell=slab.cell, pbc=True)
+
+
+@lru_cache(maxsize=256)
+def _unit_slab(name: str, miller: Tuple[int, int, int], layers: int, vacuum: float,
+               structure_type: Optional[str], lattice_param: Optional[float],
+               compound: Optional[Tuple[str, ...]]) -> Atoms:
+    named = _named_builder(name, miller, structure_type, lattice_param, compound)
+    if named is not None:
+        builder, kwargs = named
+        slab = builder(size=(1, 1, layers), vacuum=vacuum, **kwargs)
+        slab = Atoms(numbers=slab.numbers, positions=slab.positions, cell=slab.cell, pbc=True)
+    else:
+        slab = _cut(_bulk(name, structure_type, lattice_param, compound), miller, layers, vacuum)
+    return slab
+
+
+def build_slab(material: Union[str, Atoms], miller: Union[str, Sequence[int]] = (1, 1, 1),
+               size: Sequence[int] = (1, 1), layers: int = DEFAULT_LAYERS, vacuum: float = DEFAULT_VACUUM,
+               structure_type: Optional[str] = None, lattice_param: Optional[float] = None,
+               compound: Optional[List[str]] = None) -> Atoms:
+    """
+    Slab of a material, or of a given bulk cell.
+
+    Args:
+        material: Name as for create_structure(), or bulk Atoms (not memoized)
+        miller: Facet, see miller_tuple()
+        size: In-plane repeats of the surface cell
+        layers: Atomic layers (named builders) or bulk-cell repeats (other facets)
+        vacuum: A of vacuum on each side of the slab
+        structure_type, lattice_param, compound: As for create_structure()
+
+    Returns:
+        A new Atoms with info["miller"] and info["layers"]
+
+    Raises:
+        ValueError: For invalid Miller indices, sizes or layer counts
+    """
+    miller = miller_tuple(miller)
+    size = [int(n) for n in size]
+    if len(size) != 2 or min(size) < 1 or layers < 1:
+        raise ValueError(f"Invalid slab size {size} x {layers} layers")
+    if isinstance(material, Atoms):
+        unit = _cut(material, miller, layers, vacuum)
+    else:
+        unit = _unit_slab(material, miller, int(layers), float(vacuum), structure_type, lattice_param,
+                          tuple(compound) if compound else None)
+    slab = supercell(unit, size + [1]) if math.prod(size) > 1 else unit.copy()
+    slab.info.update(miller=miller, layers=int(layers))
+    return slab
+
+
+def build_slabs(material: Union[str, Atoms], millers: Optional[Iterable[Union[str, Sequence[int]]]] = None,
+                max_index: int = 1, **kwargs) -> Dict[Tuple[int, int, int], Atoms]:
+    """
+    Slabs of many facets of one material in one call.
+
+    Args:
+        millers: Facets to build (default: miller_indices(max_index), cubic
+            when the material is a cubic element or compound)
+        **kwargs: As for build_slab()
+
+    Returns:
+        {(h, k, l): slab}, in the order of millers
+    """
+    if millers is None:
+        millers = miller_indices(max_index, cubic=_is_cubic(material, kwargs.get("structure_type")))
+    return {miller_tuple(m): build_slab(material, m, **kwargs) for m in millers}
+
+
+def _is_cubic(material: Union[str, Atoms], structure_type: Optional[str]) -> bool:
+    if isinstance(material, Atoms):
+        cell = material.cell.cellpar()
+        return bool(np.allclose(cell[:3], cell[0]) and np.allclose(cell[3:], 90))
+    data = MATERIAL_DATABASE.get(material.lower().strip(), {})
+    return (structure_type or data.get("structure")) in ("fcc", "bcc", "sc", "diamond", "rocksalt",
+                                                        "zincblende", "perovskite", "cristobalite")
+
+
+def slab_cell_atoms(name: str, miller: Union[str, Sequence[int]], layers: int = DEFAULT_LAYERS,
+                    structure_type: Optional[str] = None, compound: Optional[List[str]] = None) -> int:
+    """Atoms in the 1x1 slab build_slab() would build, without building it."""
+    miller = miller_tuple(miller)
+    if _named_builder(name, miller, structure_type, None, tuple(compound) if compound else None):
+        return layers
+    return estimate_unit_cell_atoms(name, structure_type, compound) * layers
+
+
+def adsorbate_atoms(adsorbate: Union[str, Atoms]) -> Atoms:
+    """An element symbol ("O") or an ASE molecule name ("CO", "H2O", "CH3") as Atoms."""
+    if isinstance(adsorbate, Atoms):
+        return adsorbate.copy()
+    if adsorbate in chemical_symbols[1:]:
+        return Atoms(adsorbate)
+    try:
+        return molecule(adsorbate)
+    except KeyError:
+        raise ValueError(f"Unknown adsorbate '{adsorbate}' (element symbol or ASE molecule name)") from None
+
+
+def adsorption_sites(slab: Atoms, tolerance: float = 0.5) -> Dict[str, np.ndarray]:
+    """
+    In-plane (x, y) positions of the top, bridge and hollow sites of a slab's top layer.
+
+    Top sites are the atoms within `tolerance` A of the highest one. Bridges
+    are the midpoints of nearest-neighbor pairs and hollows the centers of the
+    triangles of a periodic Delaunay triangulation of the top layer (on square
+    and rectangular layers, the center of each rectangle). Sites repeated by
+    the periodicity are listed once.
+    """
+    from scipy.spatial import Delaunay
+
+    z = slab.positions[:, 2]
+    top = slab.positions[z >= z.max() - tolerance, :2]
+    cell = slab.cell.array[:2, :2]
+    shifts = np.array(list(product(range(-2, 3), repeat=2))) @ cell
+    points = (top[None, :, :] + shifts[:, None, :]).reshape(-1, 2)
+
+    triangles = points[Delaunay(points).simplices]
+    edges = np.concatenate([triangles[:, [0, 1]], triangles[:, [1, 2]], triangles[:, [2, 0]]])
+    lengths = np.linalg.norm(edges[:, 0] - edges[:, 1], axis=1)
+    bridges = edges[lengths <= lengths.min() * 1.15].mean(axis=1)
+
+    # Hollows are the circumcenters of the triangles (the Voronoi vertices of the top layer)
+    a, b, c = triangles[:, 0], triangles[:, 1], triangles[:, 2]
+    d = 2 * (a[:, 0] * (b[:, 1] - c[:, 1]) + b[:, 0] * (c[:, 1] - a[:, 1]) + c[:, 0] * (a[:, 1] - b[:, 1]))
+    sq = [(p ** 2).sum(axis=1) for p in (a, b, c)]
+    hollows = np.stack([sq[0] * (b[:, 1] - c[:, 1]) + sq[1] * (c[:, 1] - a[:, 1]) + sq[2] * (a[:, 1] - b[:, 1]),
+                        sq[0] * (c[:, 0] - b[:, 0]) + sq[1] * (a[:, 0] - c[:, 0]) + sq[2] * (b[:, 0] - a[:, 0])],
+                       axis=1) / d[:, None]
+
+    inverse = np.linalg.inv(cell)
+
+    def unique(xy: np.ndarray) -> np.ndarray:
+        fractional = np.unique(np.round(np.round(xy @ inverse, 4) % 1.0, 4) % 1.0, axis=0)
+        order = np.lexsort((fractional[:, 0], fractional[:, 1]))
+        return fractional[order] @ cell
+
+    return {"top": unique(top), "bridge": unique(bridges), "hollow": unique(hollows)}
+
+
+def add_adsorbate(slab: Atoms, adsorbate: Union[str, Atoms], site: str = "top", height: float = DEFAULT_HEIGHT,
+                  index: int = 0) -> Atoms:
+    """
+    Copy of slab with an adsorbate `height` A above a top, bridge or hollow site.
+
+    The adsorbate keeps its orientation (ase.build.molecule puts the C of CO
+    down) and its lowest atom is placed at the site; index picks among the
+    sites of that kind.
+
+    Raises:
+        ValueError: For unknown adsorbates or sites
+    """
+    if site not in SITES:
+        raise ValueError(f"Unknown adsorption site '{site}' ({', '.join(SITES)})")
+    sites = adsorption_sites(slab)[site]
+    if not len(sites):
+        raise ValueError(f"The slab has no {site} sites")
+    result = slab.copy()
+    result.info.pop("supercell_dims", None)
+    atoms = adsorbate_atoms(adsorbate)
+    _place(result, atoms, height, position=tuple(sites[index % len(sites)]),
+           mol_index=int(np.argmin(atoms.positions[:, 2])))
+    result.pbc = slab.pbc
+    result.info.pop("adsorbate_info", None)
+    result.info.update(adsorbate=adsorbate if isinstance(adsorbate, str) else adsorbate.get_chemical_formula(),
+                       adsorbate_site=site)
+    return result
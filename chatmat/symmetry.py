@@ -0,0 +1,83 @@
+"""
+Symmetry-aware evaluation of perfect supercells.
+
+A supercell built as `unit_cell * (n1, n2, n3)` has n1*n2*n3 identical copies
+of every atomic environment, so the model only has to see the unit cell:
+the supercell energy is the unit-cell energy times the number of repeats and
+the forces are the unit-cell forces tiled over the copies.
+
+create_structure() and get_structure() record the repeat in
+atoms.info["supercell_dims"]. Because the info survives edits such as
+atoms.rattle(), the positions are checked against an exact tiling of the
+first unit cell before the shortcut is used; perturbed, defected or
+otherwise modified structures are evaluated in full.
+"""
+
+import math
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+from ase import Atoms
+
+# Positions may differ from an exact tiling by floating-point noise only
+TOLERANCE = 1e-8
+
+
+def mark_supercell(atoms: Atoms, dims) -> Atoms:
+    """Record that atoms was built as a (n1, n2, n3) repeat of its first len/prod(dims) atoms."""
+    dims = tuple(int(n) for n in dims)
+    if math.prod(dims) > 1:
+        atoms.info["supercell_dims"] = dims
+    return atoms
+
+
+def unit_cell_of(atoms: Atoms) -> Optional[Tuple[Atoms, Tuple[int, int, int]]]:
+    """
+    Recover the repeated unit cell of a perfect supercell.
+
+    Returns:
+        (unit_cell, dims), or None if atoms is not marked as a supercell or is
+        no longer an exact repeat (moved, added or removed atoms, changed cell)
+    """
+    dims = atoms.info.get("supercell_dims")
+    if dims is None or len(dims) != 3 or not atoms.pbc.all():
+        return None
+    repeats = math.prod(dims)
+    if repeats <= 1 or len(atoms) % repeats:
+        return None
+
+    n_unit = len(atoms) // repeats
+    unit_cell = atoms.cell.array / np.asarray(dims, dtype=float)[:, None]
+    # Same order as Atoms.__mul__: for m0, for m1, for m2, one copy of the unit cell
+    offsets = np.indices(dims).reshape(3, -1).T @ unit_cell
+    expected = (offsets[:, None, :] + atoms.positions[None, :n_unit]).reshape(-1, 3)
+    if not np.allclose(atoms.positions, expected, rtol=0, atol=TOLERANCE):
+        return None
+    if not (atoms.numbers.reshape(repeats, n_unit) == atoms.numbers[:n_unit]).all():
+        return None
+
+    unit = Atoms(numbers=atoms.numbers[:n_unit], positions=atoms.positions[:n_unit],
+                 cell=unit_cell, pbc=True)
+    return unit, tuple(dims)
+
+
+def evaluate_with_symmetry(atoms: Atoms, evaluate: Callable[[Atoms], Tuple[float, np.ndarray]]
+                           ) -> Tuple[float, np.ndarray]:
+    """
+    Evaluate atoms, using only its unit cell if it is a perfect supercell.
+
+    Args:
+        atoms: Structure to evaluate
+        evaluate: Returns (energy, forces) of a structure
+
+    Returns:
+        (energy in eV, forces in eV/A as an (N, 3) array) of the full structure
+    """
+    reduced = unit_cell_of(atoms)
+    if reduced is None:
+        return evaluate(atoms)
+    unit, dims = reduced
+    repeats = math.prod(dims)
+    print(f"🔁 Perfect {dims[0]}x{dims[1]}x{dims[2]} supercell: evaluating the {len(unit)}-atom unit cell")
+    energy, forces = evaluate(unit)
+    return float(energy) * repeats, np.tile(np.asarray(forces), (repeats, 1))
@@ -0,0 +1,189 @@
+"""
+CPU thread control for inference workers.
+
+With several worker processes on one machine, each worker must use only its
+share of the cores for torch/BLAS; otherwise every worker starts one thread
+per core and the machine is heavily oversubscribed.
+
+Each worker gets CHATMAT_THREADS_PER_WORKER intra-op threads (torch and BLAS)
+and CHATMAT_INTEROP_THREADS torch inter-op threads. With CHATMAT_CPU_AFFINITY
+the workers are also pinned to disjoint core sets, so their thread pools do
+not migrate between cores or compete for the same ones:
+
+    CHATMAT_CPU_AFFINITY=auto      # split the available cores evenly between workers
+    CHATMAT_CPU_AFFINITY="0-3;4-7" # explicit core set per worker (cycled if fewer than workers)
+
+benchmarks/bench_threads.py measures the throughput of each split between
+workers (request concurrency) and threads per worker on a given machine.
+"""
+
+import os
+import sys
+from typing import Dict, List, Optional, Set
+
+try:
+    from . import config
+except ImportError:
+    import config
+
+# Read by OpenMP, MKL, OpenBLAS, NumExpr and Accelerate when they initialize
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS",
+                   "NUMEXPR_NUM_THREADS", "VECLIB_MAXIMUM_THREADS")
+
+
+# Limits set by limit_threads(), applied again to torch once the model has imported it
+_limits: Dict[str, int] = {}
+
+
+def available_cpus() -> List[int]:
+    """Cores this process may run on (its affinity mask where supported, else all)."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def parse_cpu_list(text: str) -> List[int]:
+    """
+    Parse a Linux-style CPU list such as "0-3,8,10-11".
+
+    Raises:
+        ValueError: If the list is empty or malformed
+    """
+    cores: Set[int] = set()
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        start, stop = int(first), int(last or first)
+        if start < 0 or stop < start:
+            raise ValueError(f"Invalid CPU range '{part}'")
+        cores.update(range(start, stop + 1))
+    if not cores:
+        raise ValueError(f"Empty CPU list '{text}'")
+    return sorted(cores)
+
+
+def worker_cores(index: int, workers: int) -> Optional[List[int]]:
+    """
+    Core set of worker `index` out of `workers` (CHATMAT_CPU_AFFINITY).
+
+    Returns:
+        Sorted core ids, or None if workers are not pinned
+    """
+    spec = config.CPU_AFFINITY.strip().lower()
+    if not spec:
+        return None
+    if spec == "auto":
+        cpus = available_cpus()
+        workers = max(1, workers)
+        if workers >= len(cpus):
+            return [cpus[index % len(cpus)]]
+        # Contiguous blocks keep a worker's threads on neighbouring cores (shared caches)
+        size, extra = divmod(len(cpus), workers)
+        start = index * size + min(index, extra)
+        return cpus[start:start + size + (index < extra)]
+    sets = [parse_cpu_list(part) for part in spec.split(";") if part.strip()]
+    return sets[index % len(sets)]
+
+
+def pin_to_cores(cores: List[int]) -> bool:
+    """
+    Restrict the current process (and threads it starts later) to `cores`.
+
+    Returns:
+        True if the affinity was set; False where the platform does not support it
+    """
+    if not hasattr(os, "sched_setaffinity"):
+        return False
+    os.sched_setaffinity(0, cores)
+    return True
+
+
+def threads_per_worker(workers: int, cores: Optional[List[int]] = None) -> int:
+    """
+    Threads each worker may use: CHATMAT_THREADS_PER_WORKER, else one per core of
+    its core set if pinned, else the available cores split evenly.
+    """
+    if config.THREADS_PER_WORKER > 0:
+        return config.THREADS_PER_WORKER
+    if cores:
+        return len(cores)
+    return max(1, len(available_cpus()) // max(1, workers))
+
+
+def set_thread_env(n_threads: int) -> None:
+    """Set the thread environment variables (effective for runtimes initialized afterwards)."""
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(n_threads)
+
+
+def limit_threads(n_threads: int, interop_threads: int = 0) -> Dict[str, int]:
+    """
+    Limit torch and BLAS thread pools in the current process.
+
+    Runtimes that are already loaded are limited directly (torch through
+    torch.set_num_threads, BLAS/OpenMP through threadpoolctl if installed);
+    the environment variables cover runtimes loaded later, and torch is
+    limited by apply_torch_limits() once the model has imported it.
+
+    Args:
+        n_threads: Intra-op threads (torch, BLAS, OpenMP)
+        interop_threads: torch inter-op threads; 0 leaves torch's default
+
+    Returns:
+        Which runtimes were limited, and to how many threads
+    """
+    set_thread_env(n_threads)
+    _limits.update(threads=n_threads, interop=interop_threads)
+    applied = {"env": n_threads}
+
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(limits=n_threads)
+        applied["blas"] = n_threads
+    except ImportError:
+        pass
+
+    applied.update(apply_torch_limits())
+    return applied
+
+
+def apply_torch_limits() -> Dict[str, int]:
+    """
+    Apply the limits of the last limit_threads() call to torch, if it is loaded.
+
+    Returns:
+        The torch settings that were applied ("torch", "torch_interop")
+    """
+    torch = sys.modules.get("torch")
+    if torch is None or not _limits:
+        return {}
+    torch.set_num_threads(_limits["threads"])
+    applied = {"torch": _limits["threads"]}
+    if _limits["interop"] > 0:
+        try:
+            torch.set_num_interop_threads(_limits["interop"])
+            applied["torch_interop"] = _limits["interop"]
+        except RuntimeError:
+            # Only settable once per process, before inter-op work has started;
+            # a forked worker keeps the value its parent set
+            pass
+    return applied
+
+
+def configure_worker(index: int = 0, workers: int = 1) -> Dict[str, object]:
+    """
+    Pin worker `index` to its core set (CHATMAT_CPU_AFFINITY) and limit its
+    threads (CHATMAT_THREADS_PER_WORKER, CHATMAT_INTEROP_THREADS).
+
+    Returns:
+        The applied settings (see limit_threads), plus "cores" if pinned
+    """
+    cores = worker_cores(index, workers)
+    pinned = bool(cores) and pin_to_cores(cores)
+    applied: Dict[str, object] = dict(limit_threads(threads_per_worker(workers, cores if pinned else None),
+                                                    config.INTEROP_THREADS))
+    if pinned:
+        applied["cores"] = cores
+    return applied
@@ -0,0 +1,133 @@
+"""
+Level-of-detail geometry for the 3D visualizer.
+
+Browsers stall when 3Dmol is handed more than ~10^4 atoms, and a full XYZ
+of a large supercell is also tens of MB of JSON. /calculate/ therefore
+sends the full XYZ only for structures up to CHATMAT_VIZ_MAX_ATOMS atoms,
+and otherwise a bounded representation:
+
+    "unit_cell"  perfect supercells: the unit cell as XYZ plus its repeat
+                 vectors; the client tiles `display_repeats` copies, which
+                 stay within the atom budget
+    "clipped"    anything else: the max_atoms atoms closest to the center
+                 of the cell, a contiguous region of the structure
+
+The full coordinates stay available from /structures/{token}.xyz, which
+streams them in chunks, for CHATMAT_VIZ_FULL_TTL seconds; at most
+CHATMAT_VIZ_FULL_MAX_STORED of them are kept in the shared cache. Tokens
+carry their creation time, so an expired link can be told from an unknown one.
+"""
+
+import math
+import time
+import uuid
+from typing import Any, Dict, Iterator, Optional
+
+import numpy as np
+from ase import Atoms
+from ase.data import chemical_symbols
+
+try:
+    from . import config
+    from .cache import SharedCache
+    from .compact import CompactStructure
+    from .symmetry import unit_cell_of
+except ImportError:
+    import config
+    from cache import SharedCache
+    from compact import CompactStructure
+    from symmetry import unit_cell_of
+
+# Full structures behind the download links; large, so only a few are kept in memory and on disk
+full_structures = SharedCache("full_structures", max_items=8, ttl=lambda: config.VIZ_FULL_TTL,
+                              max_rows=lambda: config.VIZ_FULL_MAX_STORED)
+
+XYZ_CHUNK_ATOMS = 65536
+
+
+def new_token() -> str:
+    """Download token: creation time (hex seconds) and a random part."""
+    return f"{int(time.time()):x}-{uuid.uuid4().hex}"
+
+
+def token_issued(token: str) -> bool:
+    """True if token has the form of one issued by this service in the past (it may have expired)."""
+    created, _, random = token.partition("-")
+    try:
+        return len(random) == 32 and int(created, 16) <= time.time()
+    except ValueError:
+        return False
+
+
+def xyz_header(structure: CompactStructure) -> str:
+    """Count and extended-XYZ comment line (lattice, properties, pbc)."""
+    lattice = " ".join(f"{value:.8f}" for value in structure.cell.ravel())
+    pbc = " ".join("T" if p else "F" for p in structure.pbc)
+    return f'{len(structure)}\nLattice="{lattice}" Properties=species:S:1:pos:R:3 pbc="{pbc}"\n'
+
+
+def iter_xyz(structure: CompactStructure, chunk_atoms: int = XYZ_CHUNK_ATOMS) -> Iterator[str]:
+    """Extended XYZ of a structure, in chunks of chunk_atoms lines."""
+    yield xyz_header(structure)
+    symbols = np.array(chemical_symbols)
+    for start in range(0, len(structure), chunk_atoms):
+        stop = start + chunk_atoms
+        rows = zip(symbols[structure.numbers[start:stop]].tolist(), structure.positions[start:stop].tolist())
+        yield "".join(f"{s:<2} {x:16.8f} {y:16.8f} {z:16.8f}\n" for s, (x, y, z) in rows)
+
+
+def to_xyz(structure: CompactStructure) -> str:
+    return "".join(iter_xyz(structure))
+
+
+def _display_repeats(dims, n_unit: int, max_atoms: int):
+    """Largest block of repeats (at most dims along each axis) with at most max_atoms atoms."""
+    repeats = [1, 1, 1]
+    grown = True
+    while grown:
+        grown = False
+        # Grow the axis with the fewest repeats first, so the block stays roughly cubic
+        for axis in sorted(range(3), key=lambda a: repeats[a]):
+            if repeats[axis] < dims[axis]:
+                trial = list(repeats)
+                trial[axis] += 1
+                if math.prod(trial) * n_unit <= max_atoms:
+                    repeats, grown = trial, True
+    return repeats
+
+
+def visualization(atoms: Atoms, max_atoms: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Bounded representation of a structure for the visualizer.
+
+    Returns:
+        {"mode": "full", "n_atoms"} if the structure is small enough to send as
+        is; otherwise a "unit_cell" or "clipped" representation with its own
+        "xyz", "n_atoms" (displayed atoms), "total_atoms" and "full_xyz_url"
+    """
+    max_atoms = config.VIZ_MAX_ATOMS if max_atoms is None else max_atoms
+    if len(atoms) <= max_atoms:
+        return {"mode": "full", "n_atoms": len(atoms)}
+
+    structure = CompactStructure.from_atoms(atoms)
+    token = new_token()
+    full_structures.set(token, structure)
+    result = {"total_atoms": len(atoms), "full_xyz_url": f"/structures/{token}.xyz"}
+
+    reduced = unit_cell_of(atoms)
+    if reduced is not None and len(reduced[0]) <= max_atoms:
+        unit, dims = reduced
+        repeats = _display_repeats(dims, len(unit), max_atoms)
+        result.update(mode="unit_cell", xyz=to_xyz(CompactStructure.from_atoms(unit)),
+                      repeat_vectors=unit.cell.array.tolist(), repeats=list(dims), display_repeats=repeats,
+                      n_atoms=len(unit) * math.prod(repeats))
+        return result
+
+    # Keep the atoms closest to the cell center: a contiguous, bounded region
+    center = structure.cell.sum(axis=0) / 2
+    distances = np.linalg.norm(structure.positions - center, axis=1)
+    keep = np.sort(np.argpartition(distances, max_atoms - 1)[:max_atoms])
+    region = CompactStructure(structure.numbers[keep], structure.positions[keep], structure.cell, structure.pbc)
+    result.update(mode="clipped", xyz=to_xyz(region), n_atoms=len(keep),
+                  region={"center": center.tolist(), "radius": float(distances[keep].max())})
+    return result
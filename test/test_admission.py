@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Check admission control: atom estimates, limits and the atom budget.
+"""
+
+import contextlib
+import io
+import sys
+import os
+import threading
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from fastapi.testclient import TestClient
+from chatmat import backend, config
+from chatmat.admission import AtomBudget, JobQueue, admit, estimate_request
+from chatmat.backend import CalculationRequest, StructureDetails
+from chatmat.build_structures import COMPOUND_DATABASE, MATERIAL_DATABASE, create_structure
+
+
+def request(name, dims, **details):
+    return CalculationRequest(intent="CALCULATE", material_name=name,
+                              structure_details=StructureDetails(supercell_dims=dims, **details))
+
+
+def test_estimate_matches_built_structure():
+    entries = [(name, None) for name in MATERIAL_DATABASE]
+    entries += [(key, data["elements"]) for key, data in COMPOUND_DATABASE.items()]
+    for name, compound in entries:
+        with contextlib.redirect_stdout(io.StringIO()):
+            atoms = create_structure(name, [2, 1, 3], compound=compound)
+        estimate = estimate_request(request(name, [2, 1, 3], compound=compound))
+        assert estimate.exact and estimate.n_atoms == len(atoms), \
+            f"{name}: estimated {estimate.n_atoms}, built {len(atoms)}"
+
+
+def test_limits():
+    huge = estimate_request(request("catio3", [100, 100, 100]))
+    assert huge.n_atoms == 5 * 100**3
+    try:
+        admit(huge)
+    except Exception as e:
+        assert getattr(e, "status_code", None) == 413
+    else:
+        raise AssertionError("A 5-million-atom request was admitted")
+
+    small = estimate_request(request("Si", [2, 2, 2]))
+    assert admit(small) == "sync"
+
+    saved = config.SYNC_MAX_SECONDS
+    config.SYNC_MAX_SECONDS = small.seconds / 2
+    try:
+        assert admit(small) == "queue"
+    finally:
+        config.SYNC_MAX_SECONDS = saved
+
+
+def test_atom_budget():
+    budget = AtomBudget(100)
+    order = []
+
+    def work(name, n_atoms, hold):
+        with budget.reserve(n_atoms):
+            order.append(name)
+            time.sleep(hold)
+
+    first = threading.Thread(target=work, args=("first", 80, 0.2))
+    first.start()
+    time.sleep(0.05)
+    # Does not fit next to "first" (80 + 40 > 100), so it has to wait
+    second = threading.Thread(target=work, args=("second", 40, 0))
+    second.start()
+    time.sleep(0.05)
+    assert order == ["first"]
+    first.join()
+    second.join()
+    assert order == ["first", "second"] and budget.in_flight == 0
+
+    # A request larger than the whole budget runs alone instead of deadlocking
+    with budget.reserve(500):
+        assert budget.in_flight == 500
+
+
+def test_dry_run():
+    body = request("nacl", [3, 3, 3]).model_dump()
+    saved = config.MODEL_NAME
+    config.MODEL_NAME = "mock"
+    try:
+        with TestClient(backend.app) as client:
+            dry = client.post("/calculate/", json={**body, "dry_run": True}).json()
+            assert dry["dry_run"] and dry["unit_cell_atoms"] == 8 and dry["n_atoms"] == 216
+            assert dry["exact"] and dry["admission"] == "sync" and dry["seconds"] > 0
+
+            # Dry runs share the cache key of the real request, which they never compute
+            if not dry["cached"]:
+                assert client.post("/calculate/", json=body).json()["n_atoms"] == 216
+            assert client.post("/calculate/", json={**body, "dry_run": True}).json()["cached"]
+
+            huge = client.post("/calculate/", json={**request("catio3", [100, 100, 100]).model_dump(),
+                                                    "dry_run": True}).json()
+            assert huge["admission"] == "reject" and huge["n_atoms"] == 5 * 100**3
+    finally:
+        config.MODEL_NAME = saved
+
+
+def wait_for(queue, job_id):
+    for _ in range(200):
+        record = queue.get(job_id)
+        if record["status"] in ("done", "failed"):
+            return record
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_finished_jobs_expire():
+    saved = config.JOB_TTL, config.MODEL_NAME
+    config.JOB_TTL, config.MODEL_NAME = 0.2, "mock"
+    queue = JobQueue()
+    release = threading.Event()
+    try:
+        slow = queue.submit(lambda: release.wait(5) and {"n_atoms": 1})
+        fast = queue.submit(lambda: {"n_atoms": 2})
+        time.sleep(0.3)
+        # Queued and running jobs do not expire
+        assert queue.get(slow)["status"] in ("queued", "running") and queue.get(fast)["status"] == "queued"
+        release.set()
+        assert wait_for(queue, slow)["result"] == {"n_atoms": 1}
+        assert wait_for(queue, fast)["result"] == {"n_atoms": 2}
+        time.sleep(0.3)
+        assert queue.get(slow) is None and queue.get(fast) is None
+        with TestClient(backend.app) as client:
+            response = client.get("/jobs/0123456789abcdef")
+            assert response.status_code == 404 and "CHATMAT_JOB_TTL" in response.json()["detail"]
+    finally:
+        release.set()
+        config.JOB_TTL, config.MODEL_NAME = saved
+
+
+if __name__ == "__main__":
+    print("🧪 Admission control")
+    test_estimate_matches_built_structure()
+    test_limits()
+    test_atom_budget()
+    test_dry_run()
+    test_finished_jobs_expire()
+    print("✅ Admission control works!")
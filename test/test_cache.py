@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Check the shared cache across worker processes: values, TTL and max_rows through one CHATMAT_CACHE_DIR.
+"""
+
+import json
+import subprocess
+import sys
+import os
+import tempfile
+import time
+
+# Add parent directory to path
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+from chatmat import config
+from chatmat.cache import SharedCache
+
+
+def in_other_process(cache_dir, code):
+    """Run code in a separate Python process on the same cache directory; returns what it prints as JSON."""
+    script = "import json\nfrom chatmat.cache import SharedCache\n" + code
+    output = subprocess.run([sys.executable, "-c", script], cwd=ROOT, check=True, capture_output=True, text=True,
+                            env={**os.environ, "CHATMAT_CACHE_DIR": cache_dir}).stdout
+    return json.loads(output) if output.strip() else None
+
+
+def shared_dir(run):
+    saved = config.CACHE_DIR
+    with tempfile.TemporaryDirectory() as cache_dir:
+        config.CACHE_DIR = cache_dir
+        try:
+            run(cache_dir)
+        finally:
+            config.CACHE_DIR = saved
+
+
+def test_values_cross_processes():
+    def run(cache_dir):
+        in_other_process(cache_dir, "SharedCache('shared').set('written', {'energy': -3.5, 'atoms': [1, 2]})")
+        cache = SharedCache("shared")
+        assert cache.get("written") == {"energy": -3.5, "atoms": [1, 2]} and "written" in cache
+        assert SharedCache("other").get("written") is None  # namespaces are separate
+
+        cache.set("answer", [42])
+        cache.set_many([("x", 1), ("y", 2)])
+        cache.delete("written")
+        seen = in_other_process(cache_dir, "c = SharedCache('shared')\n"
+                                           "print(json.dumps([c.get('answer'), c.get('x'), c.get('y'), "
+                                           "c.get('written', 'gone')]))")
+        assert seen == [[42], 1, 2, "gone"]
+
+    shared_dir(run)
+
+
+def test_ttl_cross_processes():
+    def run(cache_dir):
+        in_other_process(cache_dir, "SharedCache('expiring').set('old', 1)")
+        cache = SharedCache("expiring", ttl=0.5)
+        assert cache.get("old") == 1  # now also in this process's memory
+        time.sleep(0.6)
+        assert cache.get("old") is None and "old" not in cache
+
+        # The next write prunes the expired row from the shared file, for every process
+        cache.set("new", 2)
+        seen = in_other_process(cache_dir, "c = SharedCache('expiring')\n"
+                                           "print(json.dumps([c.get('old', 'pruned'), c.get('new')]))")
+        assert seen == ["pruned", 2]
+
+    shared_dir(run)
+
+
+def test_max_rows_cross_processes():
+    def run(cache_dir):
+        in_other_process(cache_dir, "import time\nc = SharedCache('bounded')\n"
+                                    "c.set('k0', 0); time.sleep(0.01); c.set('k1', 1)")
+        cache = SharedCache("bounded", max_items=1, max_rows=3)
+        for key in ("k2", "k3"):
+            time.sleep(0.01)
+            cache.set(key, key)
+        # Only the 3 newest rows are kept, whichever process wrote them
+        seen = in_other_process(cache_dir, "c = SharedCache('bounded')\n"
+                                           "print(json.dumps([k for k in ('k0', 'k1', 'k2', 'k3') if k in c]))")
+        assert seen == ["k1", "k2", "k3"]
+        assert cache.get("k0") is None and cache.get("k1") == 1
+
+    shared_dir(run)
+
+
+if __name__ == "__main__":
+    print("🧪 Testing the shared cache across processes...")
+    test_values_cross_processes()
+    test_ttl_cross_processes()
+    test_max_rows_cross_processes()
+    print("✅ Shared cache works across processes")
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Check the memory-mapped material catalog: write/read round trip and the create_structure fallback.
+"""
+
+import contextlib
+import io
+import sys
+import os
+import tempfile
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from chatmat import catalog, config
+from chatmat.build_structures import COMPOUND_DATABASE, create_structure, find_compound
+from chatmat.catalog import MaterialCatalog, export_builtin_catalog, write_catalog
+
+ENTRIES = [
+    ("KBr", {"structure": "rocksalt", "elements": ["K", "Br"], "a": 6.60, "name": "Potassium Bromide",
+             "spacegroup": 225, "sites": [("K", (0, 0, 0)), ("Br", (0.5, 0.5, 0.5))]}),
+    ("cao", {"structure": "rocksalt", "elements": ["Ca", "O"], "a": 4.81, "name": "Calcium Oxide"}),
+    ("al2o3_corundum", {"structure": "corundum", "elements": ["Al", "O"], "a": 4.76, "c": 12.99,
+                        "formula": "Al2O3", "name": "Corundum"}),
+]
+
+
+def test_round_trip():
+    with tempfile.TemporaryDirectory() as path:
+        assert write_catalog(path, ENTRIES) == 3
+        cat = MaterialCatalog(path)
+        assert len(cat) == 3 and list(cat.keys) == ["al2o3_corundum", "cao", "kbr"]
+        assert isinstance(cat.keys, np.memmap)
+
+        assert cat.find(" KBR ") == 2 and cat.find("nacl") is None and "cao" in cat
+        assert cat.find_formula("BrK") == [2] and cat.find_formula("Al2O3") == [0]
+        assert cat.find_formula("CaO") == [1] and cat.find_formula("ClNa") == []
+
+        kbr = cat.lookup("kbr")
+        assert kbr["key"] == "kbr" and kbr["name"] == "Potassium Bromide" and kbr["elements"] == ["K", "Br"]
+        assert kbr["structure"] == "rocksalt" and kbr["spacegroup"] == 225
+        assert kbr["cellpar"] == [6.6, 6.6, 6.6, 90.0, 90.0, 90.0] and "c" not in kbr
+        assert kbr["sites"] == [("K", (0.0, 0.0, 0.0)), ("Br", (0.5, 0.5, 0.5))]
+
+        corundum = cat.lookup("Al2O3")  # by formula
+        assert corundum["key"] == "al2o3_corundum" and corundum["c"] == 12.99 and "sites" not in corundum
+        assert corundum["cellpar"][5] == 90.0
+        assert cat.lookup("lime", compound=["ca", "O"])["key"] == "cao"  # by element set
+        assert cat.lookup("unobtainium") is None
+
+
+def test_builtin_export():
+    with tempfile.TemporaryDirectory() as path:
+        export_builtin_catalog(path)
+        cat = MaterialCatalog(path)
+        for key, data in COMPOUND_DATABASE.items():
+            row = cat.lookup(key)
+            assert row["elements"] == data["elements"] and row["a"] == data["a"], key
+        assert cat.lookup("cu")["elements"] == ["Cu"]
+        assert cat.lookup("zns_w")["cellpar"][5] == 120.0
+
+
+def test_create_structure_falls_back_to_catalog():
+    saved = config.CATALOG
+    with tempfile.TemporaryDirectory() as path:
+        write_catalog(path, ENTRIES)
+        config.CATALOG = path
+        try:
+            assert find_compound("kbr") is None
+            with contextlib.redirect_stdout(io.StringIO()) as out:
+                kbr = create_structure("KBr", [2, 2, 2])
+                cao = create_structure("CaO", [1, 1, 1])
+            assert "in catalog" in out.getvalue()
+            # Spacegroup + sites: the conventional rocksalt cell, 4 K and 4 Br
+            assert len(kbr) == 64 and kbr.get_chemical_formula() == "Br32K32"
+            assert np.allclose(kbr.cell.lengths(), [13.2] * 3)
+            # No sites: built from the structure type
+            assert cao.get_chemical_formula() == "Ca4O4"
+        finally:
+            config.CATALOG = saved
+            catalog._catalog = catalog._catalog_path = None
+
+
+if __name__ == "__main__":
+    print("🧪 Testing the material catalog...")
+    test_round_trip()
+    test_builtin_export()
+    test_create_structure_falls_back_to_catalog()
+    print("✅ Material catalog works")
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Check the bulk COD import: local directories, an HTTP stub, normalization and error reports.
+"""
+
+import contextlib
+import io
+import sys
+import os
+import tempfile
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from ase.io import write
+from fastapi.responses import PlainTextResponse
+from fastapi.testclient import TestClient
+from benchmarks.mock_servers import create_cod_app
+from chatmat import config
+from chatmat.admission import estimate_request
+from chatmat.backend import CalculationRequest, StructureDetails
+from chatmat.build_structures import create_structure, get_structure
+from chatmat.cache import SharedCache, structure_cache
+from chatmat.cod_import import canonical_cod_id, import_cod, normalize_structure
+
+DISORDERED_CIF = """data_disordered
+_cell_length_a 4.0
+_cell_length_b 4.0
+_cell_length_c 4.0
+_cell_angle_alpha 90
+_cell_angle_beta 90
+_cell_angle_gamma 90
+_symmetry_space_group_name_H-M 'P 1'
+loop_
+_atom_site_label
+_atom_site_type_symbol
+_atom_site_fract_x
+_atom_site_fract_y
+_atom_site_fract_z
+_atom_site_occupancy
+Fe1 Fe 0.0 0.0 0.0 0.7
+Ni1 Ni 0.0 0.0 0.0 0.3
+O1 O 0.5 0.5 0.5 1.0
+Li1 Li 0.5 0.0 0.0 0.2
+Cu1 Cu 1.25 0.0 0.5 1.0
+"""
+
+
+def stub():
+    """COD stand-in with one missing entry (1234567) and one broken CIF (1000043)."""
+    app = create_cod_app()
+    app.state.requests = 0
+
+    @app.middleware("http")
+    async def gaps(request, call_next):
+        app.state.requests += 1
+        if request.url.path.endswith("/1234567.cif"):
+            return PlainTextResponse("Not found", status_code=404)
+        if request.url.path.endswith("/1000043.cif"):
+            return PlainTextResponse("data_broken\n_cell_length_a oops\n")
+        return await call_next(request)
+
+    return app
+
+
+def write_cod_directory(path):
+    """Three COD-named CIFs (one broken) and one file that is not named by id."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        write(os.path.join(path, "1000041.cif"), create_structure("nacl", [1, 1, 1]))
+    os.makedirs(os.path.join(path, "10", "00"))
+    with open(os.path.join(path, "10", "00", "1000042.cif"), "w") as f:
+        f.write(DISORDERED_CIF)
+    with open(os.path.join(path, "1000043.cif"), "w") as f:
+        f.write("data_broken\n_cell_length_a oops\n")
+    with open(os.path.join(path, "notes.cif"), "w") as f:
+        f.write(DISORDERED_CIF)
+
+
+def test_canonical_ids():
+    assert canonical_cod_id("cod-001000041") == canonical_cod_id(1000041) == "1000041"
+    try:
+        canonical_cod_id("mp-149")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("mp-149 accepted as a COD id")
+
+
+def test_normalization():
+    from ase.io import read
+    atoms = normalize_structure(read(io.StringIO(DISORDERED_CIF), format="cif"))
+    # Fe0.7Ni0.3 -> Fe, Li0.2 (mostly vacant) dropped, Cu at x=1.25 wrapped to 0.25
+    assert atoms.get_chemical_symbols() == ["Fe", "O", "Cu"]
+    assert atoms.info["partial_sites"] == 2 and atoms.info["dropped_sites"] == 1
+    assert (atoms.get_scaled_positions() < 1).all() and set(atoms.arrays) == {"numbers", "positions"}
+
+
+def test_import_directory():
+    store = SharedCache("test_cod_import")
+    with tempfile.TemporaryDirectory() as path:
+        write_cod_directory(path)
+        reports = import_cod(directory=path, processes=2, store=store)
+        status = {os.path.basename(r["source"]): r["status"] for r in reports}
+        assert status == {"1000041.cif": "ok", "1000042.cif": "ok", "1000043.cif": "error", "notes.cif": "error"}
+        assert next(r for r in reports if r["cod_id"] == "1000041")["n_atoms"] == 8
+        assert store.get("cod:1000042").get_chemical_symbols() == ["Fe", "O", "Cu"]
+
+        # A second run skips what is already stored
+        again = import_cod(directory=path, store=store)
+        assert [r["status"] for r in again if r["cod_id"] in ("1000041", "1000042")] == ["skipped", "skipped"]
+
+
+def test_import_from_cod_stub():
+    app = stub()
+    saved = config.COD_URL
+    config.COD_URL = "http://cod.test/cod"
+    try:
+        with TestClient(app, base_url="http://cod.test") as session:
+            reports = import_cod(ids=["cod-1000041", 1000043, 1234567, "9008565"], concurrency=4,
+                                 skip_existing=False, session=session)
+        assert [r["status"] for r in reports] == ["ok", "error", "error", "ok"]
+        assert "CIF" in reports[1]["error"] and "404" in reports[2]["error"]
+        assert reports[0]["n_atoms"] == len(structure_cache.get("cod:1000041")) and app.state.requests == 4
+
+        # /calculate/ and get_structure now find the entry without downloading it
+        config.COD_URL = "http://unreachable.invalid/cod"
+        with contextlib.redirect_stdout(io.StringIO()):
+            atoms = get_structure("cod-1000041", source_type="cod", dims=[2, 2, 2])
+        assert len(atoms) == 8 * reports[0]["n_atoms"]
+        estimate = estimate_request(CalculationRequest(
+            intent="CALCULATE", material_name="cod-001000041",
+            structure_details=StructureDetails(source_type="cod", supercell_dims=[2, 2, 2])))
+        assert estimate.exact and estimate.n_atoms == len(atoms)
+    finally:
+        config.COD_URL = saved
+
+
+if __name__ == "__main__":
+    print("🧪 Testing the COD import...")
+    test_canonical_ids()
+    test_normalization()
+    test_import_directory()
+    test_import_from_cod_stub()
+    print("✅ COD import works")
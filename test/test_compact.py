@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Check the compact structure container against ASE Atoms.
+"""
+
+import sys
+import os
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from ase.build import bulk
+from chatmat.compact import CompactStructure, composition, supercell
+from chatmat.symmetry import unit_cell_of
+
+
+def test_supercell_matches_ase():
+    for atoms, dims in [(bulk("NaCl", "rocksalt", a=5.64), (2, 3, 4)),
+                        (bulk("Ti", "hcp", a=2.95, c=4.68), (3, 1, 2)),
+                        (bulk("Cu", "fcc", a=3.61, cubic=True), (1, 1, 1))]:
+        reference = atoms * dims
+        tiled = supercell(atoms, dims)
+        assert np.array_equal(tiled.numbers, reference.numbers)
+        assert np.allclose(tiled.positions, reference.positions, rtol=0, atol=1e-12)
+        assert np.allclose(tiled.cell.array, reference.cell.array)
+        assert (tiled.pbc == reference.pbc).all()
+        if np.prod(dims) > 1:
+            assert unit_cell_of(tiled)[1] == dims
+
+
+def test_zero_copy_conversion():
+    atoms = bulk("Si", "diamond", a=5.43) * (2, 2, 2)
+    compact = CompactStructure.from_atoms(atoms)
+    assert np.shares_memory(compact.positions, atoms.positions)
+    back = compact.to_atoms()
+    assert np.shares_memory(back.positions, atoms.positions)
+    assert np.shares_memory(back.numbers, atoms.numbers)
+    assert back.get_chemical_formula() == atoms.get_chemical_formula()
+
+
+def test_composition_and_fallback():
+    atoms = bulk("NaCl", "rocksalt", a=5.64) * (3, 3, 3)
+    assert composition(atoms) == "Cl27 Na27"
+    tagged = bulk("Cu", "fcc", a=3.61)
+    tagged.set_tags([7])
+    tiled = supercell(tagged, (2, 2, 2))
+    assert (tiled.get_tags() == 7).all() and len(tiled) == 8
+
+
+if __name__ == "__main__":
+    print("🧪 Compact structure container")
+    test_supercell_matches_ase()
+    test_zero_copy_conversion()
+    test_composition_and_fallback()
+    print("✅ Compact structures match ASE!")
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Check the compound index: alias, formula and element-set lookup and the ranking of candidates.
+"""
+
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from chatmat.build_structures import COMPOUND_DATABASE, find_compound, normalize_formula, parse_formula
+
+
+def test_aliases():
+    for name, key in (("nacl", "nacl"), ("Sodium Chloride", "nacl"), ("  MgO ", "mgo"),
+                      ("Titanium Dioxide", "tio2"), ("zns_w", "zns_w"), ("ClNa", "nacl")):
+        assert find_compound(name) == key, f"{name!r} -> {find_compound(name)}"
+    for key in COMPOUND_DATABASE:
+        assert find_compound(key) == key
+
+
+def test_normalized_formula():
+    assert parse_formula("Si2O4") == {"Si": 2, "O": 4} and normalize_formula({"Si": 2, "O": 4}) == "O2Si"
+    assert parse_formula("sio2") is None
+    for name, key in (("Si2O4", "sio2"), ("O3TiBa", "batio3"), ("Ti2O4", "tio2"), ("AsIn", "inas")):
+        assert find_compound(name) == key, f"{name!r} -> {find_compound(name)}"
+
+
+def test_element_set():
+    assert find_compound("table salt", compound=["na", " Cl"]) == "nacl"
+    assert find_compound("zinc blende", compound=["S", "Zn"]) == "zns"
+    # One element is not a compound, and unknown names stay unknown
+    assert find_compound("unobtainium", compound=["Na"]) is None
+    assert find_compound("unobtainium") is None
+
+
+def test_structure_type_preference():
+    assert find_compound("zinc sulfide") == "zns"
+    assert find_compound("zinc sulfide", structure_type="wurtzite") == "zns_w"
+    assert find_compound("O2Si", structure_type="cristobalite") == "sio2_cristobalite"
+    assert find_compound("crystal", compound=["Si", "O"], structure_type="cristobalite") == "sio2_cristobalite"
+    # A preference nothing matches keeps the default ranking
+    assert find_compound("O2Si", structure_type="rocksalt") == "sio2"
+
+
+def test_canonical_keys_win():
+    # Regression: "sio2" used to match "sio2_quartz" as well, depending on dict order
+    for name in ("sio2", "SiO2", "Silicon Dioxide", "O2Si"):
+        assert find_compound(name) == "sio2", f"{name!r} -> {find_compound(name)}"
+    assert find_compound("quartz", compound=["Si", "O"], structure_type="quartz") == "sio2"
+
+
+if __name__ == "__main__":
+    print("🧪 Testing the compound index...")
+    test_aliases()
+    test_normalized_formula()
+    test_element_set()
+    test_structure_type_preference()
+    test_canonical_keys_win()
+    print("✅ Compound index works")
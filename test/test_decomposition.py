@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Check chunked (domain-decomposed) evaluation against a full EMT evaluation.
+"""
+
+import sys
+import os
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from ase.build import bulk
+from ase.calculators.emt import EMT
+from chatmat import calculators, config
+from chatmat.decomposition import evaluate_decomposed, iter_clusters, plan_grid
+
+# EMT forces depend on atoms within two cutoffs (~5.4 A for Cu)
+HALO = 11.0
+
+
+def emt_chunk(cluster):
+    cluster.calc = EMT()
+    return cluster.get_potential_energies(), cluster.get_forces()
+
+
+def full_evaluation(atoms):
+    reference = atoms.copy()
+    reference.calc = EMT()
+    return reference.get_potential_energy(), reference.get_forces()
+
+
+def check(atoms, max_atoms, processes=1):
+    energy, forces = evaluate_decomposed(atoms, emt_chunk, halo=HALO, max_atoms=max_atoms, processes=processes)
+    ref_energy, ref_forces = full_evaluation(atoms)
+    print(f"  {len(atoms)} atoms: dE = {abs(energy - ref_energy):.2e} eV, "
+          f"max dF = {np.abs(forces - ref_forces).max():.2e} eV/A")
+    assert abs(energy - ref_energy) < 1e-8
+    assert np.allclose(forces, ref_forces, atol=1e-8)
+
+
+def test_every_atom_is_core_once():
+    atoms = bulk("Cu", "fcc", a=3.61, cubic=True) * (12, 4, 4)
+    grid = plan_grid(atoms, HALO, 600)
+    assert grid[0] > 1
+    cores = np.concatenate([core for core, _ in iter_clusters(atoms, grid, HALO)])
+    assert np.array_equal(np.sort(cores), np.arange(len(atoms)))
+
+
+def test_orthorhombic_rattled():
+    atoms = bulk("Cu", "fcc", a=3.61, cubic=True) * (12, 4, 4)
+    atoms.rattle(0.05, seed=1)
+    check(atoms, max_atoms=600)
+
+
+def test_triclinic_rattled():
+    atoms = bulk("Cu", "fcc", a=3.61) * (14, 5, 5)
+    atoms.rattle(0.05, seed=2)
+    check(atoms, max_atoms=300)
+
+
+def test_parallel_processes():
+    atoms = bulk("Cu", "fcc", a=3.61, cubic=True) * (12, 4, 4)
+    atoms.rattle(0.05, seed=3)
+    check(atoms, max_atoms=600, processes=2)
+
+
+class WholeCalculator:
+    """Stand-in for a model without per-atom energies."""
+    implemented_properties = ["energy", "forces"]
+
+    def get_potential_energy(self, atoms):
+        return -1.0 * len(atoms)
+
+    def get_forces(self, atoms):
+        return np.zeros((len(atoms), 3))
+
+
+class ChunkCalculator(WholeCalculator):
+    implemented_properties = ["energy", "energies", "forces"]
+
+
+def with_resident(calc, run):
+    """Run run() with calc as the resident model and a 1 MB decomposition ceiling."""
+    saved = (config.MODEL_NAME, config.DECOMP_MEMORY_MB, config.DECOMP_PROCESSES,
+             calculators._calculator, calculators.evaluate_decomposed)
+    config.MODEL_NAME, config.DECOMP_MEMORY_MB, config.DECOMP_PROCESSES = "resident", 1, 4
+    calculators._calculator = calc
+    try:
+        return run()
+    finally:
+        (config.MODEL_NAME, config.DECOMP_MEMORY_MB, config.DECOMP_PROCESSES,
+         calculators._calculator, calculators.evaluate_decomposed) = saved
+
+
+def test_workers_fork_under_evaluation_lock():
+    held = []
+
+    def evaluate_decomposed(atoms, evaluate_chunk):
+        held.append(calculators._evaluation_lock.locked())
+        return 0.0, np.zeros((len(atoms), 3))
+
+    def run():
+        calculators.evaluate_decomposed = evaluate_decomposed
+        calculators._evaluate(bulk("Cu", "fcc", a=3.61) * (30, 30, 30))
+
+    with_resident(ChunkCalculator(), run)
+    assert held == [True]
+
+
+def test_models_without_per_atom_energies_evaluate_whole():
+    def evaluate_decomposed(atoms, evaluate_chunk):
+        raise AssertionError("chunked a model without per-atom energies")
+
+    def run():
+        calculators.evaluate_decomposed = evaluate_decomposed
+        return calculators._evaluate(bulk("Cu", "fcc", a=3.61) * (3, 3, 3))
+
+    energy, forces = with_resident(WholeCalculator(), run)
+    assert energy == -27.0 and forces.shape == (27, 3)
+
+
+if __name__ == "__main__":
+    print("🧪 Chunked evaluation vs full EMT")
+    test_every_atom_is_core_once()
+    test_orthorhombic_rattled()
+    test_triclinic_rattled()
+    test_parallel_processes()
+    test_workers_fork_under_evaluation_lock()
+    test_models_without_per_atom_energies_evaluate_whole()
+    print("✅ Chunked evaluation matches!")
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Check the defect generator: site classes, deduplication, variant arrays and the /defects/ endpoint.
+"""
+
+import contextlib
+import io
+import json
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import numpy as np
+from ase.build import bulk
+from fastapi.testclient import TestClient
+from chatmat import backend, config
+from chatmat.build_structures import create_structure
+from chatmat.compact import CompactStructure
+from chatmat.defects import Defect, TooManyVariants, generate_variants, site_classes
+
+
+def nacl(dims):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return create_structure("nacl", dims)
+
+
+def test_site_classes():
+    atoms = nacl([3, 3, 3])
+    classes = site_classes(atoms)
+    # Every Na is equivalent, every Cl is equivalent
+    assert len(set(classes[atoms.numbers == 11])) == 1 and len(set(classes)) == 2
+    # Unmarked supercells are classified from their own environments, with the same result
+    plain = bulk("Cu", "fcc", a=3.61, cubic=True) * (2, 2, 2)
+    assert len(set(site_classes(plain))) == 1
+    wurtzite = bulk("ZnO", "wurtzite", a=3.25, c=5.2) * (2, 2, 2)
+    assert len(set(site_classes(wurtzite))) == 2
+
+
+def test_single_defects_are_enumerated_once():
+    atoms = nacl([2, 2, 2])
+    base = CompactStructure.from_atoms(atoms)
+    vacancies = list(generate_variants(base, [Defect("Na")]))
+    assert len(vacancies) == 1 and vacancies[0].multiplicity == 32
+    assert len(list(generate_variants(base, [Defect("Na")], unique=False))) == 32
+    assert len(list(generate_variants(base, [Defect("Na")], unique=False, max_variants=32))) == 32
+    try:
+        generate_variants(base, [Defect("Na")], unique=False, max_variants=31)
+    except TooManyVariants:
+        pass
+    else:
+        raise AssertionError("32 variants enumerated with a limit of 31")
+
+    variant = generate_variants(base, [Defect("Cl", "Br")]).__next__()
+    doped = variant.to_atoms()
+    assert len(doped) == 64 and doped.get_chemical_symbols().count("Br") == 1
+    assert "supercell_dims" not in doped.info and doped.info["defect"] == "Br_Cl"
+    # The base arrays are shared, never modified
+    assert np.shares_memory(base.positions, atoms.positions) and (atoms.numbers != 35).all()
+
+
+def test_random_variants():
+    base = nacl([3, 3, 3])
+    divacancies = list(generate_variants(base, [Defect("Na", count=2)], n=100, seed=1))
+    # Equivalent pairs are dropped, leaving one variant per Na-Na distance shell
+    distances = {round(float(base.get_distance(*v.sites, mic=True)), 3) for v in divacancies}
+    assert len(divacancies) == len(distances) < 100
+    assert all(len(v) == len(base) - 2 for v in divacancies)
+
+    alloy = [Defect("Na", "K", fraction=0.25), Defect("Na", "Li", count=3), Defect("Cl")]
+    variants = list(generate_variants(base, alloy, n=5, seed=7))
+    assert len(variants) == 5 and variants[0].label == "27K_Na+3Li_Na+V_Cl#1"
+    for variant in variants:
+        atoms = variant.to_atoms()
+        assert atoms.get_chemical_symbols().count("K") == 27 and len(atoms) == len(base) - 1
+        assert len(np.unique(variant.sites)) == len(variant.sites)
+    again = list(generate_variants(base, alloy, n=5, seed=7))
+    assert [v.sites.tolist() for v in again] == [v.sites.tolist() for v in variants]
+
+    for defects, n in (([Defect("Au")], None), ([Defect("Na", "Xx")], None), ([Defect("Na", count=2)], None),
+                       ([Defect("Na", count=200)], 1)):
+        try:
+            generate_variants(base, defects, n=n)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"{defects} accepted")
+
+
+def test_defects_endpoint():
+    model, max_variants, build = config.MODEL_NAME, config.DEFECTS_MAX_VARIANTS, backend._build_structure
+    config.MODEL_NAME = "mock"
+    try:
+        with TestClient(backend.app) as client:
+            body = {"material_name": "nacl", "structure_details": {"supercell_dims": [2, 2, 2]},
+                    "defects": [{"host": "Na", "replace_with": "K", "count": 2}], "n_variants": 6,
+                    "batch_size": 2}
+            with contextlib.redirect_stdout(io.StringIO()):
+                response = client.post("/defects/", json=body)
+            assert response.status_code == 200
+            lines = [json.loads(line) for line in response.text.splitlines()]
+            assert lines[-1] == {"status": "done", "variants": len(lines) - 1}
+            assert [line["frame"] for line in lines[:-1]] == list(range(len(lines) - 1))
+            assert all("energy" in line and line["species"] == ["K", "K"] for line in lines[:-1])
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                response = client.post("/defects/", json={**body, "defects": [{"host": "Au"}]})
+            assert response.status_code == 400
+            assert client.post("/defects/", json={**body, "n_variants": 0}).status_code == 400
+
+            # Enumerating every site is limited like n_variants, and the base is built within the budget
+            reserved = []
+
+            def counted_build(request):
+                reserved.append(backend.atom_budget.in_flight)
+                return build(request)
+
+            config.DEFECTS_MAX_VARIANTS, backend._build_structure = 31, counted_build
+            every_site = {**body, "defects": [{"host": "Na"}], "n_variants": None, "unique": False}
+            with contextlib.redirect_stdout(io.StringIO()):
+                response = client.post("/defects/", json=every_site)
+            assert response.status_code == 413 and "32" in response.json()["detail"]
+            assert reserved == [64]
+    finally:
+        config.MODEL_NAME, config.DEFECTS_MAX_VARIANTS, backend._build_structure = model, max_variants, build
+
+
+if __name__ == "__main__":
+    print("🧪 Testing the defect generator...")
+    test_site_classes()
+    test_single_defects_are_enumerated_once()
+    test_random_variants()
+    test_defects_endpoint()
+    print("✅ Defect generator works")
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Check that structure fingerprints match equivalent structures and only those.
+"""
+
+import contextlib
+import io
+import sys
+import os
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from ase.build import bulk
+from fastapi.testclient import TestClient
+from chatmat import backend, config
+from chatmat.build_structures import create_structure
+from chatmat.fingerprint import StructureIndex, fingerprint, structure_index
+
+
+def build(name, dims, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return create_structure(name, dims, **kwargs)
+
+
+def shuffled_and_shifted(atoms, seed=0):
+    atoms = atoms[np.random.default_rng(seed).permutation(len(atoms))]
+    atoms.translate([0.37, -1.1, 2.9])
+    atoms.wrap()
+    return atoms
+
+
+def test_equivalent_structures_match():
+    si = fingerprint(build("si", [1, 1, 1]))
+    # Primitive cell (like mp-149), a supercell, and a shuffled, origin-shifted copy
+    assert si.matches(fingerprint(bulk("Si", "diamond", a=5.43)))
+    assert si.matches(fingerprint(build("si", [2, 3, 1])))
+    assert si.matches(fingerprint(shuffled_and_shifted(build("si", [2, 2, 2]))))
+
+    nacl = fingerprint(build("nacl", [1, 1, 1]))
+    assert nacl.formula == (("Na", 1), ("Cl", 1))
+    assert nacl.matches(fingerprint(shuffled_and_shifted(build("nacl", [3, 1, 2]), seed=1)))
+
+
+def test_different_structures_do_not_match():
+    si = fingerprint(build("si", [1, 1, 1]))
+    assert not si.matches(fingerprint(bulk("Si", "diamond", a=5.47)))  # other lattice parameter
+    assert not si.matches(fingerprint(bulk("Si", "fcc", a=5.43)))
+    assert not fingerprint(build("cu", [1, 1, 1])).matches(fingerprint(build("cu", [1, 1, 1], structure_type="bcc")))
+    # Same first shell and volume per atom; they differ from the third shell on
+    fcc, hcp = fingerprint(bulk("Cu", "fcc", a=3.61)), fingerprint(bulk("Cu", "hcp", a=3.61 / np.sqrt(2)))
+    assert abs(fcc.length - hcp.length) < 1e-9 and not fcc.matches(hcp)
+    assert not fingerprint(bulk("ZnS", "zincblende", a=5.41)).matches(
+        fingerprint(bulk("ZnS", "wurtzite", a=5.41 / np.sqrt(2))))
+    rattled = build("cu", [2, 2, 2])
+    rattled.rattle(0.05, seed=1)
+    assert not fingerprint(build("cu", [2, 2, 2])).matches(fingerprint(rattled))
+
+
+def test_index_reuses_energy_per_atom():
+    index = StructureIndex("test-fingerprints")
+    atoms = build("gan", [1, 1, 1])
+    index.add(fingerprint(atoms), -4.5, np.ones((len(atoms), 3)))
+    match = index.lookup(fingerprint(shuffled_and_shifted(build("gan", [2, 2, 1]))))
+    assert match is not None and match["energy_per_atom"] == -4.5
+    assert abs(match["max_force"] - np.sqrt(3)) < 1e-12
+    assert index.lookup(fingerprint(build("gap", [1, 1, 1]))) is None
+
+
+def test_calculate_reports_forces_of_dedup_hits():
+    model, dedup = config.MODEL_NAME, config.DEDUP
+    config.MODEL_NAME, config.DEDUP = "mock", True
+    try:
+        with contextlib.redirect_stdout(io.StringIO()), TestClient(backend.app) as client:
+            details = {"supercell_dims": [2, 2, 2], "structure_type": "fcc", "lattice_parameter": 3.712}
+            first = client.post("/calculate/", json={"intent": "CALCULATE", "material_name": "ni",
+                                                     "structure_details": details}).json()
+            # Another supercell of the same crystal is answered from the structure index
+            details["supercell_dims"] = [1, 1, 2]
+            again = client.post("/calculate/", json={"intent": "CALCULATE", "material_name": "ni",
+                                                     "structure_details": details}).json()
+        stored = structure_index.lookup(fingerprint(build("ni", [1, 1, 1], structure_type="fcc",
+                                                          lattice_param=3.712)))
+        assert first["max_force"] > 0 and first["max_force"] == stored["max_force"]
+        assert again["max_force"] == first["max_force"]
+        assert abs(again["energy"] / again["n_atoms"] - first["energy"] / first["n_atoms"]) < 1e-12
+    finally:
+        config.MODEL_NAME, config.DEDUP = model, dedup
+
+
+if __name__ == "__main__":
+    print("🧪 Structure fingerprints")
+    test_equivalent_structures_match()
+    test_different_structures_do_not_match()
+    test_index_reuses_energy_per_atom()
+    test_calculate_reports_forces_of_dedup_hits()
+    print("✅ Fingerprints match equivalent structures only!")
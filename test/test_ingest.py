@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Check the /ingest/ endpoint with a multi-frame extxyz upload and the mock model.
+"""
+
+import contextlib
+import io
+import json
+import sys
+import os
+import tempfile
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from ase.build import bulk
+from ase.io import write
+from fastapi.testclient import TestClient
+from chatmat import backend, config
+from chatmat.build_structures import iter_structures_from_file
+
+
+def trajectory(n_frames):
+    frames = []
+    for i in range(n_frames):
+        atoms = bulk("Cu", "fcc", a=3.61) * (2, 2, 1 + i % 3)
+        atoms.rattle(0.01, seed=i)
+        frames.append(atoms)
+    buffer = io.StringIO()
+    write(buffer, frames, format="extxyz")
+    return frames, buffer.getvalue().encode()
+
+
+def ingest(client, body, **params):
+    with contextlib.redirect_stdout(io.StringIO()):
+        response = client.post("/ingest/", content=body, params=params)
+    return response, [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_streams_one_line_per_frame():
+    model = config.MODEL_NAME
+    config.MODEL_NAME = "mock"
+    try:
+        frames, body = trajectory(7)
+        with TestClient(backend.app) as client:
+            response, lines = ingest(client, body, format="extxyz", batch_size=3)
+            assert response.status_code == 200
+            assert [line["frame"] for line in lines[:-1]] == list(range(7))
+            assert [line["n_atoms"] for line in lines[:-1]] == [len(atoms) for atoms in frames]
+            assert all("energy" in line for line in lines[:-1])
+            assert lines[-1] == {"status": "done", "frames": 7}
+
+            # Format from the file name; a broken upload reports an error line
+            _, lines = ingest(client, body, filename="md.xyz")
+            assert lines[-1]["frames"] == 7
+            _, lines = ingest(client, body[:-40], format="extxyz", batch_size=2)
+            assert lines[-1]["status"] == "error"
+
+            assert client.post("/ingest/", content=body).status_code == 400
+    finally:
+        config.MODEL_NAME = model
+
+
+def test_iter_structures_from_file():
+    frames, body = trajectory(4)
+    with tempfile.NamedTemporaryFile(suffix=".extxyz") as f:
+        f.write(body)
+        f.flush()
+        read = list(iter_structures_from_file(f.name))
+    assert [len(atoms) for atoms in read] == [len(atoms) for atoms in frames]
+
+
+if __name__ == "__main__":
+    print("🧪 Multi-frame ingestion")
+    test_streams_one_line_per_frame()
+    test_iter_structures_from_file()
+    print("✅ Frames are evaluated and streamed!")
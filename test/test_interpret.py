@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Check the shared request interpreter and the /interpret endpoint.
+"""
+
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from fastapi.testclient import TestClient
+from chatmat import backend, config
+from chatmat.build_structures import parse_llm_structure_response
+from chatmat.interpret import LLM_SYSTEM_PROMPT, calculation_request, interpret, interpret_batch
+
+
+def test_elements_compounds_and_formulas():
+    si = interpret("2x2x2 supercell of silicon")
+    assert si["material_name"] == "Si" and si["supercell_dims"] == [2, 2, 2] and si["recognized"]
+    assert interpret("Fe bcc a=2.87")["structure_type"] == "bcc"
+    assert interpret("Fe bcc a=2.87")["lattice_parameter"] == 2.87
+    assert interpret("sodium chloride")["compound"] == ["Na", "Cl"]
+    assert interpret("GaAs")["compound"] == ["Ga", "As"]
+    quartz = interpret("quartz 2x1x1")
+    assert quartz["material_name"] == "SiO2" and quartz["structure_type"] == "quartz"
+
+
+def test_external_sources():
+    assert interpret("mp-149")["source_type"] == "mp"
+    cod = interpret("cod-9008565")
+    assert cod["source_type"] == "cod" and cod["material_name"] == "9008565"
+
+
+def test_unrecognized_falls_back_to_default():
+    result = interpret("something shiny")
+    assert result["material_name"] == "Si" and not result["recognized"]
+
+
+def test_results_are_copies():
+    first = interpret("NaCl 3x3x3")
+    first["supercell_dims"].append(99)
+    assert interpret("NaCl 3x3x3")["supercell_dims"] == [3, 3, 3]
+    assert [r["material_name"] for r in interpret_batch(["Cu", "MoS2"])] == ["Cu", "MoS2"]
+
+
+def test_shared_with_llm_fallback():
+    parsed = parse_llm_structure_response("Copper, face centered cubic, 3x3x3 supercell")
+    assert parsed["material_name"] == "Cu" and parsed["structure_type"] == "fcc"
+    assert parsed["supercell_dims"] == [3, 3, 3]
+    assert "perovskite" in LLM_SYSTEM_PROMPT and "cristobalite" in LLM_SYSTEM_PROMPT
+
+
+def test_endpoint_returns_request_and_estimate():
+    saved = config.MODEL_NAME, config.MAX_ATOMS
+    config.MODEL_NAME = "mock"
+    config.MAX_ATOMS = 1000
+    try:
+        with TestClient(backend.app) as client:
+            single = client.post("/interpret", json={"text": "2x2x2 supercell of Si"}).json()
+            assert single["request"] == calculation_request("2x2x2 supercell of Si")
+            assert single["estimate"]["n_atoms"] == 64 and single["admission"] == "sync"
+
+            batch = client.post("/interpret", json={"texts": ["NaCl", "Si 10x10x10"]}).json()["results"]
+            assert batch[0]["estimate"]["n_atoms"] == 8
+            assert batch[1]["admission"] == "reject" and batch[1]["reason"]
+
+            # The interpreted request is a valid /calculate/ body
+            response = client.post("/calculate/", json=single["request"])
+            assert response.status_code == 200 and response.json()["n_atoms"] == 64
+
+            assert client.post("/interpret", json={}).status_code == 422
+    finally:
+        config.MODEL_NAME, config.MAX_ATOMS = saved
+
+
+if __name__ == "__main__":
+    print("🧪 Testing request interpretation...")
+    test_elements_compounds_and_formulas()
+    test_external_sources()
+    test_unrecognized_falls_back_to_default()
+    test_results_are_copies()
+    test_shared_with_llm_fallback()
+    test_endpoint_returns_request_and_estimate()
+    print("✅ Request interpretation works")
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Check the bulk Materials Project fetch against the local MP stand-in.
+"""
+
+import contextlib
+import io
+import sys
+import os
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+from benchmarks.mock_servers import create_mp_app
+from chatmat.admission import estimate_request
+from chatmat.backend import CalculationRequest, StructureDetails
+from chatmat.build_structures import get_structure
+from chatmat.cache import SharedCache, structure_cache
+from chatmat.mp_import import MPClient, TokenBucket, fetch_materials_project, structure_to_atoms
+
+
+def stub(rate_limited_requests=0):
+    """MP stand-in that counts requests and answers the first few with 429."""
+    app = create_mp_app()
+    app.state.requests = 0
+
+    @app.middleware("http")
+    async def count(request, call_next):
+        app.state.requests += 1
+        if app.state.requests <= rate_limited_requests:
+            return JSONResponse(status_code=429, content={"detail": "slow down"}, headers={"Retry-After": "0"})
+        return await call_next(request)
+
+    return app
+
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=50, capacity=2)
+    start = time.perf_counter()
+    for _ in range(7):
+        bucket.acquire()
+    # Two tokens in the burst, then 5 at 50 per second
+    assert time.perf_counter() - start >= 0.09
+    assert TokenBucket(rate=0).acquire() == 0.0
+
+
+def test_structure_dict_conversion():
+    structure = {"lattice": {"matrix": [[4, 0, 0], [0, 4, 0], [0, 0, 4]]},
+                 "sites": [{"species": [{"element": "Fe", "occu": 0.3}, {"element": "Ni", "occu": 0.7}],
+                            "abc": [0, 0, 0]},
+                           {"species": [{"element": "O", "occu": 1}], "abc": [0.5, 0.5, 0.5]}]}
+    atoms = structure_to_atoms(structure, "mp-1")
+    assert atoms.get_chemical_symbols() == ["Ni", "O"] and atoms.positions[1].tolist() == [2, 2, 2]
+    assert atoms.info["mp_id"] == "mp-1"
+
+
+def test_batched_fetch():
+    app = stub(rate_limited_requests=1)
+    store = SharedCache("test_mp_import")
+    ids = [f"mp-{n}" for n in range(1, 251)] + ["MP-7", "not-an-id!"]
+    with TestClient(app, base_url="http://mp.test") as session:
+        client = MPClient("key", endpoint="http://mp.test", rate=0, session=session)
+        reports = fetch_materials_project(ids, batch_size=100, processes=2, store=store, client=client)
+
+    # 3 batches, plus one retry after the 429
+    assert app.state.requests == 4 and client.requests == 4
+    assert [r["status"] for r in reports[:251]] == ["ok"] * 251
+    assert reports[250]["material_id"] == "mp-7" and reports[-1]["status"] == "error"
+    assert store.get("mp:mp-42").info["mp_id"] == "mp-42"
+
+    # Stored entries are skipped without asking the server
+    with TestClient(app, base_url="http://mp.test") as session:
+        client = MPClient(endpoint="http://mp.test", rate=0, session=session)
+        again = fetch_materials_project(ids[:10], store=store, client=client)
+    assert client.requests == 0 and {r["status"] for r in again} == {"skipped"}
+
+
+def test_fetched_structures_are_used():
+    with TestClient(stub(), base_url="http://mp.test") as session:
+        client = MPClient(endpoint="http://mp.test", rate=0, session=session)
+        reports = fetch_materials_project(["mp-149000"], client=client, skip_existing=False)
+    assert reports[0]["status"] == "ok"
+    with contextlib.redirect_stdout(io.StringIO()):
+        atoms = get_structure("mp-149000", source_type="mp", dims=[2, 1, 1])
+    assert len(atoms) == 2 * reports[0]["n_atoms"] and "mp:mp-149000" in structure_cache
+
+    # Ids are matched case-insensitively, by the structure and the estimates alike
+    with contextlib.redirect_stdout(io.StringIO()):
+        upper = get_structure(" MP-149000", source_type="mp", dims=[2, 1, 1])
+    assert len(upper) == len(atoms)
+    bulk = estimate_request(CalculationRequest(intent="CALCULATE", material_name="MP-149000",
+                                               structure_details=StructureDetails(source_type="mp",
+                                                                                  supercell_dims=[2, 1, 1])))
+    assert bulk.exact and bulk.n_atoms == len(atoms)
+    slab = estimate_request(CalculationRequest(intent="CALCULATE", material_name="MP-149000",
+                                               structure_details=StructureDetails(source_type="mp",
+                                                                                  surface=[0, 0, 1], layers=2)))
+    assert slab.exact and slab.n_atoms == 2 * reports[0]["n_atoms"]
+
+
+if __name__ == "__main__":
+    print("🧪 Testing the Materials Project bulk fetch...")
+    test_token_bucket()
+    test_structure_dict_conversion()
+    test_batched_fetch()
+    test_fetched_structures_are_used()
+    print("✅ Materials Project bulk fetch works")
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Check the Verlet neighbor lists: pairs against ASE, rebuild criterion, sharing by topology.
+"""
+
+import contextlib
+import io
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import numpy as np
+from ase.build import bulk
+from ase.neighborlist import neighbor_list
+from chatmat import config, neighbors
+from chatmat.build_structures import create_structure
+from chatmat.calculators import share_neighbor_list
+from chatmat.neighbors import VerletList, shared_neighbor_list
+
+
+def pair_set(i, j, d):
+    return set(zip(i.tolist(), j.tolist(), np.round(d, 6).tolist()))
+
+
+def test_pairs_match_ase():
+    with contextlib.redirect_stdout(io.StringIO()):
+        atoms = create_structure("nacl", [3, 3, 3])
+    rng = np.random.default_rng(0)
+    nl = VerletList(cutoff=4.5, skin=0.6)
+    for step in range(6):
+        i, j, vectors, d = nl.pairs(atoms)
+        ai, aj, ad = neighbor_list("ijd", atoms, 4.5)
+        assert pair_set(i, j, d) == pair_set(ai, aj, ad), f"step {step}"
+        assert np.allclose(np.linalg.norm(vectors, axis=1), d)
+        atoms.positions += rng.normal(0, 0.02, atoms.positions.shape)
+    # Small moves reuse the first list; the accumulated drift forces a rebuild eventually
+    assert 1 <= nl.builds < nl.updates == 6
+
+    # ASE NeighborList interface: neighbors within cutoff + skin, with cell offsets
+    nl.update(atoms)
+    indices, offsets = nl.get_neighbors(0)
+    positions = atoms.positions[indices] + offsets @ atoms.cell.array
+    assert len(indices) and offsets.shape == (len(indices), 3)
+    # Each atom has moved less than skin / 2 since the build
+    assert np.linalg.norm(positions - atoms.positions[0], axis=1).max() <= 4.5 + 0.6 + 0.6
+
+
+def test_rebuild_criterion():
+    atoms = bulk("Cu", "fcc", a=3.61, cubic=True) * (3, 3, 3)
+    nl = VerletList(cutoff=5.0, skin=1.0)
+    assert nl.update(atoms) and not nl.update(atoms)
+    atoms.positions[5] += [0.45, 0, 0]
+    assert not nl.update(atoms)
+    atoms.positions[5] += [0.1, 0, 0]  # 0.55 > skin / 2 from where the list was built
+    assert nl.update(atoms)
+    atoms.set_cell(atoms.cell * 1.01, scale_atoms=True)
+    assert nl.update(atoms)
+    atoms.numbers[0] = 28
+    assert nl.update(atoms) and nl.builds == 4
+
+
+def test_shared_by_topology():
+    neighbors.clear()
+    saved = config.NEIGHBOR_CACHE_SIZE
+    config.NEIGHBOR_CACHE_SIZE = 2
+    try:
+        frame = bulk("Si", "diamond", a=5.43) * (2, 2, 2)
+        nl = shared_neighbor_list(frame, cutoff=4.0, skin=0.5)
+        # Another Atoms object of the same topology (the next MD frame) gets the same list
+        nxt = frame.copy()
+        nxt.positions += 0.01
+        assert shared_neighbor_list(nxt, cutoff=4.0, skin=0.5) is nl and nl.builds == 1
+        assert shared_neighbor_list(frame, cutoff=5.0, skin=0.5) is not nl
+
+        other = bulk("Cu", "fcc", a=3.61) * (2, 2, 2)
+        shared_neighbor_list(other, cutoff=4.0, skin=0.5)
+        # Least recently used first out
+        assert shared_neighbor_list(frame, cutoff=4.0, skin=0.5) is not nl
+    finally:
+        config.NEIGHBOR_CACHE_SIZE = saved
+        neighbors.clear()
+
+
+def test_calculator_hook():
+    class Calculator:
+        neighbor_list = None
+
+        def set_neighbor_list(self, nl):
+            self.neighbor_list = nl
+
+    atoms = bulk("Al", "fcc", a=4.05) * (2, 2, 2)
+    # Opt-in
+    assert not share_neighbor_list(Calculator(), atoms)
+    saved = config.NEIGHBOR_LISTS, config.NEIGHBOR_SKIN
+    config.NEIGHBOR_LISTS = True
+    try:
+        calc = Calculator()
+        assert share_neighbor_list(calc, atoms) and calc.neighbor_list.cutoff == config.NEIGHBOR_CUTOFF
+        assert not share_neighbor_list(object(), atoms)
+        config.NEIGHBOR_SKIN = 0
+        assert not share_neighbor_list(Calculator(), atoms)
+    finally:
+        config.NEIGHBOR_LISTS, config.NEIGHBOR_SKIN = saved
+        neighbors.clear()
+
+
+if __name__ == "__main__":
+    print("🧪 Testing the Verlet neighbor lists...")
+    test_pairs_match_ase()
+    test_rebuild_criterion()
+    test_shared_by_topology()
+    test_calculator_hook()
+    print("✅ Verlet neighbor lists work")
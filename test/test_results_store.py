@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Check the memory-mapped results store and the /results endpoints.
+"""
+
+import contextlib
+import io
+import sys
+import os
+import tempfile
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from ase.build import bulk
+from fastapi.testclient import TestClient
+from chatmat import backend, config
+from chatmat.cache import result_cache
+from chatmat.results_store import ResultsStore
+
+
+def test_append_and_read_back():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ResultsStore(tmp)
+        structures = [bulk("Cu", "fcc", a=3.61) * (2, 2, n) for n in (1, 3, 2)]
+        ids = [store.append(atoms, -4.0 * len(atoms), np.full((len(atoms), 3), 0.1 * n), material=f"cu{n}")
+               for n, atoms in enumerate(structures)]
+        for result_id, atoms in zip(ids, structures):
+            record = store.get(result_id)
+            positions = store.array(record, "positions")
+            assert isinstance(positions.base, np.memmap) or isinstance(positions, np.memmap)
+            assert np.array_equal(positions, atoms.positions)
+            assert np.array_equal(store.atoms(record).numbers, atoms.numbers)
+        assert np.allclose(store.array(store.get(ids[2]), "forces"), 0.2)
+        assert [r["material"] for r in store.query()] == ["cu2", "cu1", "cu0"]
+        assert [r["id"] for r in store.query(material="CU1")] == [ids[1]]
+
+        # A result reused from an equivalent structure has no forces
+        result_id = store.append(structures[0], -16.0, material="cu0")
+        assert np.isnan(store.array(store.get(result_id), "forces")).all()
+        assert store.get(result_id)["max_force"] is None
+
+
+def test_calculate_stores_and_reserves():
+    model, results_dir = config.MODEL_NAME, config.RESULTS_DIR
+    with tempfile.TemporaryDirectory() as tmp:
+        config.MODEL_NAME, config.RESULTS_DIR = "mock", tmp
+        request = {"intent": "calculate", "material_name": "nacl",
+                   "structure_details": {"supercell_dims": [2, 1, 1],
+                                         "source_params": {"api_key": "secret"}}}
+        try:
+            with TestClient(backend.app) as client, contextlib.redirect_stdout(io.StringIO()):
+                first = client.post("/calculate/", json=request).json()
+                result_id = first["result_id"]
+                record = client.get(f"/results/{result_id}").json()
+                assert record["n_atoms"] == 16 and record["energy"] == first["energy"]
+                assert record["params"]["structure_details"]["source_params"]["api_key"] == "***"
+                assert "build_s" in record["timings"]
+
+                raw = client.get(f"/results/{result_id}/positions")
+                assert raw.headers["x-shape"] == "16,3"
+                positions = np.frombuffer(raw.content, dtype=raw.headers["x-dtype"]).reshape(16, 3)
+                assert "Properties" in client.get(f"/results/{result_id}/xyz").text
+
+                # After a restart (empty result cache) the response is served from the store
+                result_cache.clear()
+                again = client.post("/calculate/", json=request).json()
+                assert again["result_id"] == result_id and again["energy"] == first["energy"]
+                assert client.get("/results", params={"material": "nacl"}).json()["results"][0]["id"] == result_id
+                assert client.get("/results/999").status_code == 404
+            assert positions.shape == (16, 3)
+        finally:
+            config.MODEL_NAME, config.RESULTS_DIR = model, results_dir
+            result_cache.clear()
+
+
+if __name__ == "__main__":
+    print("🧪 Results store")
+    test_append_and_read_back()
+    test_calculate_stores_and_reserves()
+    print("✅ Results are stored and served!")
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Check the multi-worker supervisor: restart backoff and giving up on workers that keep crashing.
+"""
+
+import contextlib
+import io
+import signal
+import sys
+import os
+import time
+import types
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from chatmat import config, serve
+
+
+def test_restart_budget():
+    budget = serve.RestartBudget(max_restarts=3, window=60, base_delay=1.0)
+    assert [budget.next_delay(0, now) for now in (0, 1, 2)] == [1.0, 2.0, 4.0]
+    assert budget.next_delay(0, 3) is None
+    # Other workers have their own budget, and old crashes leave the window
+    assert budget.next_delay(1, 3) == 1.0
+    assert budget.next_delay(0, 62) == 2.0  # only the crash at 2 is within the last 60 s
+
+    capped = serve.RestartBudget(max_restarts=20, window=60, base_delay=1.0)
+    assert max(capped.next_delay(0, 0) for _ in range(10)) == serve.MAX_RESTART_DELAY
+
+
+def test_crashing_workers_stop_the_server():
+    if not hasattr(os, "fork"):
+        return
+    # No STARTUP attribute: every worker crashes right after the fork
+    backend = types.ModuleType("crashing_backend")
+    backend.warm_up = lambda steps: None
+    names = ("MODEL_NAME", "PORT", "CACHE_DIR", "WORKER_RESTART_DELAY", "WORKER_MAX_RESTARTS",
+             "WORKER_RESTART_WINDOW", "CPU_AFFINITY")
+    saved = {name: getattr(config, name) for name in names}
+    handlers = signal.getsignal(signal.SIGINT), signal.getsignal(signal.SIGTERM)
+    config.MODEL_NAME, config.PORT, config.CPU_AFFINITY = "mock", 0, ""
+    config.WORKER_RESTART_DELAY, config.WORKER_MAX_RESTARTS, config.WORKER_RESTART_WINDOW = 0.01, 2, 60
+    try:
+        start = time.monotonic()
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            code = serve.serve(backend, host="127.0.0.1", workers=2)
+        log = out.getvalue()
+        assert code == 1 and "stopping the server" in log
+        # 2 restarts per worker at most, with a growing delay, then the server gives up
+        assert log.count("restarting in 0.01 s") <= 2 and "restarting in 0.02 s" in log
+        assert time.monotonic() - start < 30
+    finally:
+        for name, value in saved.items():
+            setattr(config, name, value)
+        signal.signal(signal.SIGINT, handlers[0])
+        signal.signal(signal.SIGTERM, handlers[1])
+
+
+if __name__ == "__main__":
+    print("🧪 Testing the worker supervisor...")
+    test_restart_budget()
+    test_crashing_workers_stop_the_server()
+    print("✅ Worker supervisor works")
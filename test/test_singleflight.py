@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Check request coalescing: concurrent identical calls share one computation.
+"""
+
+import sys
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from fastapi.testclient import TestClient
+from chatmat import backend, config
+from chatmat.singleflight import SingleFlight, calculations, coalesce
+
+
+def test_concurrent_calls_run_once():
+    flight = SingleFlight("test")
+    runs = []
+    release = threading.Event()
+
+    def work(x):
+        runs.append(x)
+        release.wait(5)
+        return {"value": x * 2}
+
+    with ThreadPoolExecutor(8) as pool:
+        futures = [pool.submit(flight.do, "key", work, 21) for _ in range(8)]
+        while flight.coalesced < 7:
+            time.sleep(0.01)
+        release.set()
+        results = [f.result() for f in futures]
+
+    assert runs == [21] and flight.in_flight() == 0
+    assert all(r == {"value": 42} for r in results)
+    # Every caller gets its own copy
+    assert len({id(r) for r in results}) == 8
+
+    # Finished calls are not remembered
+    assert flight.do("key", work, 1) == {"value": 2} and runs == [21, 1]
+
+
+def test_errors_reach_every_caller():
+    flight = SingleFlight("test")
+    started = threading.Event()
+
+    @coalesce(flight)
+    def fail(name):
+        started.set()
+        time.sleep(0.2)
+        raise ValueError(name)
+
+    with ThreadPoolExecutor(4) as pool:
+        futures = [pool.submit(fail, "mp-1")]
+        started.wait(5)
+        futures += [pool.submit(fail, "mp-1") for _ in range(3)]
+        errors = [f.exception() for f in futures]
+    assert all(isinstance(e, ValueError) for e in errors) and flight.coalesced == 3
+    assert flight.in_flight() == 0
+
+
+def test_identical_requests_share_one_evaluation():
+    body = {"intent": "CALCULATE", "material_name": "Cu",
+            "structure_details": {"supercell_dims": [2, 2, 2], "lattice_parameter": 3.6137}}
+    evaluated = []
+    original = backend.run_foundation_model
+
+    def slow_model(atoms):
+        evaluated.append(len(atoms))
+        time.sleep(0.3)
+        return original(atoms)
+
+    saved = config.MODEL_NAME, config.DEDUP, config.WARMUP
+    config.MODEL_NAME, config.DEDUP, config.WARMUP = "mock", False, []
+    backend.run_foundation_model = slow_model
+    try:
+        with TestClient(backend.app) as client:
+            before = calculations.coalesced
+            with ThreadPoolExecutor(4) as pool:
+                responses = list(pool.map(lambda _: client.post("/calculate/", json=body), range(4)))
+        assert all(r.status_code == 200 for r in responses)
+        assert len({r.json()["energy"] for r in responses}) == 1
+        assert len(evaluated) == 1 and calculations.coalesced - before == 3
+    finally:
+        backend.run_foundation_model = original
+        config.MODEL_NAME, config.DEDUP, config.WARMUP = saved
+
+
+if __name__ == "__main__":
+    print("🧪 Testing request coalescing...")
+    test_concurrent_calls_run_once()
+    test_errors_reach_every_caller()
+    test_identical_requests_share_one_evaluation()
+    print("✅ Request coalescing works")
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Check the slab builder: named and generic facets, memoization, adsorption sites and /calculate/ slabs.
+"""
+
+import contextlib
+import io
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import numpy as np
+from fastapi.testclient import TestClient
+from chatmat import backend, config
+from chatmat.admission import estimate_request
+from chatmat.backend import CalculationRequest
+from chatmat.interpret import calculation_request, interpret
+from chatmat.surfaces import (_unit_slab, add_adsorbate, adsorption_sites, build_slab, build_slabs, miller_indices,
+                              miller_tuple)
+from chatmat.symmetry import unit_cell_of
+
+
+def quiet(function, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return function(*args, **kwargs)
+
+
+def test_miller_indices():
+    assert miller_tuple("111") == miller_tuple("(1 1 1)") == miller_tuple([1, 1, 1]) == (1, 1, 1)
+    assert miller_tuple("0001") == (0, 0, 1) and miller_tuple("(1 -1 0)") == (1, -1, 0)
+    for bad in ("000", "1120", [1, 2]):
+        try:
+            miller_tuple(bad)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"{bad} accepted")
+    assert miller_indices(1) == [(1, 0, 0), (1, 1, 0), (1, 1, 1)]
+    assert len(miller_indices(1, cubic=False)) == 13
+
+
+def test_named_and_cut_slabs():
+    slab = build_slab("Pt", "111", size=(4, 4), layers=4, vacuum=7.5)
+    # One atom per layer in the primitive (111) cell, periodic with vacuum along z
+    assert len(slab) == 64 and slab.pbc.all() and slab.info["miller"] == (1, 1, 1)
+    assert slab.cell.lengths()[2] - np.ptp(slab.positions[:, 2]) >= 15 - 1e-6
+    # Tiled from the memoized 1x1 slab, so it is evaluated through that cell
+    assert unit_cell_of(slab)[1] == (4, 4, 1)
+    hits = _unit_slab.cache_info().hits
+    build_slab("Pt", "111", size=(2, 2))
+    assert _unit_slab.cache_info().hits == hits + 1
+
+    nacl = quiet(build_slab, "NaCl", "100", size=(2, 1), layers=2)
+    assert len(nacl) == 2 * 2 * 8 and nacl.get_chemical_symbols().count("Na") == len(nacl) // 2
+
+    slabs = quiet(build_slabs, "Cu", max_index=2, layers=3)
+    assert list(slabs)[:3] == [(1, 0, 0), (1, 1, 0), (1, 1, 1)] and len(slabs) == 6
+    assert all(slab.info["layers"] == 3 for slab in slabs.values())
+
+
+def test_adsorption_sites():
+    counts = {"111": (1, 3, 2), "100": (1, 2, 1), "110": (1, 1, 1)}
+    for miller, expected in counts.items():
+        sites = adsorption_sites(build_slab("Cu", miller))
+        assert tuple(len(sites[kind]) for kind in ("top", "bridge", "hollow")) == expected, miller
+    assert len(adsorption_sites(build_slab("Cu", "111", size=(2, 2)))["hollow"]) == 8
+
+    slab = build_slab("Pt", "111", size=(2, 2))
+    covered = add_adsorbate(slab, "CO", site="hollow")
+    top = slab.positions[:, 2].max()
+    carbon, oxygen = covered.positions[-1], covered.positions[-2]
+    assert covered.get_chemical_symbols()[-2:] == ["O", "C"] and abs(carbon[2] - top - 2.0) < 1e-9
+    assert oxygen[2] > carbon[2] and unit_cell_of(covered) is None
+    assert len(slab) == 16 and covered.info["adsorbate_site"] == "hollow"
+
+
+def test_interpreted_slab_request():
+    parsed = interpret("Pt(111) 4x4 slab, 3 layers, 10 A vacuum with O on bridge site")
+    assert parsed["material_name"] == "Pt" and parsed["surface"] == [1, 1, 1]
+    assert parsed["supercell_dims"] == [4, 4, 1] and parsed["layers"] == 3 and parsed["vacuum"] == 10.0
+    assert parsed["adsorbate"] == "O" and parsed["adsorbate_site"] == "bridge"
+    assert interpret("2x2x2 supercell of silicon")["surface"] is None
+
+    # "<adsorbate> on <material>(hkl)": the slab is the material carrying the Miller index
+    phrases = {"CO on Pt(111) hollow site": ("Pt", [1, 1, 1], "CO", "hollow"),
+               "H adsorbed on Cu(100)": ("Cu", [1, 0, 0], "H", None),
+               "O on top of Ni(111)": ("Ni", [1, 1, 1], "O", "top")}
+    for text, expected in phrases.items():
+        parsed = interpret(text)
+        fields = ("material_name", "surface", "adsorbate", "adsorbate_site")
+        assert tuple(parsed[key] for key in fields) == expected, (text, parsed)
+        assert parsed["compound"] is None
+
+    body = calculation_request("Pt(111) 4x4 slab, 3 layers, 10 A vacuum with O on bridge site")
+    estimate = estimate_request(CalculationRequest(**body))
+    assert estimate.exact and estimate.n_atoms == 4 * 4 * 3 + 1
+
+    model = config.MODEL_NAME
+    config.MODEL_NAME = "mock"
+    try:
+        with TestClient(backend.app) as client:
+            response = quiet(client.post, "/calculate/", json=body)
+            assert response.status_code == 200, response.text
+            assert response.json()["n_atoms"] == 49
+            body["structure_details"]["surface"] = [0, 0, 0]
+            assert quiet(client.post, "/calculate/", json=body).status_code == 400
+    finally:
+        config.MODEL_NAME = model
+
+
+if __name__ == "__main__":
+    print("🧪 Testing the slab builder...")
+    test_miller_indices()
+    test_named_and_cut_slabs()
+    test_adsorption_sites()
+    test_interpreted_slab_request()
+    print("✅ Slab builder works")
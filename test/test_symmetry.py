@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Check symmetry-aware (unit-cell) evaluation of supercells against full EMT evaluation.
+"""
+
+import contextlib
+import io
+import sys
+import os
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from ase.calculators.emt import EMT
+from chatmat.build_structures import create_structure
+from chatmat.symmetry import evaluate_with_symmetry, unit_cell_of
+
+CALLS = []
+
+
+def emt(atoms):
+    CALLS.append(len(atoms))
+    atoms = atoms.copy()
+    atoms.calc = EMT()
+    return atoms.get_potential_energy(), atoms.get_forces()
+
+
+def build(name, dims, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return create_structure(name, dims, **kwargs)
+
+
+def test_matches_full_evaluation():
+    cases = [("cu", [3, 3, 3], {}), ("al", [2, 3, 4], {}), ("ni", [2, 2, 3], {"structure_type": "hcp"}),
+             ("au", [3, 2, 2], {"structure_type": "bcc"})]
+    for name, dims, kwargs in cases:
+        atoms = build(name, dims, **kwargs)
+        # Strain the cell slightly so that forces are non-zero but the repeat stays perfect
+        atoms.set_cell(atoms.cell.array @ np.array([[1.02, 0.01, 0], [0, 0.99, 0], [0, 0, 1.01]]),
+                       scale_atoms=True)
+        CALLS.clear()
+        with contextlib.redirect_stdout(io.StringIO()):
+            energy, forces = evaluate_with_symmetry(atoms, emt)
+        ref_energy, ref_forces = emt(atoms)
+        print(f"  {name} {dims}: {len(atoms)} atoms via {CALLS[0]}-atom unit cell, "
+              f"dE = {abs(energy - ref_energy):.1e} eV")
+        assert CALLS[0] == len(atoms) // np.prod(dims)
+        assert abs(energy - ref_energy) < 1e-8
+        assert np.allclose(forces, ref_forces, atol=1e-8)
+
+
+def test_falls_back_when_perturbed():
+    atoms = build("cu", [3, 3, 3])
+    assert unit_cell_of(atoms) is not None
+
+    rattled = atoms.copy()
+    rattled.rattle(0.02, seed=1)
+    assert unit_cell_of(rattled) is None
+
+    vacancy = atoms.copy()
+    del vacancy[5]
+    assert unit_cell_of(vacancy) is None
+
+    substituted = atoms.copy()
+    substituted[7].symbol = "Ni"
+    assert unit_cell_of(substituted) is None
+
+    CALLS.clear()
+    energy, forces = evaluate_with_symmetry(rattled, emt)
+    ref_energy, ref_forces = emt(rattled)
+    assert CALLS[0] == len(rattled)
+    assert abs(energy - ref_energy) < 1e-10 and np.allclose(forces, ref_forces)
+
+
+if __name__ == "__main__":
+    print("🧪 Symmetry-aware evaluation vs full EMT")
+    test_matches_full_evaluation()
+    test_falls_back_when_perturbed()
+    print("✅ Symmetry-aware evaluation matches!")
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Check the worker thread and core affinity controls: CPU lists, core sets per worker, torch limits.
+"""
+
+import sys
+import os
+import types
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from chatmat import config, threads
+from chatmat.threads import (apply_torch_limits, configure_worker, limit_threads, parse_cpu_list, threads_per_worker,
+                             worker_cores)
+
+
+def settings(**values):
+    saved = {name: getattr(config, name) for name in values}
+    for name, value in values.items():
+        setattr(config, name, value)
+    return saved
+
+
+def test_parse_cpu_list():
+    assert parse_cpu_list("0-3,8,10-11") == [0, 1, 2, 3, 8, 10, 11]
+    assert parse_cpu_list(" 2, 1 ,2") == [1, 2]
+    for bad in ("", "3-1", "a", "-1"):
+        try:
+            parse_cpu_list(bad)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"{bad!r} accepted")
+
+
+def test_worker_cores():
+    saved = settings(CPU_AFFINITY="", THREADS_PER_WORKER=0)
+    available = threads.available_cpus
+    threads.available_cpus = lambda: list(range(10))
+    try:
+        assert worker_cores(0, 4) is None and threads_per_worker(5) == 2
+
+        config.CPU_AFFINITY = "auto"
+        blocks = [worker_cores(index, 4) for index in range(4)]
+        # Disjoint contiguous blocks covering every core, the first ones one core larger
+        assert blocks == [[0, 1, 2], [3, 4, 5], [6, 7], [8, 9]]
+        assert threads_per_worker(4, blocks[0]) == 3
+        assert [worker_cores(index, 12) for index in (0, 11)] == [[0], [1]]
+
+        config.CPU_AFFINITY = "0-3;4-7"
+        assert [worker_cores(index, 3) for index in range(3)] == [[0, 1, 2, 3], [4, 5, 6, 7], [0, 1, 2, 3]]
+        config.THREADS_PER_WORKER = 2
+        assert threads_per_worker(3, [0, 1, 2, 3]) == 2
+    finally:
+        threads.available_cpus = available
+        for name, value in saved.items():
+            setattr(config, name, value)
+
+
+def test_configure_worker():
+    saved = settings(CPU_AFFINITY="auto", THREADS_PER_WORKER=0, INTEROP_THREADS=0)
+    before = threads.available_cpus()
+    try:
+        applied = configure_worker(0, 1)
+        assert os.environ["OMP_NUM_THREADS"] == str(applied["env"])
+        if hasattr(os, "sched_setaffinity"):
+            assert applied["cores"] == before and applied["env"] == len(before)
+    finally:
+        for name, value in saved.items():
+            setattr(config, name, value)
+        limit_threads(len(before))
+
+
+def test_torch_limits():
+    class Torch(types.ModuleType):
+        interop = None
+
+        def set_num_threads(self, n):
+            self.threads = n
+
+        def set_num_interop_threads(self, n):
+            if self.interop is not None:
+                raise RuntimeError("cannot set number of interop threads twice")
+            self.interop = n
+
+    torch = Torch("torch")
+    present = sys.modules.get("torch")
+    sys.modules["torch"] = torch
+    try:
+        assert limit_threads(3, 2) == {"env": 3, "torch": 3, "torch_interop": 2}
+        # Only the intra-op pool can be resized later (e.g. in a forked worker)
+        assert apply_torch_limits() == {"torch": 3} and torch.interop == 2
+        limit_threads(4)
+        assert torch.threads == 4 and torch.interop == 2
+    finally:
+        if present is None:
+            sys.modules.pop("torch")
+        else:
+            sys.modules["torch"] = present
+        limit_threads(len(threads.available_cpus()))
+
+
+if __name__ == "__main__":
+    print("🧪 Testing the worker thread and affinity controls...")
+    test_parse_cpu_list()
+    test_worker_cores()
+    test_configure_worker()
+    test_torch_limits()
+    print("✅ Worker thread and affinity controls work")
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Check the level-of-detail visualization of large structures.
+"""
+
+import contextlib
+import io
+import math
+import sys
+import os
+import tempfile
+import time
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from ase.io import read
+from fastapi.testclient import TestClient
+from chatmat import backend, config
+from chatmat.cache import SharedCache
+from chatmat.build_structures import create_structure
+from chatmat.compact import CompactStructure
+from chatmat.visualization import full_structures, to_xyz, visualization
+
+
+def build(name, dims):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return create_structure(name, dims)
+
+
+def test_small_structures_are_sent_in_full():
+    assert visualization(build("si", [2, 2, 2]), max_atoms=100) == {"mode": "full", "n_atoms": 64}
+
+
+def test_unit_cell_view_stays_within_budget():
+    atoms = build("nacl", [10, 12, 9])
+    view = visualization(atoms, max_atoms=1000)
+    assert view["mode"] == "unit_cell" and view["repeats"] == [10, 12, 9]
+    assert view["n_atoms"] <= 1000 and view["n_atoms"] == 8 * math.prod(view["display_repeats"])
+    assert len(read(io.StringIO(view["xyz"]), format="extxyz")) == 8
+
+
+def test_clipped_view_of_perturbed_structure():
+    atoms = build("cu", [12, 12, 12])
+    atoms.rattle(0.02, seed=1)
+    view = visualization(atoms, max_atoms=500)
+    assert view["mode"] == "clipped" and view["n_atoms"] == 500
+    region = read(io.StringIO(view["xyz"]), format="extxyz")
+    center = np.asarray(view["region"]["center"])
+    assert np.linalg.norm(region.positions - center, axis=1).max() <= view["region"]["radius"] + 1e-9
+
+
+def test_full_xyz_download():
+    model, limit = config.MODEL_NAME, config.VIZ_MAX_ATOMS
+    config.MODEL_NAME, config.VIZ_MAX_ATOMS = "mock", 200
+    request = {"intent": "calculate", "material_name": "gan", "structure_details": {"supercell_dims": [5, 5, 4]}}
+    try:
+        with TestClient(backend.app) as client, contextlib.redirect_stdout(io.StringIO()):
+            result = client.post("/calculate/", json=request).json()
+            assert result["structure_xyz"] is None
+            assert result["visualization"]["n_atoms"] <= 200
+            full = client.get(result["visualization"]["full_xyz_url"])
+            assert client.get("/structures/unknown.xyz").status_code == 404
+        atoms = read(io.StringIO(full.text), format="extxyz")
+        assert len(atoms) == result["n_atoms"] == 800
+        assert np.allclose(atoms.positions, build("gan", [5, 5, 4]).positions, atol=1e-7)
+    finally:
+        config.MODEL_NAME, config.VIZ_MAX_ATOMS = model, limit
+
+
+def test_full_structures_are_bounded():
+    saved = config.MODEL_NAME, config.VIZ_MAX_ATOMS, config.CACHE_DIR, config.VIZ_FULL_MAX_STORED
+    config.MODEL_NAME, config.VIZ_MAX_ATOMS, config.CACHE_DIR = "mock", 200, tempfile.mkdtemp()
+    config.VIZ_FULL_MAX_STORED = 2
+    request = {"intent": "calculate", "material_name": "gan", "structure_details": {"supercell_dims": [5, 5, 4]}}
+    try:
+        # Bounded on disk too: only the newest entries stay, and entries expire
+        store = SharedCache("test_full_structures", max_items=1, max_rows=lambda: config.VIZ_FULL_MAX_STORED)
+        for n in range(4):
+            store.set(str(n), n)
+        assert [str(n) in store for n in range(4)] == [False, False, True, True]
+        expiring = SharedCache("test_full_structures", ttl=1e-3)
+        expiring.set("old", 1)
+        time.sleep(0.01)
+        assert expiring.get("old") is None and "old" not in expiring
+
+        with TestClient(backend.app) as client, contextlib.redirect_stdout(io.StringIO()):
+            result = client.post("/calculate/", json=request).json()
+            url = result["visualization"]["full_xyz_url"]
+            full_structures.clear()
+            response = client.get(url)
+            assert response.status_code == 410 and "expired" in response.json()["detail"]
+            # The cached result is not returned with a dead link
+            again = client.post("/calculate/", json=request).json()
+            assert again["visualization"]["full_xyz_url"] != url
+            assert client.get(again["visualization"]["full_xyz_url"]).status_code == 200
+    finally:
+        config.MODEL_NAME, config.VIZ_MAX_ATOMS, config.CACHE_DIR, config.VIZ_FULL_MAX_STORED = saved
+        backend.result_cache.clear()
+
+
+def test_xyz_matches_ase():
+    atoms = build("tio2", [2, 1, 1])
+    parsed = read(io.StringIO(to_xyz(CompactStructure.from_atoms(atoms))), format="extxyz")
+    assert parsed.get_chemical_symbols() == atoms.get_chemical_symbols()
+    assert np.allclose(parsed.cell.array, atoms.cell.array)
+
+
+if __name__ == "__main__":
+    print("🧪 Level-of-detail visualization")
+    test_small_structures_are_sent_in_full()
+    test_unit_cell_view_stays_within_budget()
+    test_clipped_view_of_perturbed_structure()
+    test_full_xyz_download()
+    test_full_structures_are_bounded()
+    test_xyz_matches_ase()
+    print("✅ Large structures stay within the visualization budget!")
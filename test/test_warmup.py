@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Check the startup warm-up and the /health readiness check.
+"""
+
+import contextlib
+import io
+import sys
+import os
+import threading
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from fastapi.testclient import TestClient
+from chatmat import backend
+
+
+@contextlib.contextmanager
+def fresh_startup():
+    saved = {key: value.copy() if isinstance(value, dict) else value for key, value in backend.STARTUP.items()}
+    backend.STARTUP.update(ready=False, steps={}, errors={})
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield TestClient(backend.app)  # no lifespan: the tests run warm_up() themselves
+    finally:
+        backend.STARTUP.update(saved)
+
+
+def test_health_while_warming_up():
+    started, release = threading.Event(), threading.Event()
+    saved = backend.warm_prototype_cache
+
+    def slow_cache():
+        started.set()
+        release.wait(10)
+
+    backend.warm_prototype_cache = slow_cache
+    try:
+        with fresh_startup() as client:
+            warm = threading.Thread(target=backend.warm_up, args=(["structures"],))
+            warm.start()
+            assert started.wait(10)
+            response = client.get("/health")
+            assert response.status_code == 503 and response.json()["status"] == "starting"
+            release.set()
+            warm.join()
+            response = client.get("/health")
+            assert response.status_code == 200 and response.json()["status"] == "healthy"
+            assert "structures" in response.json()["warmup"]
+    finally:
+        release.set()
+        backend.warm_prototype_cache = saved
+
+
+def test_health_after_failed_model_step():
+    saved = backend.run_foundation_model
+
+    def no_model(atoms):
+        raise RuntimeError("model file not found")
+
+    backend.run_foundation_model = no_model
+    try:
+        with fresh_startup() as client:
+            backend.warm_up(["imports", "model"])
+            response = client.get("/health")
+            assert response.status_code == 503
+            assert response.json()["status"] == "degraded"
+            assert "model file not found" in response.json()["warmup_errors"]["model"]
+    finally:
+        backend.run_foundation_model = saved
+
+
+def test_health_after_failed_optional_step():
+    with fresh_startup() as client:
+        backend.warm_up(["imports", "no-such-step"])
+        response = client.get("/health")
+        assert response.status_code == 200 and response.json()["status"] == "healthy"
+        assert "no-such-step" in response.json()["warmup_errors"]
+
+
+if __name__ == "__main__":
+    print("🧪 Testing the warm-up and /health...")
+    test_health_while_warming_up()
+    test_health_after_failed_model_step()
+    test_health_after_failed_optional_step()
+    print("✅ /health reflects the warm-up")